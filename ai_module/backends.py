@@ -0,0 +1,196 @@
+# ai_module/backends.py
+"""
+추론 백엔드 선택 및 가중치 변환(export / INT8 양자화) 도구.
+
+백엔드 (config.AI_BACKEND)
+  pytorch   : weights/<name>.pt                (기존 방식, ultralytics + torch)
+  onnx      : weights/<name>.onnx              (ONNX Runtime FP32, 동적 입력 크기)
+  onnx-int8 : weights/<name>.int8.onnx         (ONNX Runtime INT8 양자화)
+  openvino  : weights/<name>_openvino_model/   (Intel CPU 용 OpenVINO FP32)
+
+ultralytics.YOLO 는 위 파일을 모두 직접 열 수 있으므로 analyze_* 함수와 결과 형식은 그대로입니다.
+선택한 백엔드 파일이 없으면 경고 후 .pt 로 대체합니다.
+
+허용 오차 (같은 이미지에 대해 pytorch 결과 대비, verify 명령으로 확인)
+  onnx / openvino : ripeness_score 차이 <= 0.02, 익음 상태 동일, flower_count 차이 <= 1
+  onnx-int8       : ripeness_score 차이 <= 0.10, 익음 상태 동일, flower_count 차이 <= 2
+
+사용법
+  python -m ai_module.backends export --backend onnx
+  python -m ai_module.backends export --backend onnx-int8 --calib images/calib   # 정적 양자화
+  python -m ai_module.backends export --backend onnx-int8                        # 보정 이미지 없으면 동적 양자화
+  python -m ai_module.backends verify --backend onnx-int8 images/test_strawberry.jpg
+
+필요 패키지 (선택): onnx, onnxruntime (onnx / onnx-int8), openvino (openvino)
+"""
+
+import argparse
+import glob
+import logging
+import os
+
+from config import BASE_DIR
+
+WEIGHTS_DIR = os.path.join(BASE_DIR, 'ai_module', 'weights')
+MODEL_NAMES = ("ripe", "flower")
+
+BACKEND_SUFFIXES = {
+    "pytorch": ".pt",
+    "onnx": ".onnx",
+    "onnx-int8": ".int8.onnx",
+    "openvino": "_openvino_model",
+}
+
+# backend -> (ripeness_score 허용 차이, flower_count 허용 차이)
+TOLERANCES = {
+    "pytorch": (0.0, 0),
+    "onnx": (0.02, 1),
+    "openvino": (0.02, 1),
+    "onnx-int8": (0.10, 2),
+}
+
+
+def model_path(name, backend="pytorch", weights_dir=WEIGHTS_DIR):
+    if backend not in BACKEND_SUFFIXES:
+        raise ValueError(f"unknown backend: {backend} (choose from {', '.join(BACKEND_SUFFIXES)})")
+    return os.path.join(weights_dir, name + BACKEND_SUFFIXES[backend])
+
+
+def resolve_model_path(name, backend="pytorch", weights_dir=WEIGHTS_DIR):
+    """선택한 백엔드의 가중치 경로. 파일이 없으면 .pt 경로로 대체합니다."""
+    path = model_path(name, backend, weights_dir)
+    if backend != "pytorch" and not os.path.exists(path):
+        fallback = model_path(name, "pytorch", weights_dir)
+        logging.warning(f"{backend} 가중치가 없어 PyTorch 로 대체합니다: {path} -> {fallback} "
+                        f"('python -m ai_module.backends export --backend {backend}' 로 생성)")
+        return fallback
+    return path
+
+
+# --- export / 양자화 ---
+
+def _export_onnx(name, imgsz, weights_dir):
+    from ultralytics import YOLO
+
+    # 직사각형 letterbox 와 배치 입력을 받을 수 있도록 동적 입력 크기로 내보냄
+    exported = YOLO(model_path(name, "pytorch", weights_dir)).export(format="onnx", imgsz=imgsz, dynamic=True)
+    target = model_path(name, "onnx", weights_dir)
+    if os.path.abspath(exported) != os.path.abspath(target):
+        os.replace(exported, target)
+    return target
+
+
+def _export_openvino(name, imgsz, weights_dir):
+    from ultralytics import YOLO
+
+    return YOLO(model_path(name, "pytorch", weights_dir)).export(format="openvino", imgsz=imgsz, dynamic=True)
+
+
+class _CalibrationReader:
+    """onnxruntime 정적 양자화용 보정 데이터: 실제 추론과 같은 전처리를 거친 텐서."""
+
+    def __init__(self, input_name, image_paths, imgsz):
+        self._input_name = input_name
+        self._paths = iter(image_paths)
+        self._imgsz = imgsz
+
+    def get_next(self):
+        from ai_module.strawberry_analyzer import _as_bgr, preprocess_image
+
+        for path in self._paths:
+            try:
+                tensor = preprocess_image(_as_bgr(path), self._imgsz)
+            except ValueError as e:
+                logging.warning(f"보정 이미지 건너뜀: {e}")
+                continue
+            return {self._input_name: tensor.numpy()}
+        return None
+
+
+def _quantize_int8(name, imgsz, weights_dir, calib_dir=None):
+    import onnx
+    import onnxruntime as ort
+    from onnxruntime import quantization as q
+
+    fp32 = model_path(name, "onnx", weights_dir)
+    if not os.path.exists(fp32):
+        fp32 = _export_onnx(name, imgsz, weights_dir)
+    target = model_path(name, "onnx-int8", weights_dir)
+
+    images = []
+    if calib_dir:
+        for pattern in ("*.jpg", "*.jpeg", "*.png"):
+            images += sorted(glob.glob(os.path.join(calib_dir, pattern)))
+    if images:
+        input_name = ort.InferenceSession(fp32, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+        q.quantize_static(fp32, target, _CalibrationReader(input_name, images, imgsz),
+                          quant_format=q.QuantFormat.QDQ, per_channel=True,
+                          activation_type=q.QuantType.QUInt8, weight_type=q.QuantType.QInt8)
+        logging.info(f"{name}: 보정 이미지 {len(images)}장으로 정적 INT8 양자화")
+    else:
+        q.quantize_dynamic(fp32, target, weight_type=q.QuantType.QUInt8)
+        logging.info(f"{name}: 보정 이미지가 없어 동적(가중치) INT8 양자화")
+
+    # 클래스 이름 등 ultralytics 메타데이터를 양자화 모델에 복사 (없으면 익음 상태 이름이 사라짐)
+    src, dst = onnx.load(fp32), onnx.load(target)
+    del dst.metadata_props[:]
+    dst.metadata_props.extend(src.metadata_props)
+    onnx.save(dst, target)
+    return target
+
+
+def export(backend, names=MODEL_NAMES, imgsz=640, calib_dir=None, weights_dir=WEIGHTS_DIR):
+    exporters = {
+        "onnx": lambda n: _export_onnx(n, imgsz, weights_dir),
+        "onnx-int8": lambda n: _quantize_int8(n, imgsz, weights_dir, calib_dir),
+        "openvino": lambda n: _export_openvino(n, imgsz, weights_dir),
+    }
+    if backend not in exporters:
+        raise ValueError(f"export 대상이 아닌 백엔드: {backend}")
+    return [exporters[backend](n) for n in names]
+
+
+# --- 결과 비교 ---
+
+def verify(backend, image_paths, weights_dir=WEIGHTS_DIR):
+    """pytorch 와 backend 의 analyze 결과를 비교해 허용 오차 안인지 출력하고, 모두 통과하면 True."""
+    from ultralytics import YOLO
+    from ai_module import strawberry_analyzer as sa
+
+    score_tol, count_tol = TOLERANCES[backend]
+    variants = {}
+    for b in ("pytorch", backend):
+        for n in MODEL_NAMES:
+            sa.registry.set(n, YOLO(model_path(n, b, weights_dir)))
+        variants[b] = sa.analyze_images(list(image_paths))
+
+    ok = True
+    for path, ref, got in zip(image_paths, variants["pytorch"], variants[backend]):
+        d_score = abs(ref["ripeness_score"] - got["ripeness_score"])
+        d_count = abs(ref["flower_count"] - got["flower_count"])
+        passed = d_score <= score_tol and d_count <= count_tol and ref["ripeness_text"] == got["ripeness_text"]
+        ok &= passed
+        print(f"{'OK ' if passed else 'BAD'} {os.path.basename(path)}: score {ref['ripeness_score']} vs "
+              f"{got['ripeness_score']}, label {ref['ripeness_text']!r} vs {got['ripeness_text']!r}, "
+              f"flowers {ref['flower_count']} vs {got['flower_count']}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    p_exp = sub.add_parser("export", help=".pt 가중치를 다른 백엔드 형식으로 변환")
+    p_exp.add_argument("--backend", required=True, choices=["onnx", "onnx-int8", "openvino"])
+    p_exp.add_argument("--calib", help="INT8 정적 양자화용 보정 이미지 폴더")
+    p_exp.add_argument("--imgsz", type=int, default=640)
+    p_ver = sub.add_parser("verify", help="pytorch 대비 결과 차이 확인")
+    p_ver.add_argument("--backend", required=True, choices=list(BACKEND_SUFFIXES))
+    p_ver.add_argument("images", nargs="+")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    if args.cmd == "export":
+        for out in export(args.backend, imgsz=args.imgsz, calib_dir=args.calib):
+            print(f"✅ {out}")
+    else:
+        raise SystemExit(0 if verify(args.backend, args.images) else 1)
@@ -0,0 +1,163 @@
+# ai_module/inference_queue.py
+"""
+AI 분석 비동기 작업 큐.
+카메라 업로드 요청은 작업을 넣고 바로 job id 를 돌려받고,
+고정 개수의 워커 스레드가 큐에서 꺼내 분석/저장합니다.
+store/loader 를 주면 작업 상태를 영속 저장소(SQLite)에도 기록해, 다른 프로세스(멀티 워커)에서도 조회할 수 있습니다.
+"""
+
+import logging
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional
+
+import metrics
+
+# 대기열에서 기다린 시간 / 실행 시간 (/metrics 의 inference_job_duration_seconds)
+_JOB_SECONDS = metrics.histogram("inference_job_duration_seconds", "AI 분석 작업의 대기(wait)/실행(run) 시간", ("phase",))
+_WAIT_SECONDS = _JOB_SECONDS.labels("wait")
+_RUN_SECONDS = _JOB_SECONDS.labels("run")
+
+
+class QueueFullError(Exception):
+    """대기열이 가득 차 새 작업을 받을 수 없을 때 (HTTP 429 로 응답)."""
+
+
+class InferenceJobQueue:
+    """
+    크기가 제한된 작업 큐 + 워커 스레드 풀.
+    torch 의 intra-op 스레드 풀은 프로세스 전체에 하나이므로, start() 에서 한 번 torch_threads 로 제한하고
+    모든 워커 스레드가 그 풀을 나눠 씁니다. (서버 프로세스 수 x torch_threads ≈ 코어 수)
+    store(job) 는 상태가 바뀔 때마다(queued/running/done/failed) 호출되고 (제출 스레드와 워커가 거의 동시에
+    부를 수 있으므로 저장소는 앞선 상태가 뒤늦게 와도 덮어쓰지 않아야 함),
+    get() 은 이 프로세스가 모르는 job id 를 loader(job_id) 로 찾습니다.
+    """
+
+    def __init__(self, workers: int = 1, torch_threads: int = 0, maxsize: int = 16, history: int = 500,
+                 store: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 loader: Optional[Callable[[str], Optional[Dict[str, Any]]]] = None) -> None:
+        self.workers = max(1, int(workers))
+        self.torch_threads = int(torch_threads)
+        self._queue: "queue.Queue[Optional[str]]" = queue.Queue(maxsize=max(1, int(maxsize)))
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._tasks: Dict[str, Callable[[], Any]] = {}
+        self._history = max(1, int(history))
+        self._store = store
+        self._loader = loader
+        self._lock = threading.Lock()
+        self._threads = []
+        self._accepting = False
+
+    # --- 생산자 측 ---
+    def submit(self, fn: Callable[[], Any]) -> str:
+        """작업을 대기열에 넣고 job id 를 반환합니다. 가득 차면 QueueFullError."""
+        if not self._accepting:
+            raise RuntimeError("inference queue is not running")
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {"id": job_id, "status": "queued", "submitted_at": time.time(),
+                                  "started_at": None, "finished_at": None, "result": None, "error": None}
+            self._tasks[job_id] = fn
+        try:
+            self._queue.put_nowait(job_id)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job_id, None)
+                self._tasks.pop(job_id, None)
+            raise QueueFullError("inference queue is full")
+        self._save(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job:
+                return dict(job)
+        if self._loader is None:
+            return None
+        return self._loader(job_id)
+
+    def _save(self, job_id: str) -> None:
+        """현재 상태를 store 로 넘깁니다. 저장 실패는 기록만 하고 작업은 계속합니다."""
+        if self._store is None:
+            return
+        with self._lock:
+            job = self._jobs.get(job_id)
+            job = dict(job) if job else None
+        if job is None:
+            return
+        try:
+            self._store(job)
+        except Exception as e:
+            logging.error(f"[inference] 작업 {job_id} 상태 저장 실패: {e}")
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    # --- 워커 측 ---
+    def start(self) -> None:
+        if self._threads:
+            return
+        self._accepting = True
+        self._limit_torch_threads()
+        for i in range(self.workers):
+            t = threading.Thread(target=self._run, name=f"inference-worker-{i}", daemon=True)
+            t.start()
+            self._threads.append(t)
+
+    def stop(self, timeout: Optional[float] = 30.0) -> None:
+        """새 작업을 막고, 이미 받은 작업을 모두 처리한 뒤 워커를 종료합니다."""
+        self._accepting = False
+        for _ in self._threads:
+            self._queue.put(None)
+        for t in self._threads:
+            t.join(timeout)
+        self._threads = []
+
+    def _limit_torch_threads(self) -> None:
+        # set_num_threads 는 프로세스 전역 설정: 워커마다 부르면 서로 덮어쓸 뿐이므로 시작할 때 한 번만
+        if self.torch_threads > 0:
+            try:
+                import torch
+                torch.set_num_threads(self.torch_threads)
+            except ImportError:
+                pass
+
+    def _run(self) -> None:
+        while True:
+            job_id = self._queue.get()
+            if job_id is None:
+                break
+            with self._lock:
+                fn = self._tasks.pop(job_id, None)
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    job.update(status="running", started_at=time.time())
+            if fn is None or job is None:
+                continue
+            self._save(job_id)
+            _WAIT_SECONDS.observe(job["started_at"] - job["submitted_at"])
+            try:
+                result = fn()
+                update = {"status": "done", "result": result}
+            except Exception as e:
+                logging.error(f"[inference] 작업 {job_id} 실패: {e}")
+                update = {"status": "failed", "error": str(e)}
+            finished_at = time.time()
+            _RUN_SECONDS.observe(finished_at - job["started_at"])
+            with self._lock:
+                job.update(finished_at=finished_at, **update)
+            self._save(job_id)
+            with self._lock:
+                self._trim_history()
+
+    def _trim_history(self) -> None:
+        """끝난 작업 기록이 history 개를 넘으면 오래된 것부터 지웁니다. (_lock 보유 상태에서 호출)"""
+        excess = len(self._jobs) - self._history
+        if excess <= 0:
+            return
+        for job_id in [k for k, v in self._jobs.items() if v["status"] in ("done", "failed")][:excess]:
+            del self._jobs[job_id]
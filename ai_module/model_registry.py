@@ -0,0 +1,92 @@
+# ai_module/model_registry.py
+"""
+지연 로딩 모델 레지스트리.
+모델은 처음 필요할 때(또는 warm_up 호출 시) 한 번만 로드되고,
+여러 스레드가 동시에 요청해도 로더는 모델당 한 번만 실행됩니다.
+"""
+
+import logging
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Optional
+
+NOT_LOADED, LOADING, READY, FAILED = "not_loaded", "loading", "ready", "failed"
+
+
+class ModelRegistry:
+    def __init__(self) -> None:
+        self._loaders: Dict[str, Callable[[], Any]] = {}
+        self._warmers: Dict[str, Optional[Callable[[Any], None]]] = {}
+        self._models: Dict[str, Any] = {}
+        self._state: Dict[str, Dict[str, Any]] = {}
+        self._locks: Dict[str, threading.Lock] = {}
+
+    def register(self, name: str, loader: Callable[[], Any],
+                 warmer: Optional[Callable[[Any], None]] = None) -> None:
+        """loader() 는 모델 객체를 반환, warmer(model) 는 더미 추론 등 첫 호출 비용을 미리 치릅니다."""
+        self._loaders[name] = loader
+        self._warmers[name] = warmer
+        self._locks[name] = threading.Lock()
+        self._state[name] = {"state": NOT_LOADED, "error": None, "load_seconds": None, "warm": False}
+
+    def names(self):
+        return list(self._loaders)
+
+    def get(self, name: str) -> Optional[Any]:
+        """모델을 반환합니다. 아직 없으면 지금 로드하고, 로드에 실패한 모델은 None."""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+        with self._locks[name]:
+            if name in self._models:
+                return self._models[name]
+            if self._state[name]["state"] == FAILED:
+                return None
+            self._state[name]["state"] = LOADING
+            t0 = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                logging.error(f"Error loading {name} model: {e}")
+                self._state[name].update(state=FAILED, error=str(e))
+                return None
+            self._state[name].update(state=READY, load_seconds=round(time.perf_counter() - t0, 3))
+            self._models[name] = model
+            return model
+
+    def set(self, name: str, model: Any) -> None:
+        """외부에서 만든 모델을 직접 등록합니다. (벤치마크/테스트용)"""
+        if name not in self._loaders:
+            self.register(name, lambda: model)
+        with self._locks[name]:
+            self._models[name] = model
+            self._state[name].update(state=READY, error=None)
+
+    def warm_up(self, names: Optional[Iterable[str]] = None, background: bool = True) -> Optional[threading.Thread]:
+        """모델을 미리 로드하고 더미 추론을 한 번 실행합니다. background=True 면 스레드로 실행."""
+        targets = list(names) if names is not None else self.names()
+
+        def _run():
+            for name in targets:
+                model = self.get(name)
+                warmer = self._warmers.get(name)
+                if model is None or warmer is None or self._state[name]["warm"]:
+                    continue
+                try:
+                    warmer(model)
+                    self._state[name]["warm"] = True
+                except Exception as e:
+                    logging.warning(f"{name} 모델 워밍업 실패: {e}")
+
+        if not background:
+            _run()
+            return None
+        t = threading.Thread(target=_run, name="model-warmup", daemon=True)
+        t.start()
+        return t
+
+    def status(self) -> Dict[str, Dict[str, Any]]:
+        return {name: dict(state) for name, state in self._state.items()}
+
+    def ready(self) -> bool:
+        return all(s["state"] == READY for s in self._state.values())
@@ -0,0 +1,122 @@
+# ai_module/result_cache.py
+"""
+지각 해시(dHash) 기반 분석 결과 캐시.
+고정 카메라는 촬영 간 장면이 거의 같으므로, 해시의 해밍 거리가 max_distance 이하인
+이전 이미지의 분석 결과를 재사용해 YOLO 추론을 건너뜁니다.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+import cv2
+import numpy as np
+
+
+def dhash(img, size: int = 8) -> int:
+    """BGR 이미지의 difference hash (size*size 비트 정수). 밝기 변화와 압축 잡음에 둔감합니다."""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY) if img.ndim == 3 else img
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+class PerceptualResultCache:
+    """
+    LRU + TTL 캐시. saver/deleter 를 주면 항목 추가/삭제를 즉시 영속 저장소(SQLite)에도 반영하고,
+    entries 로 재시작 전 저장된 항목을 (phash, result, created_at) 형태로 복원합니다.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        ttl_seconds: float = 24 * 3600,
+        max_distance: int = 4,
+        entries: Iterable[Tuple[int, Dict[str, Any], float]] = (),
+        saver: Optional[Callable[[int, Dict[str, Any], float], None]] = None,
+        deleter: Optional[Callable[[list], None]] = None,
+    ) -> None:
+        self.max_entries = max(1, int(max_entries))
+        self.ttl = float(ttl_seconds)
+        self.max_distance = int(max_distance)
+        self._saver = saver
+        self._deleter = deleter
+        self._lock = threading.Lock()
+        self._items: "OrderedDict[int, Tuple[Dict[str, Any], float]]" = OrderedDict()
+        self.hits = self.misses = self.evictions = self.expirations = 0
+        now = time.time()
+        for phash, result, created_at in sorted(entries, key=lambda e: e[2]):
+            if now - created_at < self.ttl:
+                self._items[phash] = (result, created_at)
+        self._evict_over_capacity()
+
+    def get(self, phash: int) -> Optional[Dict[str, Any]]:
+        """해밍 거리 max_distance 이내에서 가장 가까운 유효 항목의 결과(복사본)를 반환합니다."""
+        now = time.time()
+        expired = []
+        with self._lock:
+            best_key, best_dist = None, self.max_distance + 1
+            for key, (_, created_at) in self._items.items():
+                if now - created_at >= self.ttl:
+                    expired.append(key)
+                    continue
+                d = hamming(key, phash)
+                if d < best_dist:
+                    best_key, best_dist = key, d
+                    if d == 0:
+                        break
+            for key in expired:
+                del self._items[key]
+            self.expirations += len(expired)
+            if best_key is None:
+                self.misses += 1
+                result = None
+            else:
+                self._items.move_to_end(best_key)
+                self.hits += 1
+                result = dict(self._items[best_key][0])
+        self._delete(expired)
+        return result
+
+    def put(self, phash: int, result: Dict[str, Any]) -> None:
+        created_at = time.time()
+        with self._lock:
+            self._items[phash] = (dict(result), created_at)
+            self._items.move_to_end(phash)
+            evicted = self._evict_over_capacity()
+        if self._saver:
+            try:
+                self._saver(phash, result, created_at)
+            except Exception as e:
+                logging.warning(f"[ai-cache] 캐시 항목 저장 실패: {e}")
+        self._delete(evicted)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            size = len(self._items)
+        total = self.hits + self.misses
+        return {"size": size, "hits": self.hits, "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else None,
+                "evictions": self.evictions, "expirations": self.expirations,
+                "max_entries": self.max_entries, "max_distance": self.max_distance, "ttl_seconds": self.ttl}
+
+    def _evict_over_capacity(self) -> list:
+        evicted = []
+        while len(self._items) > self.max_entries:
+            key, _ = self._items.popitem(last=False)
+            evicted.append(key)
+        self.evictions += len(evicted)
+        return evicted
+
+    def _delete(self, keys: list) -> None:
+        if keys and self._deleter:
+            try:
+                self._deleter(keys)
+            except Exception as e:
+                logging.warning(f"[ai-cache] 캐시 항목 삭제 실패: {e}")
@@ -2,82 +2,516 @@
 
 import os
 from config import BASE_DIR
-from ultralytics import YOLO
 import logging
+import cv2
+import numpy as np
+import threading
+import metrics
+from ai_module.batching import MicroBatcher
+from ai_module.model_registry import ModelRegistry
+from ai_module.result_cache import dhash
+
+# torch / ultralytics 는 가져오는 것만으로 수 초가 걸리므로, 실제로 모델이 필요할 때 import 합니다.
+
+from ai_module.backends import resolve_model_path
+
+try:
+    from config import AI_IMGSZ, AI_BATCH_MAX_SIZE, AI_BATCH_MAX_WAIT_MS, AI_BACKEND, AI_CONF_THRESHOLD
+    from config import (AI_TILE_ENABLED, AI_TILE_MIN_SIDE, AI_TILE_SIZE, AI_TILE_OVERLAP,
+                        AI_TILE_BATCH, AI_TILE_NMS_THRESHOLD)
+except ImportError:
+    AI_TILE_ENABLED, AI_TILE_MIN_SIDE = False, 1600
+    AI_TILE_SIZE, AI_TILE_OVERLAP, AI_TILE_BATCH, AI_TILE_NMS_THRESHOLD = 640, 0.2, 8, 0.6
+    AI_IMGSZ = 640
+    AI_CONF_THRESHOLD = 0.25
+    AI_BATCH_MAX_SIZE, AI_BATCH_MAX_WAIT_MS = 1, 0
+    AI_BACKEND = "pytorch"
 
 # --- 1. 두 개의 모델 경로를 각각 지정 ---
 RIPE_MODEL_PATH = RIPE_MODEL_PATH = os.path.join(BASE_DIR, 'ai_module', 'weights', 'ripe.pt')
 FLOWER_MODEL_PATH = os.path.join(BASE_DIR, 'ai_module', 'weights', 'flower.pt')
 
-# --- 2. 두 모델을 각각 로드 ---
-try:
-    ripe_model = YOLO(RIPE_MODEL_PATH)
-    logging.info(f"YOLOv8 ripe model loaded successfully from {RIPE_MODEL_PATH}")
-except Exception as e:
-    logging.error(f"Error loading ripe model: {e}")
-    ripe_model = None
+# --- 2. 두 모델을 지연 로딩 레지스트리에 등록 (import 시점에는 로드하지 않음) ---
+def _load_yolo(name):
+    """config.AI_BACKEND 에 맞는 가중치(.pt / .onnx / .int8.onnx / _openvino_model)를 로드합니다."""
+    from ultralytics import YOLO
 
-try:
-    flower_model = YOLO(FLOWER_MODEL_PATH)
-    logging.info(f"YOLOv8 flower model loaded successfully from {FLOWER_MODEL_PATH}")
-except Exception as e:
-    logging.error(f"Error loading flower model: {e}")
-    flower_model = None
+    path = resolve_model_path(name, AI_BACKEND)
+    model = YOLO(path, task="detect")
+    logging.info(f"YOLOv8 {name} model loaded successfully from {path}")
+    return model
+
+def _warm_yolo(model):
+    """더미 이미지로 한 번 추론해 레이어 fuse, 버퍼 할당 등 첫 호출 비용을 미리 치릅니다."""
+    model(np.zeros((AI_IMGSZ, AI_IMGSZ, 3), dtype=np.uint8), verbose=False)
+
+registry = ModelRegistry()
+registry.register("ripe", lambda: _load_yolo("ripe"), _warm_yolo)
+registry.register("flower", lambda: _load_yolo("flower"), _warm_yolo)
+
+def get_ripe_model():
+    return registry.get("ripe")
+
+def get_flower_model():
+    return registry.get("flower")
+
+def class_names(name):
+    """이미 로드된 모델의 클래스 이름표 (로드 전이면 빈 dict, 로드를 일으키지 않음)."""
+    if registry.status().get(name, {}).get("state") != "ready":
+        return {}
+    return dict(registry.get(name).names)
+
+def warm_up(background=True):
+    """두 모델을 미리 로드 + 더미 추론. 서버 시작 시 백그라운드로 호출합니다."""
+    return registry.warm_up(background=background)
+
+# 단계별 소요 시간 (/metrics 의 ai_stage_duration_seconds)
+_DECODE_SECONDS = metrics.AI_STAGE_SECONDS.labels("decode", "")
+_PREPROCESS_SECONDS = metrics.AI_STAGE_SECONDS.labels("preprocess", "")
+
+def _stage(stage, model):
+    return metrics.AI_STAGE_SECONDS.labels(stage, model).time()
+
+# --- 3. 입력 이미지 로딩 (경로 / 바이트 / memoryview / ndarray 모두 허용) ---
+def decode_image(image_bytes):
+    """JPEG/PNG 바이트(또는 memoryview, 1차원 uint8 배열)를 BGR ndarray 로 디코딩합니다. (디스크를 거치지 않음)"""
+    with _DECODE_SECONDS.time():
+        img = cv2.imdecode(np.frombuffer(image_bytes, dtype=np.uint8), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError("이미지 디코딩 실패 (지원하지 않는 형식이거나 손상된 데이터)")
+    return img
+
+def load_image(source):
+    """
+    분석 함수 입력을 모델에 넘길 수 있는 형태로 맞춥니다.
+    - str / PathLike: 그대로 반환 (ultralytics 가 파일을 읽음)
+    - bytes / bytearray / memoryview / 1차원 uint8 배열: 메모리에서 디코딩한 BGR ndarray
+    - HxWx3 ndarray: 이미 디코딩된 BGR 이미지로 간주하여 그대로 반환
+    """
+    if isinstance(source, (str, os.PathLike)):
+        return source
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return decode_image(source)
+    if isinstance(source, np.ndarray):
+        if source.ndim == 1:
+            return decode_image(source)
+        if source.ndim == 3 and source.shape[2] == 3:
+            return source
+        raise ValueError(f"지원하지 않는 배열 형태: {source.shape}")
+    raise TypeError(f"지원하지 않는 이미지 입력 타입: {type(source).__name__}")
+
+def _as_bgr(source):
+    """load_image 결과가 경로라면 파일을 읽어 BGR ndarray 로 만듭니다."""
+    img = load_image(source)
+    if isinstance(img, np.ndarray):
+        return img
+    img = cv2.imread(os.fspath(img), cv2.IMREAD_COLOR)
+    if img is None:
+        raise ValueError(f"이미지 파일을 읽을 수 없음: {source}")
+    return img
+
+# --- 4. 결과 요약(후처리) 함수 ---
+# 모든 후처리는 박스 단위 Python 루프 없이 배열 연산(argmax, bincount, 마스크)으로 처리합니다.
+
+# 검출 배열 열 순서: class_id, confidence, x1, y1, x2, y2 (원본 이미지 픽셀 좌표)
+DETECTION_COLUMNS = ("class_id", "confidence", "x1", "y1", "x2", "y2")
+
+def _extract_detections(result, orig_shape=None):
+    """
+    ultralytics Result 한 개의 박스 전체를 (N, 6) float32 ndarray 로 한 번에 변환합니다.
+    박스마다 .item() 을 호출하지 않고 텐서 단위로 슬라이스 후 한 번만 CPU 로 복사합니다.
+    letterbox 텐서로 추론했다면 orig_shape(H, W) 기준으로 좌표를 되돌립니다.
+    """
+    data = result.boxes.data  # (N, 6): x1, y1, x2, y2, conf, cls
+    if data.shape[0] == 0:
+        return np.zeros((0, len(DETECTION_COLUMNS)), dtype=np.float32)
+    xyxy = data[:, :4].clone()
+    if orig_shape is not None and tuple(result.orig_shape[:2]) != tuple(orig_shape[:2]):
+        from ultralytics.utils.ops import scale_boxes
+        xyxy = scale_boxes(tuple(result.orig_shape[:2]), xyxy, tuple(orig_shape[:2]))
+    import torch
+    return torch.cat([data[:, 5:6], data[:, 4:5], xyxy], dim=1).cpu().numpy().astype(np.float32)
 
-# --- 3. 딸기 익음 정도 분석 함수 ---
-def analyze_ripeness(image_path):
+def summarize_detections(det, names, conf_threshold=AI_CONF_THRESHOLD):
+    """
+    검출 배열 -> 이미지 한 장의 요약.
+    {'total': N, 'best': {class_id, class_name, confidence} | None,
+     'classes': {class_name: {class_id, count, max_conf, mean_conf}}}
+    conf_threshold 미만 박스는 마스크로 제외합니다.
+    """
+    det = det[det[:, 1] >= conf_threshold] if len(det) else det
+    if len(det) == 0:
+        return {"total": 0, "best": None, "classes": {}}
+
+    cls = det[:, 0].astype(np.int64)
+    conf = det[:, 1].astype(np.float64)
+    nc = max(len(names), int(cls.max()) + 1)
+    counts = np.bincount(cls, minlength=nc)
+    sums = np.bincount(cls, weights=conf, minlength=nc)
+    maxes = np.zeros(nc)
+    np.maximum.at(maxes, cls, conf)
+
+    classes = {}
+    for c in np.flatnonzero(counts):  # 클래스 수만큼만 반복 (박스 수와 무관)
+        classes[names.get(int(c), str(int(c)))] = {
+            "class_id": int(c),
+            "count": int(counts[c]),
+            "max_conf": round(float(maxes[c]), 4),
+            "mean_conf": round(float(sums[c] / counts[c]), 4),
+        }
+    best = int(conf.argmax())
+    return {
+        "total": int(len(det)),
+        "best": {"class_id": int(cls[best]), "class_name": names.get(int(cls[best]), str(int(cls[best]))),
+                 "confidence": round(float(conf[best]), 4)},
+        "classes": classes,
+    }
+
+def _ripeness_from_summary(summary):
+    """요약에서 가장 높은 신뢰도의 (점수, 익음 상태)."""
+    if summary["best"] is None:
+        return 0.0, "딸기 미검출"
+    return round(summary["best"]["confidence"], 2), summary["best"]["class_name"]
+
+def _flowers_from_summary(summary):
+    """요약에서 감지된 꽃의 개수."""
+    return summary["total"], "분석 완료"
+
+def _merge_detections(results):
+    dets = [_extract_detections(r) for r in results]
+    return np.concatenate(dets) if dets else np.zeros((0, len(DETECTION_COLUMNS)), dtype=np.float32)
+
+def _summarize_ripeness(results, names):
+    """ripe 모델 결과에서 가장 높은 신뢰도의 (점수, 익음 상태)를 뽑습니다. names 는 모델의 클래스 이름표."""
+    final_score, best_ripeness_text = _ripeness_from_summary(summarize_detections(_merge_detections(results), names))
+    logging.info(f"Ripeness analysis: Best guess is '{best_ripeness_text}' with score {final_score}")
+    return final_score, best_ripeness_text
+
+def _summarize_flowers(results, names=None):
+    """flower 모델 결과에서 감지된 꽃의 개수를 셉니다."""
+    flower_count, status = _flowers_from_summary(summarize_detections(_merge_detections(results), names or {}))
+    logging.info(f"Flower analysis: Found {flower_count} flowers.")
+    return flower_count, status
+
+# --- 5. 딸기 익음 정도 분석 함수 ---
+def analyze_ripeness(image):
     """
     주어진 이미지에서 딸기를 감지하고 가장 높은 신뢰도의 익음 상태와 점수를 반환합니다.
+    image 는 파일 경로, 인코딩된 바이트/memoryview, 또는 BGR ndarray 입니다.
     """
+    ripe_model = get_ripe_model()
     if ripe_model is None:
         return 0.0, "딸기 모델 로딩 실패"
 
     try:
-        results = ripe_model(image_path)
-        best_confidence = 0.0
-        best_ripeness_text = "딸기 미검출"
-
-        for result in results:
-            for box in result.boxes:
-                confidence = box.conf[0].item()
-                if confidence > best_confidence:
-                    best_confidence = confidence
-                    class_id = int(box.cls[0].item())
-                    best_ripeness_text = ripe_model.names[class_id]
-        
-        final_score = round(best_confidence, 2)
-        logging.info(f"Ripeness analysis: Best guess is '{best_ripeness_text}' with score {final_score}")
-        return final_score, best_ripeness_text
-
+        return _summarize_ripeness(ripe_model(load_image(image), verbose=False), ripe_model.names)
     except Exception as e:
         logging.error(f"Error during ripeness analysis: {e}")
         return 0.0, "분석 중 오류 발생"
 
-# --- 4. 꽃 개화 여부 분석 함수 ---
-def analyze_flowers(image_path):
+# --- 6. 꽃 개화 여부 분석 함수 ---
+def analyze_flowers(image, tiled=False):
     """
     주어진 이미지에서 꽃을 감지하고, 감지된 꽃의 개수를 반환합니다.
+    image 는 파일 경로, 인코딩된 바이트/memoryview, 또는 BGR ndarray 입니다.
+    tiled=True 면 겹치는 타일로 나눠 추론한 뒤 타일 간 중복을 제거한 개수를 셉니다.
     """
+    flower_model = get_flower_model()
     if flower_model is None:
         return 0, "꽃 모델 로딩 실패"
 
-    try:
-        results = flower_model(image_path)
-        flower_count = 0
-
-        for result in results:
-            # result.boxes가 존재하고, 객체가 하나 이상 감지되었는지 확인
-            if result.boxes and len(result.boxes) > 0:
-                flower_count += len(result.boxes)
-        
-        logging.info(f"Flower analysis: Found {flower_count} flowers.")
-        # 꽃의 개수만 반환합니다. (필요하다면 신뢰도 점수 등 추가 정보 반환 가능)
-        return flower_count, "분석 완료"
+    if tiled:
+        result = analyze_tiled(image, models=("flower",))
+        return result["flower_count"], result["flower_text"]
 
+    try:
+        return _summarize_flowers(flower_model(load_image(image), verbose=False), flower_model.names)
     except Exception as e:
         logging.error(f"Error during flower analysis: {e}")
         return 0, "분석 중 오류 발생"
 
+# --- 7. 한 번의 전처리로 두 모델을 모두 실행하는 통합 분석 함수 ---
+def preprocess_image(img, imgsz=AI_IMGSZ):
+    """
+    BGR 이미지를 letterbox 후 RGB BCHW float 텐서(0~1)로 변환합니다.
+    ultralytics 의 기본 동작과 같이 긴 변을 imgsz 로 맞추고 짧은 변은 32의 배수까지만 패딩합니다.
+    ultralytics 는 텐서 입력을 전처리 완료로 간주하므로 두 모델이 이 텐서를 그대로 공유합니다.
+    """
+    import torch
+    from ultralytics.data.augment import LetterBox
+
+    with _PREPROCESS_SECONDS.time():
+        boxed = LetterBox(new_shape=(imgsz, imgsz), auto=True, stride=32)(image=img)
+        chw = np.ascontiguousarray(boxed[..., ::-1].transpose(2, 0, 1))
+        return torch.from_numpy(chw).unsqueeze(0).float().div_(255.0)
+
+def _empty_result():
+    # detections: 모델별 [class_id, confidence, x1, y1, x2, y2] 리스트 (ai_detection 테이블에 저장)
+    # summary: 모델별 summarize_detections 결과 (클래스별 개수, 최대/평균 신뢰도)
+    return {"ripeness_score": 0.0, "ripeness_text": "딸기 모델 로딩 실패",
+            "flower_count": 0, "flower_text": "꽃 모델 로딩 실패",
+            "detections": {"ripe": [], "flower": []}, "summary": {}}
+
+def _apply_ripe(result, det, names):
+    summary = summarize_detections(det, names)
+    result["detections"]["ripe"] = det.tolist()
+    result["summary"]["ripe"] = summary
+    result["ripeness_score"], result["ripeness_text"] = _ripeness_from_summary(summary)
+
+def _apply_flower(result, det, names):
+    summary = summarize_detections(det, names)
+    result["detections"]["flower"] = det.tolist()
+    result["summary"]["flower"] = summary
+    result["flower_count"], result["flower_text"] = _flowers_from_summary(summary)
+
+def analyze_images(images):
+    """
+    여러 이미지를 한 번에 분석합니다. 각 이미지를 한 번만 전처리한 뒤 같은 텐서 크기끼리 묶어
+    모델마다 배치 forward 를 한 번씩 실행하고, 입력 순서대로 결과 dict 리스트를 반환합니다.
+    """
+    import torch
+
+    ripe_model, flower_model = get_ripe_model(), get_flower_model()
+    results = [_empty_result() for _ in images]
+    groups = {}
+    for i, image in enumerate(images):
+        try:
+            img = _as_bgr(image)
+            if _use_tiling(img):
+                results[i] = analyze_tiled(img)
+                continue
+            tensor = preprocess_image(img)
+        except Exception as e:
+            logging.error(f"Error during image preprocessing: {e}")
+            results[i].update(ripeness_text="분석 중 오류 발생", flower_text="분석 중 오류 발생")
+            continue
+        # letterbox 결과 크기가 같은 이미지끼리만 하나의 배치로 쌓을 수 있음
+        groups.setdefault(tuple(tensor.shape[2:]), []).append((i, tensor, img.shape[:2]))
+
+    for members in groups.values():
+        indices = [i for i, _, _ in members]
+        batch = torch.cat([t for _, t, _ in members]) if len(members) > 1 else members[0][1]
+        shapes = {i: shape for i, _, shape in members}
+
+        # 검출 박스 전체를 배열로 보관하고, ai_result 요약은 이 배열에서 계산
+        if ripe_model is not None:
+            try:
+                with _stage("forward", "ripe"):
+                    outputs = ripe_model(batch, verbose=False)
+                with _stage("postprocess", "ripe"):
+                    for i, res in zip(indices, outputs):
+                        _apply_ripe(results[i], _extract_detections(res, shapes[i]), ripe_model.names)
+                logging.info(f"Ripeness analysis: {[(results[i]['ripeness_text'], results[i]['ripeness_score']) for i in indices]}")
+            except Exception as e:
+                logging.error(f"Error during ripeness analysis: {e}")
+                for i in indices:
+                    results[i]["ripeness_text"] = "분석 중 오류 발생"
+
+        if flower_model is not None:
+            try:
+                with _stage("forward", "flower"):
+                    outputs = flower_model(batch, verbose=False)
+                with _stage("postprocess", "flower"):
+                    for i, res in zip(indices, outputs):
+                        _apply_flower(results[i], _extract_detections(res, shapes[i]), flower_model.names)
+                logging.info(f"Flower analysis: {[results[i]['flower_count'] for i in indices]} flowers.")
+            except Exception as e:
+                logging.error(f"Error during flower analysis: {e}")
+                for i in indices:
+                    results[i]["flower_text"] = "분석 중 오류 발생"
+
+    return results
+
+def analyze_image(image):
+    """
+    이미지를 한 번만 디코딩/letterbox/정규화하여 ripe, flower 두 모델에 공유하고
+    save_image_analysis_result 의 인자 이름과 같은 키를 가진 dict 로 결과를 반환합니다.
+    image 는 analyze_ripeness 와 같은 형태(경로/바이트/memoryview/ndarray)를 받습니다.
+    """
+    return analyze_images([image])[0]
+
+# --- 8. 여러 카메라 동시 업로드용 마이크로 배칭 ---
+_batcher = None
+_batcher_lock = threading.Lock()
+
+def get_batcher():
+    """AI_BATCH_MAX_SIZE / AI_BATCH_MAX_WAIT_MS 설정으로 만든 공용 배처 (처음 호출 시 생성)."""
+    global _batcher
+    if _batcher is None:
+        with _batcher_lock:
+            if _batcher is None:
+                _batcher = MicroBatcher(analyze_images, max_batch=AI_BATCH_MAX_SIZE,
+                                        max_wait_ms=AI_BATCH_MAX_WAIT_MS, name="yolo-batcher")
+    return _batcher
+
+def analyze_image_batched(image, timeout=None):
+    """
+    analyze_image 와 같은 결과를 반환하되, 동시에 들어온 다른 이미지들과 모아서 배치로 실행합니다.
+    AI_BATCH_MAX_SIZE 가 1 이하이면 배칭 없이 바로 analyze_image 를 호출합니다.
+    """
+    if AI_BATCH_MAX_SIZE <= 1:
+        return analyze_image(image)
+    return get_batcher()(image, timeout)
+
+
+# --- 9. 지각 해시 결과 캐시를 거치는 카메라 이미지 분석 ---
+_result_cache = None
+
+def set_result_cache(cache):
+    """PerceptualResultCache 인스턴스를 등록합니다. (None 이면 캐시 사용 안 함)"""
+    global _result_cache
+    _result_cache = cache
+
+def _is_complete(result):
+    failures = ("분석 중 오류 발생", "딸기 모델 로딩 실패", "꽃 모델 로딩 실패")
+    return result["ripeness_text"] not in failures and result["flower_text"] not in failures
+
+def analyze_camera_image(image):
+    """
+    analyze_image_batched 앞단에 지각 해시 캐시를 둔 분석 함수.
+    이미지를 한 번 디코딩해 dHash 를 계산하고, 비슷한 이미지의 결과가 캐시에 있으면 추론 없이 재사용합니다.
+    반환 dict 에는 캐시 적중 여부 'cached' 가 추가됩니다.
+    """
+    cache = _result_cache
+    try:
+        img = _as_bgr(image)
+    except Exception as e:
+        logging.error(f"Error during image preprocessing: {e}")
+        result = _empty_result()
+        result.update(ripeness_text="분석 중 오류 발생", flower_text="분석 중 오류 발생", cached=False)
+        return result
+
+    phash = None
+    if cache is not None:
+        phash = dhash(img)
+        hit = cache.get(phash)
+        if hit is not None:
+            logging.info(f"AI 결과 캐시 적중 (phash={phash:016x})")
+            hit["cached"] = True
+            return hit
+
+    result = analyze_image_batched(img)
+    if cache is not None and _is_complete(result):
+        cache.put(phash, result)
+    result["cached"] = False
+    return result
+
+
+# --- 10. 고해상도 이미지 타일 추론 ---
+# 5MP 프레임을 640px 로 통째로 줄이면 작은 꽃이 사라지므로, 겹치는 타일로 나눠 원본 해상도 그대로 추론하고
+# 타일별 검출을 원본 좌표로 옮긴 뒤 타일 간 NMS 로 중복을 제거합니다.
+
+def _use_tiling(img):
+    return AI_TILE_ENABLED and max(img.shape[:2]) >= AI_TILE_MIN_SIDE
+
+def tile_windows(height, width, tile=None, overlap=None):
+    """
+    이미지를 덮는 (x0, y0, x1, y1) 타일 창 목록. (기본값: AI_TILE_SIZE, AI_TILE_OVERLAP)
+    이웃 타일은 overlap 비율만큼 겹치고, 마지막 타일은 이미지 끝에 맞춰 모든 타일의 크기가 같습니다.
+    """
+    tile = tile or AI_TILE_SIZE
+    overlap = AI_TILE_OVERLAP if overlap is None else overlap
+
+    def starts(length):
+        if length <= tile:
+            return [0]
+        stride = max(1, int(tile * (1 - overlap)))
+        return list(range(0, length - tile, stride)) + [length - tile]
+
+    return [(x, y, min(x + tile, width), min(y + tile, height))
+            for y in starts(height) for x in starts(width)]
+
+def merge_tile_detections(det, threshold=None):
+    """
+    타일별 검출을 합친 배열에 클래스별 greedy NMS 를 적용합니다.
+    겹침은 IoU 대신 작은 박스 기준 교차 비율(IoS)로 판단하므로, 타일 경계에서 잘린 박스도
+    이웃 타일의 온전한 박스에 흡수됩니다. 신뢰도 내림차순으로 정렬된 배열을 반환합니다.
+    """
+    if len(det) < 2:
+        return det
+    threshold = AI_TILE_NMS_THRESHOLD if threshold is None else threshold
+    det = det[np.argsort(-det[:, 1], kind="stable")]
+    cls = det[:, 0]
+    x1, y1, x2, y2 = det[:, 2], det[:, 3], det[:, 4], det[:, 5]
+    area = np.maximum((x2 - x1) * (y2 - y1), 1e-6)
+    suppressed = np.zeros(len(det), dtype=bool)
+    keep = []
+    for i in range(len(det)):  # 남는 박스 수만큼만 반복, 나머지 박스와의 겹침은 한 번에 계산
+        if suppressed[i]:
+            continue
+        keep.append(i)
+        rest = np.flatnonzero(~suppressed[i + 1:]) + i + 1
+        rest = rest[cls[rest] == cls[i]]
+        if len(rest) == 0:
+            continue
+        iw = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        ih = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        ios = iw * ih / np.minimum(area[i], area[rest])
+        suppressed[rest[ios > threshold]] = True
+    return det[keep]
+
+def _detect_tiled(model, tensors, windows, tile_shape, name=""):
+    """타일 텐서를 AI_TILE_BATCH 개씩 묶어 추론하고, 원본 좌표로 옮긴 뒤 타일 간 NMS 로 합칩니다."""
+    import torch
+
+    dets = []
+    for start in range(0, len(tensors), max(1, AI_TILE_BATCH)):
+        chunk = tensors[start:start + max(1, AI_TILE_BATCH)]
+        batch = torch.cat(chunk) if len(chunk) > 1 else chunk[0]
+        with _stage("forward", name):
+            outputs = model(batch, verbose=False)
+        for (x0, y0, _, _), res in zip(windows[start:], outputs):
+            det = _extract_detections(res, tile_shape)
+            det[:, [2, 4]] += x0
+            det[:, [3, 5]] += y0
+            dets.append(det)
+    with _stage("postprocess", name):
+        return merge_tile_detections(np.concatenate(dets))
+
+def analyze_tiled(image, models=("ripe", "flower")):
+    """
+    analyze_image 와 같은 형태의 결과를 타일 추론으로 계산합니다.
+    타일은 한 번만 전처리해 두 모델이 공유하고, summary["tiling"] 에 타일 수와 설정을 남깁니다.
+    """
+    result = _empty_result()
+    try:
+        img = _as_bgr(image)
+        windows = tile_windows(*img.shape[:2])
+        tiles = [img[y0:y1, x0:x1] for x0, y0, x1, y1 in windows]
+        tensors = [preprocess_image(t, imgsz=AI_TILE_SIZE) for t in tiles]
+    except Exception as e:
+        logging.error(f"Error during image preprocessing: {e}")
+        result.update(ripeness_text="분석 중 오류 발생", flower_text="분석 중 오류 발생")
+        return result
+
+    tile_shape = tiles[0].shape[:2]
+    result["summary"]["tiling"] = {"tiles": len(windows), "tile_size": AI_TILE_SIZE, "overlap": AI_TILE_OVERLAP}
+
+    ripe_model = get_ripe_model() if "ripe" in models else None
+    if ripe_model is not None:
+        try:
+            _apply_ripe(result, _detect_tiled(ripe_model, tensors, windows, tile_shape, "ripe"), ripe_model.names)
+            logging.info(f"Ripeness analysis ({len(windows)} tiles): '{result['ripeness_text']}' {result['ripeness_score']}")
+        except Exception as e:
+            logging.error(f"Error during ripeness analysis: {e}")
+            result["ripeness_text"] = "분석 중 오류 발생"
+
+    flower_model = get_flower_model() if "flower" in models else None
+    if flower_model is not None:
+        try:
+            _apply_flower(result, _detect_tiled(flower_model, tensors, windows, tile_shape, "flower"), flower_model.names)
+            logging.info(f"Flower analysis ({len(windows)} tiles): Found {result['flower_count']} flowers.")
+        except Exception as e:
+            logging.error(f"Error during flower analysis: {e}")
+            result["flower_text"] = "분석 중 오류 발생"
+
+    return result
+
+def flower_counts(image):
+    """같은 이미지의 꽃 개수를 타일 없이/타일로 각각 셉니다. {'untiled': n, 'tiled': m}"""
+    img = _as_bgr(image)
+    return {"untiled": analyze_flowers(img)[0], "tiled": analyze_flowers(img, tiled=True)[0]}
+
 
 # --- 테스트 코드 ---
 if __name__ == '__main__':
@@ -92,5 +526,9 @@ if __name__ == '__main__':
         print("\n--- Testing Flower Analysis ---")
         flowers, flower_status = analyze_flowers(test_image)
         print(f"Test Result -> Flower Count: {flowers}, Status: {flower_status}")
+
+        print("\n--- Testing Tiled Flower Analysis ---")
+        counts = flower_counts(test_image)
+        print(f"Test Result -> Untiled: {counts['untiled']}, Tiled: {counts['tiled']}")
     else:
         print(f"Test image not found at: {test_image}")
\ No newline at end of file
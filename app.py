@@ -1,15 +1,43 @@
 import os
 import time
+import hashlib
 import logging
+import atexit
+import json
+import math
 import threading
-from datetime import timedelta
-from flask import Flask, render_template, request, jsonify
+from datetime import datetime, timedelta, timezone
+from flask import Flask, Response, render_template, request, jsonify
 
 # --- 1. 프로젝트 필수 모듈 임포트 (코드 2 기반) ---
 try:
-    from config import PORT
+    from config import IMAGE_UPLOAD_FOLDER, IMAGE_RETENTION
+    from config import PORT, SENSOR_FLUSH_SIZE, SENSOR_FLUSH_INTERVAL, SENSOR_QUEUE_MAXSIZE, SENSOR_BATCH_MAX
+    from config import SENSOR_FLUSH_MAX_ATTEMPTS, SENSOR_FLUSH_RETRY_DELAY
+    from config import DASHBOARD_PAGE_SIZE, API_PAGE_LIMIT_DEFAULT, API_PAGE_LIMIT_MAX
+    from config import ROLLUP_MIN_POINTS, ROLLUP_DEFAULT_RANGE_HOURS
+    from config import STREAM_MAX_CLIENTS, STREAM_CLIENT_QUEUE_SIZE, STREAM_HEARTBEAT_SECONDS, SENSOR_SYNC_INTERVAL
     from database import db_manager
-    from ai_module.strawberry_analyzer import analyze_ripeness, analyze_flowers
+    from database.pubsub import hub as live_hub
+    from database.write_queue import SensorWriteQueue
+    from ai_module.strawberry_analyzer import analyze_camera_image, set_result_cache, class_names
+    from ai_module.strawberry_analyzer import registry as model_registry, warm_up as warm_up_models
+    from ai_module.result_cache import PerceptualResultCache
+    from config import AI_CACHE_ENABLED, AI_CACHE_MAX_ENTRIES, AI_CACHE_TTL_SECONDS, AI_CACHE_MAX_DISTANCE
+    from ai_module.inference_queue import InferenceJobQueue, QueueFullError
+    from config import AI_WARMUP_ON_START
+    from config import SCHEDULER_ENABLED, SCHEDULER_TICK_SECONDS, SCHEDULER_LEASE_SECONDS
+    from config import SCHEDULER_RUN_HISTORY, SCHEDULER_JOBS
+    from scheduler import Scheduler
+    from config import CAMERA_NODES, CAMERA_CAPTURE_PATH, CAMERA_MAX_CONCURRENCY, CAMERA_RETRIES
+    from config import CAMERA_CONNECT_TIMEOUT, CAMERA_READ_TIMEOUT, CAMERA_BACKOFF_SECONDS
+    from camera_orchestrator import CaptureOrchestrator, RetryableDelivery, nodes_from_config
+    from config import INFERENCE_WORKERS, INFERENCE_TORCH_THREADS, INFERENCE_QUEUE_SIZE, INFERENCE_JOB_HISTORY
+    from config import METRICS_ENABLED, PROFILER_INTERVAL_MS, PROFILER_MAX_SECONDS
+    import metrics
+    from config import RULES_ENABLED, RULES, ACTUATOR_URL, ACTUATOR_TIMEOUT
+    from config import RULE_DISPATCH_QUEUE_SIZE, RULE_EVENT_HISTORY, RULES_EVAL_INTERVAL, RULES_LEASE_SECONDS
+    from rule_engine import RuleEngine, RuleDispatcher, RuleEvaluator, rules_from_config, http_actuator
 except ImportError as e:
     logging.error(f"필수 모듈 로딩 실패: {e}. 'config.py', 'database/db_manager.py', 'ai_module' 폴더가 올바르게 있는지 확인해주세요.")
     exit()
@@ -31,50 +59,223 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 def ensure_abs(path: str):
     return path if os.path.isabs(path) else os.path.abspath(os.path.join(BASE_DIR, path))
 
-# 업로드 폴더 준비 (절대경로 보장)
-UPLOAD_FOLDER = ensure_abs("temp_images")
-os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+# 업로드 폴더 준비 (절대경로 보장) — IMAGE_RETENTION 이 켜져 있을 때만 사용
+UPLOAD_FOLDER = ensure_abs(IMAGE_UPLOAD_FOLDER)
 app.config['UPLOAD_FOLDER'] = UPLOAD_FOLDER
-logging.info(f"업로드 폴더(절대경로)가 '{app.config['UPLOAD_FOLDER']}'로 설정되었습니다.")
+if IMAGE_RETENTION:
+    os.makedirs(UPLOAD_FOLDER, exist_ok=True)
+    logging.info(f"업로드 폴더(절대경로)가 '{app.config['UPLOAD_FOLDER']}'로 설정되었습니다.")
 
+def _image_extension(data) -> str:
+    if bytes(data[:3]) == b'\xff\xd8\xff':
+        return '.jpg'
+    if bytes(data[:8]) == b'\x89PNG\r\n\x1a\n':
+        return '.png'
+    return '.bin'
 
-# --- 3. 백그라운드 작업 (코드 1에서 가져옴) ---
+def store_image(data) -> str:
+    """
+    이미지의 내용 주소(sha256)를 image_capture.file_path 로 쓸 값으로 반환합니다.
+    IMAGE_RETENTION 이 켜져 있으면 '<sha256>.<ext>' 파일로 저장하고 그 절대경로를,
+    꺼져 있으면 디스크를 건드리지 않고 'sha256:<해시>' 를 반환합니다.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    if not IMAGE_RETENTION:
+        return f"sha256:{digest}"
+    path = os.path.join(app.config['UPLOAD_FOLDER'], digest + _image_extension(data))
+    if not os.path.exists(path):
+        # 같은 이름의 파일을 동시에 쓰더라도 내용이 같으므로 임시 파일 후 교체로 충분
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    return path
 
-def _cleanup_every_30_days():
-    """30일 주기로 오래된 DB 레코드를 정리합니다."""
+# 스키마/인덱스 및 마이그레이션 적용 (기존 database.db 도 제자리에서 갱신)
+db_manager.ensure_schema()
+# 최신 값/최근 N 행 메모리 캐시를 DB 에서 미리 채움 (/api/latest_data, 짧은 구간 조회는 DB 를 읽지 않음)
+db_manager.reload_sensor_cache()
+
+
+# --- 3. 백그라운드 작업 (스케줄러가 config.SCHEDULER_JOBS 일정대로 실행) ---
+
+def _cleanup_old_records():
+    """보관 기간이 지난 DB 레코드를 Parquet 아카이브로 옮기고 정리합니다."""
     if not clean_old_records:
         logging.info("[scheduler] 'clean_old_records' 함수가 없어 DB 정리 작업을 건너뜁니다.")
         return
-    
-    # 서버 시작 후 바로 실행하지 않고, 30일을 기다린 후 첫 실행
-    wait_seconds = int(timedelta(days=30).total_seconds())
+    logging.info("[scheduler] 오래된 DB 레코드 정리를 시작합니다.")
+    clean_old_records()
+
+def _camera_capture():
+    """등록된 모든 카메라 노드에 촬영을 요청합니다. 한 대도 성공하지 못하면 실패로 기록됩니다."""
+    results = camera_orchestrator.capture_all()
+    if results and not any(r['ok'] for r in results):
+        raise RuntimeError(f"모든 카메라 촬영 실패: {[r.get('error') for r in results]}")
+
+# 작업 스케줄러: 다음 실행 시각은 DB 에 저장되어 재시작해도 유지되고,
+# 여러 프로세스(gunicorn 워커, debug 리로더) 중 임대를 가진 하나만 작업을 실행합니다.
+scheduler = Scheduler(tick=SCHEDULER_TICK_SECONDS, lease_ttl=SCHEDULER_LEASE_SECONDS, history=SCHEDULER_RUN_HISTORY)
+scheduler.add_from_config(SCHEDULER_JOBS, {'cleanup': _cleanup_old_records, 'camera_capture': _camera_capture})
+# 센서 일괄 수집용 write-behind 큐 (종료 시 남은 데이터를 모두 기록)
+sensor_writer = SensorWriteQueue(
+    db_manager.save_sensor_data_batch,
+    flush_size=SENSOR_FLUSH_SIZE,
+    flush_interval=SENSOR_FLUSH_INTERVAL,
+    maxsize=SENSOR_QUEUE_MAXSIZE,
+    max_attempts=SENSOR_FLUSH_MAX_ATTEMPTS,
+    retry_delay=SENSOR_FLUSH_RETRY_DELAY,
+)
+sensor_writer.start()
+atexit.register(sensor_writer.stop)
+
+# AI 분석 작업 큐 (카메라 업로드는 큐에 넣고 즉시 202 반환)
+inference_jobs = InferenceJobQueue(
+    workers=INFERENCE_WORKERS,
+    torch_threads=INFERENCE_TORCH_THREADS,
+    maxsize=INFERENCE_QUEUE_SIZE,
+    history=INFERENCE_JOB_HISTORY,
+    # 작업 상태를 DB 에도 기록: 멀티 워커에서 다른 워커가 받은 작업도 /api/jobs/<id> 로 조회
+    store=lambda job: db_manager.save_inference_job(job, INFERENCE_JOB_HISTORY),
+    loader=db_manager.get_inference_job,
+)
+inference_jobs.start()
+atexit.register(inference_jobs.stop)
+
+# 지각 해시 결과 캐시 (SQLite 에 저장되어 재시작 후에도 유지)
+result_cache = None
+if AI_CACHE_ENABLED:
+    result_cache = PerceptualResultCache(
+        max_entries=AI_CACHE_MAX_ENTRIES,
+        ttl_seconds=AI_CACHE_TTL_SECONDS,
+        max_distance=AI_CACHE_MAX_DISTANCE,
+        entries=db_manager.load_result_cache(AI_CACHE_MAX_ENTRIES),
+        saver=db_manager.save_result_cache_entry,
+        deleter=db_manager.delete_result_cache_entries,
+    )
+    set_result_cache(result_cache)
+
+# 실시간 스트림 구독자 상한 (db_manager 가 커밋 후 발행하는 이벤트를 /api/stream 으로 전달)
+live_hub.max_subscribers = STREAM_MAX_CLIENTS
+atexit.register(live_hub.close_all)
+
+def _follow_other_workers():
+    """
+    다른 워커 프로세스(serve.py, gunicorn)가 저장한 센서 값/분석 결과/규칙 이벤트를 이 워커의 구독자에게도 전달합니다.
+    PRAGMA data_version 으로 변경이 있을 때만 새 행(id > 마지막으로 발행한 id)을 읽으므로 단일 프로세스에서는 비용이 거의 없습니다.
+    분석 결과/규칙 이벤트 커서는 구독자가 없어도 따라가 두어, 나중에 연결한 구독자에게 지난 이벤트를 한꺼번에 보내지 않습니다.
+    """
     while True:
-        time.sleep(wait_seconds)
+        time.sleep(SENSOR_SYNC_INTERVAL)
         try:
-            logging.info("[scheduler] 30일이 경과하여 오래된 DB 레코드 정리를 시작합니다.")
-            clean_old_records()
+            if live_hub.subscriber_count():
+                db_manager.sync_sensor_cache()
+            db_manager.sync_analysis_results()
+            db_manager.sync_rule_events()
         except Exception as e:
-            logging.error(f"[scheduler] 주기적 DB 정리 작업 중 오류 발생: {e}")
-
-def _camera_every_12_hours():
-    """12시간마다 ESP32 카메라 촬영을 자동으로 트리거합니다."""
-    # ==== TODO [CAMERA_TRIGGER] ====
-    # 아래 로직은 실제 ESP32의 IP와 통신 방식에 맞게 구현해야 합니다.
-    # 예: requests.get(f"http://{ESP32_IP}/capture")
-    # ===============================
-    wait_seconds = 12 * 60 * 60
-    while True:
-        time.sleep(wait_seconds) # 12시간 대기 후 실행
+            logging.warning(f"[stream] 다른 워커의 센서 값/분석 결과/규칙 이벤트 확인 실패: {e}")
+
+if SENSOR_SYNC_INTERVAL > 0:
+    threading.Thread(target=_follow_other_workers, name="db-follower", daemon=True).start()
+
+# 센서 규칙 엔진: 임대를 가진 한 프로세스가 저장된 측정값을 평가하고(RuleEvaluator), 발생/해제 이벤트는 디스패치 큐를 거쳐 전달
+def _log_rule_event(event):
+    level = logging.INFO if event['type'] == 'command' else logging.WARNING
+    logging.log(level, f"[rules] {event['rule']} {event['state']}: {event['message']} "
+                       f"({event['field']}={event['value']}, command={event['command']})")
+
+def _store_rule_event(event):
+    # DB 에 저장하고 이 워커의 구독자에게 발행 (다른 워커는 db-follower 가 따라잡아 발행)
+    db_manager.save_rule_event(event, RULE_EVENT_HISTORY)
+
+rule_sinks = [_log_rule_event, _store_rule_event]
+if ACTUATOR_URL:
+    rule_sinks.append(http_actuator(ACTUATOR_URL, timeout=ACTUATOR_TIMEOUT))
+rule_dispatcher = RuleDispatcher(rule_sinks, maxsize=RULE_DISPATCH_QUEUE_SIZE, history=RULE_EVENT_HISTORY)
+rule_engine = RuleEngine(rules_from_config(RULES), emit=rule_dispatcher.put) if RULES_ENABLED else None
+rule_evaluator = None
+if rule_engine is not None:
+    rule_dispatcher.start()
+    atexit.register(rule_dispatcher.stop)
+    rule_evaluator = RuleEvaluator(rule_engine, interval=RULES_EVAL_INTERVAL, lease_ttl=RULES_LEASE_SECONDS,
+                                   extra_status=lambda: {'dispatch': rule_dispatcher.stats()})
+
+# AI 모델은 지연 로딩 — 서버는 바로 응답하고, 모델 로드/더미 추론은 백그라운드에서 진행
+if AI_WARMUP_ON_START:
+    warm_up_models(background=True)
+
+# --- 계측: 경로별 지연/요청 수는 요청마다 기록하고, 대기열/캐시 값은 /metrics 조회 시점에 읽음 ---
+metrics.set_enabled(METRICS_ENABLED)
+# 요청 수는 히스토그램의 _count 로 셉니다 (요청당 관측 1회)
+HTTP_SECONDS = metrics.histogram('http_request_duration_seconds', '경로(라우트 규칙)/상태 코드별 응답 시간',
+                                 ('route', 'method', 'status'))
+
+class _MetricsRequest(app.request_class):
+    """요청 객체를 environ 에 남겨, 응답이 끝난 뒤 미들웨어가 매칭된 규칙(url_rule)을 읽을 수 있게 함"""
+
+    def __init__(self, environ, *args, **kwargs):
+        super().__init__(environ, *args, **kwargs)
+        environ['metrics.request'] = self
+
+class _RequestMetrics:
+    """
+    app.wsgi_app 을 감싸 경로/상태 코드별 응답 시간을 기록하는 WSGI 미들웨어.
+    Flask before/after_request 훅은 request/g 프록시 조회가 요청마다 여러 번 필요해 그보다 가볍게 처리합니다.
+    (스트리밍 응답은 헤더를 돌려준 시점까지)
+    """
+
+    def __init__(self, wsgi_app):
+        self.wsgi_app = wsgi_app
+
+    def __call__(self, environ, start_response):
+        if not metrics.enabled():
+            try:
+                return self.wsgi_app(environ, start_response)
+            finally:
+                environ.pop('metrics.request', None)
+        started = time.perf_counter()
+        status = '500'
+
+        def _start_response(status_line, headers, exc_info=None):
+            nonlocal status
+            status = status_line[:3]
+            return start_response(status_line, headers, exc_info)
+
         try:
-            logging.info("[camera-scheduler] 12시간 주기 카메라 촬영을 트리거합니다. (실제 로직 구현 필요)")
-            # << 여기에 실제 카메라 촬영을 요청하는 코드를 추가하세요 >>
-        except Exception as e:
-            logging.error(f"[camera-scheduler] 자동 카메라 트리거 중 오류 발생: {e}")
+            return self.wsgi_app(environ, _start_response)
+        finally:
+            req = environ.pop('metrics.request', None)  # 참조 순환(environ <-> request) 을 끊음
+            rule = getattr(req, 'url_rule', None)
+            # 실제 URL 이 아니라 규칙('/api/jobs/<job_id>')으로 묶어 라벨 수가 늘지 않게 함
+            route = rule.rule if rule is not None else 'unmatched'
+            HTTP_SECONDS.labels(route, environ.get('REQUEST_METHOD'), status).observe(time.perf_counter() - started)
+
+app.request_class = _MetricsRequest
+app.wsgi_app = _RequestMetrics(app.wsgi_app)
+
+metrics.collector('queue_depth', '대기열에 쌓인 항목 수', lambda: {
+    'sensor_write': sensor_writer.qsize(),
+    'inference': inference_jobs.qsize(),
+    'rule_dispatch': rule_dispatcher.qsize(),
+}, labels=('queue',))
+metrics.collector('sensor_write_rows_total', '센서 write-behind 큐 저장 결과 (dropped: 재시도까지 모두 실패해 버림)',
+                  lambda: {'flushed': sensor_writer.flushed_rows, 'dropped': sensor_writer.dropped_rows},
+                  labels=('result',), kind='counter')
+metrics.collector('rule_events_total', '규칙 엔진 이벤트 (dispatched: 전달 완료, dropped: 큐가 가득 차 버림)',
+                  lambda: {'dispatched': rule_dispatcher.dispatched, 'dropped': rule_dispatcher.dropped},
+                  labels=('result',), kind='counter')
+metrics.collector('stream_subscribers', '/api/stream 연결 수', live_hub.subscriber_count)
+metrics.collector('sensor_cache_rows', '센서 링 버퍼에 들어 있는 행 수',
+                  lambda: db_manager.sensor_cache_stats().get('size'))
 
-# 데몬 스레드 기동
-threading.Thread(target=_cleanup_every_30_days, daemon=True).start()
-threading.Thread(target=_camera_every_12_hours, daemon=True).start()
-logging.info("백그라운드 스케줄러(DB 정리, 자동 촬영) 스레드가 시작되었습니다.")
+def _ai_cache_requests():
+    if result_cache is None:
+        return None
+    stats = result_cache.stats()
+    return {'hit': stats['hits'], 'miss': stats['misses']}
+
+metrics.collector('ai_result_cache_requests_total', 'AI 결과 캐시 조회 (hit: 추론 생략)', _ai_cache_requests,
+                  labels=('result',), kind='counter')
 
 
 # --- 4. 웹 페이지 및 API 라우트 (코드 2 기반) ---
@@ -82,12 +283,29 @@ logging.info("백그라운드 스케줄러(DB 정리, 자동 촬영) 스레드
 @app.route('/')
 def index():
     try:
-        sensor_data_rows = db_manager.get_all_sensor_data()
-        return render_template('index.html', sensor_data=sensor_data_rows)
+        # 전체 테이블 대신 첫 페이지만 렌더링 (이후 페이지는 /api/sensor_data 로 이어서 조회)
+        sensor_data_rows = db_manager.get_sensor_data_page(limit=DASHBOARD_PAGE_SIZE)
+        next_before_id = sensor_data_rows[-1]['id'] if len(sensor_data_rows) == DASHBOARD_PAGE_SIZE else None
+        return render_template('index.html', sensor_data=sensor_data_rows, next_before_id=next_before_id,
+                               page_size=DASHBOARD_PAGE_SIZE)
     except Exception as e:
         logging.error(f"Index 페이지 로딩 오류: {e}")
         return "데이터베이스 조회에 실패했습니다.", 500
 
+@app.route('/healthz', methods=['GET'])
+def healthz():
+    """프로세스 상태와 AI 모델 준비 여부. 모든 모델이 준비되기 전에는 503."""
+    ready = model_registry.ready()
+    models = model_registry.status()
+    if ready:
+        status = 'ok'
+    elif any(m['state'] == 'failed' for m in models.values()):
+        status = 'degraded'
+    else:
+        status = 'starting'
+    body = {'status': status, 'models_ready': ready, 'models': models, 'pid': os.getpid()}
+    return jsonify(body), 200 if ready else 503
+
 @app.route('/api/latest_data', methods=['GET'])
 def get_latest_data():
     try:
@@ -100,6 +318,133 @@ def get_latest_data():
         logging.error(f"최신 데이터 API 오류: {e}")
         return jsonify({'error': str(e)}), 500
 
+STREAM_TOPICS = ('sensor', 'analysis', 'rule')
+
+def _sse(event_id, name, data) -> str:
+    return f"id: {event_id}\nevent: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@app.route('/api/stream', methods=['GET'])
+def stream_events():
+    """
+    Server-Sent Events 실시간 스트림. ?topics=sensor,analysis (기본: 전체)
+    새 센서 값(sensor)과 AI 분석 결과(analysis)를 DB 를 다시 읽지 않고 커밋 직후 그대로 전달하며,
+    연결 직후 한 번만 최신 센서 값을 보내고, 조용할 때는 heartbeat 주석으로 연결을 유지합니다.
+    """
+    topics = [t.strip() for t in request.args.get('topics', '').split(',') if t.strip()] or list(STREAM_TOPICS)
+    unknown = [t for t in topics if t not in STREAM_TOPICS]
+    if unknown:
+        return jsonify({'error': f"unknown topics: {', '.join(unknown)}"}), 400
+
+    sub = live_hub.subscribe(maxsize=STREAM_CLIENT_QUEUE_SIZE, topics=topics)
+    if sub is None:
+        return jsonify({'error': 'Too many stream clients, retry later'}), 503, {'Retry-After': '30'}
+
+    def generate():
+        try:
+            yield f"retry: {STREAM_HEARTBEAT_SECONDS * 1000}\n\n"
+            if 'sensor' in topics:
+                try:
+                    latest = db_manager.get_latest_sensor_data()
+                except Exception as e:
+                    logging.error(f"스트림 초기 데이터 조회 오류: {e}")
+                    latest = None
+                if latest:
+                    yield _sse(0, 'sensor', dict(latest))
+            while not sub.closed:
+                event = sub.get(timeout=STREAM_HEARTBEAT_SECONDS)
+                dropped = sub.take_dropped()
+                if dropped:
+                    # 클라이언트가 느려 버려진 이벤트가 있음을 알림 (필요하면 /api/sensor_data 로 보충)
+                    yield _sse(0, 'lagged', {'dropped': dropped})
+                if event is None:
+                    yield ": heartbeat\n\n"
+                    continue
+                yield _sse(*event)
+        finally:
+            live_hub.unsubscribe(sub)
+
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    return Response(generate(), mimetype='text/event-stream', headers=headers)
+
+def _parse_ts_arg(name):
+    """
+    쿼리 인자의 시각을 DB 저장 형식('YYYY-MM-DD HH:MM:SS', UTC)으로 변환 (잘못된 값은 ValueError).
+    오프셋이 있으면(예: +09:00) UTC 로 바꾸고, 없으면 UTC 로 간주합니다.
+    """
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        dt = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be an ISO datetime, got {value!r}")
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc)
+    return dt.strftime('%Y-%m-%d %H:%M:%S')
+
+@app.route('/api/sensor_data', methods=['GET'])
+def get_sensor_history():
+    """
+    keyset 페이지네이션 센서 이력 API.
+    ?before_id=&limit=&from=&to=&fields=a,b 를 받아 최신순으로 JSON 을 스트리밍합니다.
+    응답의 next_before_id 를 다음 요청의 before_id 로 넘기면 다음 페이지를 받습니다.
+    """
+    try:
+        before_id = request.args.get('before_id', type=int)
+        limit = request.args.get('limit', default=API_PAGE_LIMIT_DEFAULT, type=int)
+        limit = max(1, min(limit, API_PAGE_LIMIT_MAX))
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+        filters = dict(before_id=before_id, limit=limit, fields=fields,
+                       from_ts=_parse_ts_arg('from'), to_ts=_parse_ts_arg('to'))
+        rows = db_manager.iter_sensor_data(**filters)
+        # 첫 행을 미리 읽어 잘못된 요청/DB 오류를 스트리밍 시작 전에 응답 코드로 알림
+        first = next(rows, None)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"센서 이력 API 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+    def generate():
+        count, last_id = 0, None
+        yield '{"data":['
+        if first is not None:
+            yield json.dumps(first, ensure_ascii=False)
+            count, last_id = 1, first['id']
+            for row in rows:
+                yield ',' + json.dumps(row, ensure_ascii=False)
+                count += 1
+                last_id = row['id']
+        next_before_id = last_id if count == limit else None
+        yield f'],"count":{count},"next_before_id":{json.dumps(next_before_id)}}}'
+
+    return Response(generate(), mimetype='application/json')
+
+@app.route('/api/sensor_rollup', methods=['GET'])
+def get_sensor_rollup():
+    """
+    분/시/일 롤업 기반 차트 데이터 API. ?resolution=auto|minute|hour|day&from=&to=&fields=
+    auto(기본값)는 구간 안에 ROLLUP_MIN_POINTS 개 이상이 나오는 가장 거친 해상도를 고릅니다.
+    """
+    try:
+        to_ts = _parse_ts_arg('to') or datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        from_ts = _parse_ts_arg('from') or (
+            datetime.strptime(to_ts, '%Y-%m-%d %H:%M:%S') - timedelta(hours=ROLLUP_DEFAULT_RANGE_HOURS)
+        ).strftime('%Y-%m-%d %H:%M:%S')
+        if from_ts > to_ts:
+            raise ValueError("'from' must not be later than 'to'")
+        resolution = request.args.get('resolution', 'auto')
+        if resolution == 'auto':
+            resolution = db_manager.pick_rollup_resolution(from_ts, to_ts, ROLLUP_MIN_POINTS)
+        fields = [f.strip() for f in request.args.get('fields', '').split(',') if f.strip()] or None
+        data = db_manager.get_sensor_rollup(resolution, from_ts, to_ts, fields)
+        return jsonify({'resolution': resolution, 'from': from_ts, 'to': to_ts, 'data': data}), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"센서 롤업 API 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
 
 # --- 5. ESP32 통신 라우트 (코드 2 기반, AI 연동 방식 유지) ---
 
@@ -107,7 +452,8 @@ def get_latest_data():
 def receive_sensor_data():
     try:
         data = request.json
-        logging.info(f"센서 데이터 수신: {data}")
+        # 요청마다 전체 값을 INFO 로 남기면 부하 시 로그 I/O 가 쌓이므로 DEBUG 로만 기록
+        logging.debug(f"센서 데이터 수신: {data}")
         db_manager.save_sensor_data(
             soil_moisture=data.get('soil_moisture'),
             air_temperature=data.get('air_temperature'),
@@ -120,49 +466,221 @@ def receive_sensor_data():
         logging.error(f"센서 데이터 처리 오류: {e}")
         return jsonify({'error': str(e)}), 500
 
+@app.route('/sensor/batch', methods=['POST'])
+def receive_sensor_batch():
+    """여러 센서 측정값(JSON 배열)을 받아 write-behind 큐에 넣습니다."""
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        data = data.get('readings')
+    if not isinstance(data, list) or not data:
+        return jsonify({'error': 'JSON array of readings expected'}), 400
+    if len(data) > SENSOR_BATCH_MAX:
+        return jsonify({'error': f'too many readings (max {SENSOR_BATCH_MAX})'}), 413
+
+    try:
+        rows = [db_manager.normalize_sensor_reading(item) for item in data]
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    try:
+        queued = sensor_writer.put_many(rows)
+    except Exception as e:
+        logging.error(f"센서 일괄 데이터 처리 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+    if not queued:
+        # 배치 전체를 거부 (아무것도 넣지 않았으므로 클라이언트는 같은 배치를 그대로 재시도하면 됨)
+        logging.warning(f"센서 큐가 가득 차 {len(rows)}건 배치를 거부했습니다.")
+        return jsonify({'error': 'sensor queue is full, retry later', 'accepted': 0}), 503
+    return jsonify({'status': 'Sensor batch queued', 'accepted': len(rows)}), 202
+
+def process_camera_image(image_data) -> dict:
+    """이미지 한 장을 분석하고 결과를 DB에 '새로운 기록'으로 저장합니다. (작업 큐 워커에서 실행)"""
+    # AI 분석: 디스크를 거치지 않고 메모리의 바이트를 한 번만 디코딩/전처리해 두 모델에 공유
+    # (비슷한 장면의 결과가 캐시에 있으면 추론 생략, AI_BATCH_MAX_SIZE > 1 이면 배치 추론)
+    analysis = analyze_camera_image(image_data)
+    logging.info(f"AI 분석 결과: 딸기='{analysis['ripeness_text']}'({analysis['ripeness_score']}), "
+                 f"꽃={analysis['flower_count']}개, 캐시={analysis['cached']}")
+
+    # 보관 설정에 따라 내용 주소 이름으로 저장(또는 해시만 기록)
+    file_path = store_image(image_data)
+    ids = db_manager.save_image_analysis_result(file_path=file_path, **analysis)
+    logging.info(f"DB에 새로운 이미지 및 AI 분석 결과 기록 완료: {file_path}")
+    return {**analysis, **ids, 'file_path': file_path}
+
 @app.route('/camera/callback', methods=['POST'])
 def camera_callback():
-    """이미지 수신, AI 분석, DB에 '기록'을 한 번에 처리합니다."""
+    """이미지를 받아 분석 작업 큐에 넣고, 결과를 기다리지 않고 job id 를 바로 돌려줍니다."""
     image_data = request.data
     if not image_data:
         return jsonify({'error': 'No image data received'}), 400
 
-    # 절대 경로를 사용하도록 수정됨
-    temp_filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"temp_{int(time.time())}.jpg")
-    
-    try:
-        with open(temp_filepath, 'wb') as f:
-            f.write(image_data)
-        logging.info(f"이미지 임시 저장: {temp_filepath}")
-
-        # AI 분석 모듈 직접 호출
-        ripeness_score, ripeness_text = analyze_ripeness(temp_filepath)
-        flower_count, flower_status = analyze_flowers(temp_filepath)
-        logging.info(f"AI 분석 결과: 딸기='{ripeness_text}'({ripeness_score}), 꽃={flower_count}개")
-
-        # ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼
-        # (수정된 부분)
-        # 개선된 통합 함수를 호출하여 모든 정보를 '새로운 기록'으로 저장합니다.
-        db_manager.save_image_analysis_result(
-            file_path=temp_filepath,
-            ripeness_score=ripeness_score,
-            ripeness_text=ripeness_text,
-            flower_count=flower_count,
-            flower_text=flower_status  # flower_status 정보도 추가
-        )
-        logging.info("DB에 새로운 이미지 및 AI 분석 결과 기록 완료")
-        # ▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲▲
-        
-        return jsonify({'status': 'Image analyzed and result saved'}), 200
+    try:
+        job_id = inference_jobs.submit(lambda: process_camera_image(image_data))
+    except QueueFullError:
+        logging.warning("AI 분석 대기열이 가득 차 이미지를 거부했습니다.")
+        return jsonify({'error': 'Inference queue is full, retry later'}), 429, {'Retry-After': '5'}
     except Exception as e:
-        logging.error(f"이미지 처리 및 AI 분석 오류: {e}")
+        logging.error(f"이미지 분석 작업 등록 오류: {e}")
         return jsonify({'error': 'Image processing failed'}), 500
-    finally:
-        # 분석 완료 후 임시 파일 삭제
-        if os.path.exists(temp_filepath):
-            os.remove(temp_filepath)
-            logging.info(f"임시 이미지 삭제: {temp_filepath}")
-            
+
+    return jsonify({'status': 'Image queued for analysis', 'job_id': job_id,
+                    'status_url': f'/api/jobs/{job_id}'}), 202
+
+def _deliver_to_inference(node, image_data):
+    """오케스트레이터가 받은 이미지를 분석 작업 큐에 넣습니다. (대기열이 가득 차면 백오프 후 재시도)"""
+    try:
+        return {'job_id': inference_jobs.submit(lambda: process_camera_image(image_data))}
+    except QueueFullError as e:
+        raise RetryableDelivery(str(e)) from e
+
+# 카메라 촬영 오케스트레이터 (동시 실행 수 제한, 노드별 타임아웃/재시도)
+camera_orchestrator = CaptureOrchestrator(
+    nodes_from_config(CAMERA_NODES),
+    deliver=_deliver_to_inference,
+    max_concurrency=CAMERA_MAX_CONCURRENCY,
+    connect_timeout=CAMERA_CONNECT_TIMEOUT,
+    read_timeout=CAMERA_READ_TIMEOUT,
+    retries=CAMERA_RETRIES,
+    backoff=CAMERA_BACKOFF_SECONDS,
+    capture_path=CAMERA_CAPTURE_PATH,
+)
+
+@app.route('/api/capture', methods=['POST'])
+def capture_cameras():
+    """카메라 노드에 즉시 촬영을 요청합니다. ?nodes=a,b (기본: 전체) 노드별 결과와 분석 job id 를 반환"""
+    names = [n.strip() for n in request.args.get('nodes', '').split(',') if n.strip()] or None
+    try:
+        results = camera_orchestrator.capture_all(names)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"카메라 촬영 요청 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+    ok = sum(r['ok'] for r in results)
+    return jsonify({'requested': len(results), 'succeeded': ok, 'results': results}), 200 if ok else 502
+
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """분석 작업 상태 조회 (queued / running / done / failed)."""
+    job = inference_jobs.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Unknown job id'}), 404
+    return jsonify(job), 200
+
+@app.route('/api/detections', methods=['GET'])
+def get_detection_counts():
+    """기간별 모델/클래스 검출 수 집계. ?from=&to=&model=ripe|flower (기본: 최근 7일)"""
+    try:
+        to_ts = _parse_ts_arg('to') or datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+        from_ts = _parse_ts_arg('from') or (
+            datetime.strptime(to_ts, '%Y-%m-%d %H:%M:%S') - timedelta(days=7)
+        ).strftime('%Y-%m-%d %H:%M:%S')
+        rows = db_manager.get_detection_class_counts(from_ts, to_ts, request.args.get('model'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    except Exception as e:
+        logging.error(f"검출 집계 API 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+    names = {m: class_names(m) for m in {r['model'] for r in rows}}
+    for r in rows:
+        r['class_name'] = names[r['model']].get(r['class_id'])
+    return jsonify({'from': from_ts, 'to': to_ts, 'data': rows}), 200
+
+@app.route('/api/ai_cache', methods=['GET'])
+def get_ai_cache_stats():
+    """AI 결과 캐시 적중/미스 카운터."""
+    if result_cache is None:
+        return jsonify({'enabled': False}), 200
+    return jsonify({'enabled': True, **result_cache.stats()}), 200
+
+@app.route('/api/scheduler', methods=['GET'])
+def get_scheduler_status():
+    """작업별 일정, 다음 실행 시각, 마지막 실행 결과와 소요 시간, 임대 보유 프로세스. ?runs=N 이면 최근 실행 기록 포함"""
+    try:
+        body = {'enabled': SCHEDULER_ENABLED, 'lease': scheduler.lease(), 'jobs': scheduler.status()}
+        runs = request.args.get('runs', type=int)
+        if runs:
+            body['runs'] = db_manager.get_scheduler_runs(limit=max(1, min(runs, SCHEDULER_RUN_HISTORY)))
+        return jsonify(body), 200
+    except Exception as e:
+        logging.error(f"스케줄러 상태 API 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+
+@app.route('/api/scheduler/<name>/run', methods=['POST'])
+def trigger_scheduler_job(name):
+    """작업을 즉시 실행하도록 요청합니다. (임대를 가진 프로세스가 다음 tick 에 실행)"""
+    if name not in scheduler.jobs:
+        return jsonify({'error': f"Unknown job '{name}'"}), 404
+    if not SCHEDULER_ENABLED:
+        # 요청을 남겨도 실행할 프로세스가 없음
+        return jsonify({'error': 'Scheduler is disabled (SCHEDULER_ENABLED=False)', 'job': name}), 503
+    try:
+        if not scheduler.trigger(name):
+            return jsonify({'error': f"Unknown job '{name}'"}), 404
+    except Exception as e:
+        logging.error(f"스케줄러 작업 요청 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+    return jsonify({'status': 'Job run requested', 'job': name}), 202
+
+@app.route('/api/rules', methods=['GET'])
+def get_rules_status():
+    """
+    규칙별 상태(활성 여부, 마지막 발생/해제), 필드별 이동 통계, 최근 이벤트, 디스패치 큐 상태. ?limit=N
+    어느 워커가 받든 평가를 맡은 프로세스가 DB 에 저장한 상태를 보여줍니다. (evaluator.owner, updated_at)
+    """
+    if rule_engine is None:
+        return jsonify({'enabled': False}), 200
+    limit = max(1, min(request.args.get('limit', 50, type=int), RULE_EVENT_HISTORY))
+    try:
+        saved = db_manager.get_rule_engine_state()
+        events = db_manager.get_rule_events(limit)
+    except Exception as e:
+        logging.error(f"규칙 상태 API 오류: {e}")
+        return jsonify({'error': str(e)}), 500
+    if saved is not None:
+        status = saved['status']
+        evaluator = {'owner': saved['owner'], 'updated_at': saved['updated_at'], 'cursor': saved['cursor']}
+    else:
+        # 아직 평가한 프로세스가 없음: 설정된 규칙의 초기 상태
+        status = {**rule_engine.status(), 'dispatch': rule_dispatcher.stats()}
+        evaluator = {'owner': None, 'updated_at': None, 'cursor': None}
+    evaluator['is_self'] = rule_evaluator.is_leader
+    return jsonify({'enabled': True, **status, 'evaluator': evaluator, 'events': events}), 200
+
+@app.route('/metrics', methods=['GET'])
+def metrics_endpoint():
+    """Prometheus 텍스트 형식의 계측 값 (경로/DB/AI 단계별 지연 히스토그램, 대기열 길이, 캐시 적중 수)"""
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+@app.route('/api/profiler', methods=['GET'])
+def get_profiler_status():
+    """샘플링 프로파일러 상태. ?format=collapsed 면 flamegraph 용 collapsed 스택 (?top=N 개)"""
+    if request.args.get('format') == 'collapsed':
+        top = request.args.get('top', type=int)
+        return Response(metrics.profiler.collapsed(top), content_type='text/plain; charset=utf-8')
+    return jsonify(metrics.profiler.status()), 200
+
+@app.route('/api/profiler/start', methods=['POST'])
+def start_profiler():
+    """샘플링 프로파일러 시작. ?seconds=N (0 초과, 최대 PROFILER_MAX_SECONDS) ?interval_ms=N (0 초과)"""
+    seconds = request.args.get('seconds', default=PROFILER_MAX_SECONDS, type=float)
+    interval_ms = request.args.get('interval_ms', default=PROFILER_INTERVAL_MS, type=float)
+    # 0/NaN/inf 는 종료 시각이 없는 프로파일링이 되므로 거부 (PROFILER_MAX_SECONDS 상한을 우회하지 못하게)
+    for name, value in (('seconds', seconds), ('interval_ms', interval_ms)):
+        if not math.isfinite(value) or value <= 0:
+            return jsonify({'error': f"'{name}' must be a positive number, got {value}"}), 400
+    seconds = min(seconds, PROFILER_MAX_SECONDS)
+    if not metrics.profiler.start(interval=interval_ms / 1000.0, duration=seconds):
+        return jsonify({'error': 'Profiler is already running', **metrics.profiler.status()}), 409
+    logging.info(f"샘플링 프로파일러 시작 ({interval_ms} ms 간격, 최대 {seconds}초)")
+    return jsonify(metrics.profiler.status()), 202
+
+@app.route('/api/profiler/stop', methods=['POST'])
+def stop_profiler():
+    """샘플링 프로파일러 중지 (결과는 다음 시작 전까지 GET /api/profiler?format=collapsed 로 조회)"""
+    metrics.profiler.stop()
+    return jsonify(metrics.profiler.status()), 200
+
 @app.route('/analysis')
 def analysis_page():
     """(새로 추가) AI 분석 결과 확인 페이지"""
@@ -174,6 +692,25 @@ def analysis_page():
     except Exception as e:
         logging.error(f"Analysis 페이지 로딩 오류: {e}")
         return "AI 분석 기록 조회에 실패했습니다.", 500
+
+# 개발 서버(python app.py)의 debug/자동 재시작은 FLASK_DEBUG=1 일 때만
+DEV_DEBUG = os.environ.get('FLASK_DEBUG') == '1'
+
+# 작업이 쓰는 구성 요소(분석 큐, 카메라 오케스트레이터)가 모두 준비된 뒤 스케줄러 시작
+# debug 리로더의 감시용 부모 프로세스에서는 시작하지 않음 (실제 서버는 WERKZEUG_RUN_MAIN 이 설정된 자식 프로세스)
+# 멀티 워커(serve.py, gunicorn)에서는 모든 워커가 시작하지만 임대를 가진 하나만 작업을 실행
+_RELOADER_PARENT = __name__ == '__main__' and DEV_DEBUG and os.environ.get('WERKZEUG_RUN_MAIN') != 'true'
+if SCHEDULER_ENABLED and not _RELOADER_PARENT:
+    scheduler.start()
+    atexit.register(scheduler.stop)
+# 규칙 평가도 같은 방식: 모든 워커가 시작하지만 'rules' 임대를 가진 하나만 평가 (스케줄러 설정과 무관)
+if rule_evaluator is not None and not _RELOADER_PARENT:
+    rule_evaluator.start()
+    atexit.register(rule_evaluator.stop)
+
 # --- 6. 앱 실행 ---
+# 운영: python serve.py (멀티 워커, serve.py 참고) 또는 gunicorn -c gunicorn.conf.py app:app
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=PORT, debug=True)
\ No newline at end of file
+    # 개발용 단일 프로세스 서버
+    logging.info("개발 서버로 실행합니다. 운영 환경에서는 'python serve.py' 를 사용하세요.")
+    app.run(host='0.0.0.0', port=PORT, debug=DEV_DEBUG, threaded=True)
\ No newline at end of file
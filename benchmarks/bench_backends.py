@@ -0,0 +1,89 @@
+# benchmarks/bench_backends.py
+"""
+추론 백엔드(pytorch / onnx / onnx-int8 / openvino)별 지연과 메모리(RSS)를 비교합니다.
+RSS 를 공정하게 재기 위해 백엔드마다 별도 프로세스에서 측정합니다.
+
+    python -m ai_module.backends export --backend onnx         # 먼저 가중치 변환
+    python -m ai_module.backends export --backend onnx-int8
+    python benchmarks/bench_backends.py [--backends pytorch onnx onnx-int8] [--runs 20] [--weights-dir DIR]
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+from common import ROOT_DIR, percentile, synthetic_jpeg
+
+
+def _measure_one(backend, runs, weights_dir, threads):
+    import logging
+    import psutil
+
+    logging.disable(logging.INFO)
+    proc = psutil.Process()
+    rss_before = proc.memory_info().rss
+
+    import torch
+    from ultralytics import YOLO
+    from ai_module import backends, strawberry_analyzer as sa
+
+    if threads:
+        torch.set_num_threads(threads)
+    t0 = time.perf_counter()
+    for name in backends.MODEL_NAMES:
+        sa.registry.set(name, YOLO(backends.model_path(name, backend, weights_dir), task="detect"))
+    data = synthetic_jpeg()
+    sa.analyze_image(data)  # 워밍업
+    load_s = time.perf_counter() - t0
+
+    samples = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        sa.analyze_image(data)
+        samples.append((time.perf_counter() - t) * 1000)
+    samples.sort()
+    return {
+        "backend": backend,
+        "load_s": round(load_s, 2),
+        "p50_ms": round(percentile(samples, 50), 1),
+        "p95_ms": round(percentile(samples, 95), 1),
+        "rss_mb": round(proc.memory_info().rss / 2**20, 1),
+        "rss_delta_mb": round((proc.memory_info().rss - rss_before) / 2**20, 1),
+    }
+
+
+def main():
+    from ai_module.backends import BACKEND_SUFFIXES, WEIGHTS_DIR
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backends", nargs="+", default=list(BACKEND_SUFFIXES))
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=0)
+    parser.add_argument("--weights-dir", default=WEIGHTS_DIR)
+    parser.add_argument("--single", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print(json.dumps(_measure_one(args.single, args.runs, args.weights_dir, args.threads)))
+        return
+
+    from ai_module.backends import model_path
+
+    for backend in args.backends:
+        if not os.path.exists(model_path("ripe", backend, args.weights_dir)):
+            print(f"- {backend}: 가중치 없음, 건너뜀")
+            continue
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--single", backend, "--runs", str(args.runs),
+             "--threads", str(args.threads), "--weights-dir", args.weights_dir],
+            capture_output=True, text=True, cwd=ROOT_DIR,
+        )
+        lines = [l for l in out.stdout.splitlines() if l.startswith("{")]
+        print(lines[-1] if lines else f"- {backend}: 실패\n{out.stderr[-2000:]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# benchmarks/bench_batching.py
+"""
+마이크로 배칭(MicroBatcher + analyze_images) 의 배치 크기별 처리량과 지연을 측정합니다.
+카메라 C 대가 동시에 (닫힌 루프로) 이미지를 계속 올리는 상황을 스레드로 흉내 냅니다.
+
+    python benchmarks/bench_batching.py [--clients 8] [--images 40] [--sizes 1 2 4 8] [--wait-ms 25]
+"""
+
+import argparse
+import threading
+import time
+
+from common import ensure_models, percentile, synthetic_jpeg
+
+
+def run(sa, batch_size, wait_ms, clients, images, data):
+    from ai_module.batching import MicroBatcher
+
+    batcher = MicroBatcher(sa.analyze_images, max_batch=batch_size, max_wait_ms=wait_ms)
+    latencies = []
+    lock = threading.Lock()
+    per_client = max(1, images // clients)
+
+    def client():
+        local = []
+        for _ in range(per_client):
+            t0 = time.perf_counter()
+            batcher(data)
+            local.append((time.perf_counter() - t0) * 1000)
+        with lock:
+            latencies.extend(local)
+
+    batcher(data)  # 워밍업
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    batcher.stop()
+
+    latencies.sort()
+    return {
+        "batch_size": batch_size,
+        "images_per_sec": round(len(latencies) / elapsed, 2),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "avg_batch": round(batcher.items / max(1, batcher.batches), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--images", type=int, default=40, help="전체 요청 이미지 수")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--wait-ms", type=float, default=25)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from ai_module import strawberry_analyzer as sa
+
+    ensure_models(sa)
+    data = synthetic_jpeg(640, 480)
+    for size in args.sizes:
+        print(run(sa, size, args.wait_ms, args.clients, args.images, data))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# benchmarks/bench_capture.py
+"""
+촬영 -> /camera/callback -> 분석 파이프라인 오프라인 부하 테스트.
+가짜 ESP32 서버(fake_esp32.py)와 Flask 앱(werkzeug 스레드 서버, 임시 DB)을 한 프로세스에서 띄우고,
+CaptureOrchestrator 로 여러 회차 동시 촬영을 보낸 뒤 분석 작업이 모두 끝날 때까지 기다립니다.
+
+    python benchmarks/bench_capture.py [--nodes 8] [--rounds 5] [--concurrency 4] [--latency-ms 150] [--fail-rate 0.05]
+
+ai_module/weights/*.pt 가 없으면 같은 구조(yolov8n.yaml)의 임의 가중치로 대신 측정합니다.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+import fake_esp32
+from common import ensure_models, percentile
+
+
+def _wait_jobs(client, job_ids, timeout):
+    """분석 작업이 모두 done/failed 가 될 때까지 /api/jobs 를 폴링."""
+    pending = set(job_ids)
+    failed = 0
+    deadline = time.time() + timeout
+    while pending and time.time() < deadline:
+        for job_id in list(pending):
+            status = client.get(f"/api/jobs/{job_id}").get_json().get("status")
+            if status in ("done", "failed"):
+                pending.discard(job_id)
+                failed += status == "failed"
+        time.sleep(0.05)
+    return len(pending), failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--nodes", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=960)
+    parser.add_argument("--latency-ms", type=float, default=150.0)
+    parser.add_argument("--fail-rate", type=float, default=0.05)
+    parser.add_argument("--retries", type=int, default=2)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    import config
+    tmp = tempfile.TemporaryDirectory()
+    config.DB_PATH = os.path.join(tmp.name, "bench.db")
+    config.AI_WARMUP_ON_START = False
+    config.SCHEDULER_ENABLED = False
+
+    from werkzeug.serving import make_server
+
+    import app as server
+    from ai_module import strawberry_analyzer as sa
+    from camera_orchestrator import CaptureOrchestrator, CameraNode, http_deliver
+    ensure_models(sa)
+
+    cams = fake_esp32.start(nodes=args.nodes, width=args.width, height=args.height,
+                            latency_ms=args.latency_ms, fail_rate=args.fail_rate)
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    callback = f"http://127.0.0.1:{httpd.server_port}/camera/callback"
+
+    nodes = [CameraNode(f"cam-{i}", url) for i, url in enumerate(cams.node_urls())]
+    orch = CaptureOrchestrator(nodes, deliver=None, max_concurrency=args.concurrency,
+                               retries=args.retries, backoff=0.2)
+    orch.deliver = http_deliver(callback, session=orch.session)
+
+    results, rounds_ms = [], []
+    t0 = time.perf_counter()
+    for _ in range(args.rounds):
+        r0 = time.perf_counter()
+        results.extend(orch.capture_all())
+        rounds_ms.append(round((time.perf_counter() - r0) * 1000, 1))
+    capture_s = time.perf_counter() - t0
+
+    job_ids = [r["delivered"]["job_id"] for r in results if r["ok"]]
+    unfinished, failed_jobs = _wait_jobs(server.app.test_client(), job_ids, timeout=600)
+    total_s = time.perf_counter() - t0
+
+    totals = sorted(r["total_ms"] for r in results)
+    print({"nodes": args.nodes, "rounds": args.rounds, "concurrency": args.concurrency,
+           "latency_ms": args.latency_ms, "fail_rate": args.fail_rate})
+    print({"captures": len(results), "ok": sum(r["ok"] for r in results),
+           "retried": sum(r["attempts"] > 1 for r in results),
+           "camera_503": cams.failed,
+           "capture_p50_ms": percentile(totals, 50), "capture_p95_ms": percentile(totals, 95),
+           "round_ms": rounds_ms,
+           "capture_per_sec": round(len(results) / capture_s, 1)})
+    print({"jobs": len(job_ids), "failed": failed_jobs, "unfinished": unfinished,
+           "end_to_end_images_per_sec": round(len(job_ids) / total_s, 2)})
+
+    orch.close()
+    httpd.shutdown()
+    cams.shutdown()
+    server.inference_jobs.stop()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
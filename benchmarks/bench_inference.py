@@ -0,0 +1,85 @@
+# benchmarks/bench_inference.py
+"""
+카메라 콜백의 AI 분석 경로를 CPU 에서 비교합니다.
+
+  two-call : 임시 파일 저장 -> analyze_ripeness(path) + analyze_flowers(path)
+             (이미지를 모델마다 따로 디코딩/letterbox/정규화)
+  shared   : analyze_image(bytes) — 한 번 디코딩/전처리한 텐서를 두 모델이 공유
+
+    python benchmarks/bench_inference.py [이미지.jpg] [--runs 20] [--threads 4]
+
+ai_module/weights/*.pt 가 없으면 같은 구조(yolov8n.yaml)의 임의 가중치로 대신 측정합니다.
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from common import ensure_models, synthetic_jpeg
+
+
+def _load_image_bytes(path):
+    if path:
+        with open(path, "rb") as f:
+            return f.read()
+    return synthetic_jpeg()
+
+
+def _two_call(sa, data, tmpdir):
+    path = os.path.join(tmpdir, "bench.jpg")
+    with open(path, "wb") as f:
+        f.write(data)
+    try:
+        sa.analyze_ripeness(path)
+        sa.analyze_flowers(path)
+    finally:
+        os.remove(path)
+
+
+def _measure(fn, runs, warmup=2):
+    for _ in range(warmup):
+        fn()
+    samples = []
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return {"p50_ms": round(statistics.median(samples), 1),
+            "mean_ms": round(statistics.fmean(samples), 1),
+            "max_ms": round(samples[-1], 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("image", nargs="?", help="측정에 쓸 JPEG (기본: 합성 이미지)")
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=0, help="torch intra-op 스레드 수 (0=기본값)")
+    args = parser.parse_args()
+
+    import logging
+    import torch
+
+    logging.disable(logging.INFO)
+    if args.threads:
+        torch.set_num_threads(args.threads)
+
+    from ai_module import strawberry_analyzer as sa
+
+    ensure_models(sa)
+    data = _load_image_bytes(args.image)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        two_call = _measure(lambda: _two_call(sa, data, tmpdir), args.runs)
+    shared = _measure(lambda: sa.analyze_image(data), args.runs)
+
+    print(f"torch threads={torch.get_num_threads()}  runs={args.runs}  image={len(data)} bytes")
+    print(f"two-call : {two_call}")
+    print(f"shared   : {shared}")
+    print(f"speedup  : x{two_call['p50_ms'] / shared['p50_ms']:.2f} (p50)")
+
+
+if __name__ == "__main__":
+    main()
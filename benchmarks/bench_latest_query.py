@@ -0,0 +1,73 @@
+# benchmarks/bench_latest_query.py
+"""
+행 수가 늘어나도 최신 행 조회(get_latest_sensor_data) 지연이 일정한지 확인합니다.
+
+    python benchmarks/bench_latest_query.py                 # 10k, 100k, 1M
+    python benchmarks/bench_latest_query.py 10000 10000000  # 10M 까지 (수 분 소요)
+
+임시 디렉터리에 DB 를 만들어 측정하므로 프로젝트의 database.db 는 건드리지 않습니다.
+"""
+
+import os
+import sys
+import tempfile
+import time
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from database import db_manager  # noqa: E402
+from database import init as dbcore  # noqa: E402
+
+LATEST_SQL = "SELECT * FROM sensor_data ORDER BY timestamp DESC, id DESC LIMIT 1"
+
+
+def _fill(rows: int) -> None:
+    """5초 간격 측정값을 rows 개 생성 (재귀 CTE 로 SQLite 내부에서 생성)."""
+    with dbcore.pooled_connection() as conn:
+        conn.execute(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < ?)
+            INSERT INTO sensor_data
+            (timestamp, soil_moisture, air_temperature, air_humidity, light_intensity, water_level)
+            SELECT datetime('2024-01-01', '+' || (n * 5) || ' seconds'),
+                   40 + (n % 20), 20 + (n % 10) * 0.5, 60 + (n % 30), n % 1000, 50
+            FROM seq
+            """,
+            (rows,),
+        )
+        conn.commit()
+
+
+def _time_latest(iterations: int = 2000) -> list:
+    samples = []
+    for _ in range(iterations):
+        t0 = time.perf_counter()
+        db_manager.get_latest_sensor_data()
+        samples.append((time.perf_counter() - t0) * 1e6)
+    return samples
+
+
+def run(size: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        dbcore.set_db_path(os.path.join(tmp, "bench.db"))
+        dbcore.init_db()
+        _fill(size)
+        with dbcore.pooled_connection() as conn:
+            plan = [r[3] for r in conn.execute("EXPLAIN QUERY PLAN " + LATEST_SQL)]
+        samples = _time_latest()
+        dbcore.close_pool()
+    samples.sort()
+    return {
+        "rows": size,
+        "p50_us": round(statistics.median(samples), 1),
+        "p99_us": round(samples[int(len(samples) * 0.99) - 1], 1),
+        "plan": "; ".join(plan),
+    }
+
+
+if __name__ == "__main__":
+    sizes = [int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000]
+    for n in sizes:
+        r = run(n)
+        print(f"{r['rows']:>10} rows  p50={r['p50_us']:>8} us  p99={r['p99_us']:>8} us  plan: {r['plan']}")
@@ -0,0 +1,95 @@
+# benchmarks/bench_metrics.py
+"""
+계측(/metrics) 비용 측정.
+  - 관측 한 번의 비용(us): 히스토그램 observe, 카운터 inc, DB 연결 대여/반납 기록
+  - 요청당 비용: METRICS_ENABLED 켬/끔을 번갈아 같은 요청을 반복해 지연 비교
+    (Flask 테스트 클라이언트와 werkzeug HTTP 서버 각각. 캐시로 응답하는 짧은 요청일수록 비율이 커짐)
+
+    python benchmarks/bench_metrics.py [--requests 2000] [--rounds 20]
+
+임시 디렉터리에 DB 를 만들어 측정하므로 프로젝트의 database.db 는 건드리지 않습니다.
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import timeit
+
+from common import ROOT_DIR  # noqa: F401  (sys.path 설정)
+
+
+def per_op_us(stmt, n=200_000):
+    return round(timeit.timeit(stmt, number=n) / n * 1e6, 3)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    import config
+    tmp = tempfile.TemporaryDirectory()
+    config.DB_PATH = os.path.join(tmp.name, "bench.db")
+    config.AI_WARMUP_ON_START = False
+    config.SCHEDULER_ENABLED = False
+
+    import metrics
+    import app as server
+    from database import db_manager
+
+    hist = metrics.histogram("bench_seconds", "bench", ("route", "method", "status"))
+    count = metrics.counter("bench_total", "bench", ("result",))
+
+    def checkout():
+        db_manager._release(db_manager._acquire())
+
+    print({"op": "histogram.labels(..).observe", "us": per_op_us(lambda: hist.labels("/api/x", "GET", "200").observe(0.001))})
+    print({"op": "counter.labels(..).inc", "us": per_op_us(lambda: count.labels("hit").inc())})
+    for on in (False, True):
+        metrics.set_enabled(on)
+        print({"op": "db _acquire/_release", "metrics": on, "us": per_op_us(checkout, 50_000)})
+
+    import threading
+
+    import requests
+    from werkzeug.serving import make_server
+
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    session = requests.Session()
+    base = f"http://127.0.0.1:{httpd.server_port}"
+    client = server.app.test_client()
+    client.post("/sensor", json={"soil_moisture": 40})
+    transports = {"test_client": client.get, "http": lambda url: session.get(base + url)}
+
+    per_round = max(1, args.requests // args.rounds)
+    for transport, get in transports.items():
+        for url in ("/api/latest_data", "/api/sensor_data?limit=10"):
+            samples = {False: [], True: []}
+            for r in range(args.rounds):
+                # 켬/끔 순서를 번갈아 바꿔 시간에 따른 잡음이 한쪽에만 쌓이지 않게 함
+                for on in ((False, True) if r % 2 else (True, False)):
+                    metrics.set_enabled(on)
+                    t0 = time.perf_counter()
+                    for _ in range(per_round):
+                        get(url)
+                    samples[on].append((time.perf_counter() - t0) / per_round * 1e6)
+            # 잡음(다른 프로세스, GC)은 한쪽으로만 더해지므로 가장 빠른 회차끼리 비교
+            off, on = min(samples[False]), min(samples[True])
+            print({"transport": transport, "endpoint": url, "off_us": round(off, 1), "on_us": round(on, 1),
+                   "overhead_pct": round((on / off - 1) * 100, 2)})
+
+    httpd.shutdown()
+    metrics.set_enabled(True)
+    server.sensor_writer.stop()
+    server.inference_jobs.stop()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+# benchmarks/bench_postprocess.py
+"""
+YOLO 출력 후처리(요약) 비용을 박스 수별로 비교합니다.
+  - loop:       예전 방식 (박스마다 box.conf[0].item() / box.cls[0].item())
+  - vectorized: _extract_detections + summarize_detections (argmax / bincount / 마스크)
+모델 추론 없이 ultralytics Results 를 합성 텐서로 만들어 후처리만 측정합니다.
+
+    python benchmarks/bench_postprocess.py [--boxes 10 100 300 1000] [--repeat 200]
+"""
+
+import argparse
+import time
+
+from common import percentile
+
+
+def make_result(n_boxes, n_classes=3, seed=0):
+    import numpy as np
+    import torch
+    from ultralytics.engine.results import Results
+
+    rng = np.random.default_rng(seed)
+    xy = rng.random((n_boxes, 2)) * 600
+    wh = rng.random((n_boxes, 2)) * 40 + 5
+    data = np.concatenate(
+        [xy, xy + wh, rng.random((n_boxes, 1)), rng.integers(0, n_classes, (n_boxes, 1))], axis=1
+    )
+    names = {i: f"class_{i}" for i in range(n_classes)}
+    orig = np.zeros((640, 640, 3), dtype=np.uint8)
+    return Results(orig, path="synthetic", names=names, boxes=torch.tensor(data, dtype=torch.float32)), names
+
+
+def legacy_loop(results, names):
+    best_confidence, best_text = 0.0, "딸기 미검출"
+    for result in results:
+        for box in result.boxes:
+            confidence = box.conf[0].item()
+            if confidence > best_confidence:
+                best_confidence = confidence
+                best_text = names[int(box.cls[0].item())]
+    return round(best_confidence, 2), best_text
+
+
+def vectorized(sa, results, names):
+    summary = sa.summarize_detections(sa._merge_detections(results), names, conf_threshold=0.0)
+    return sa._ripeness_from_summary(summary)
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    samples.sort()
+    return round(percentile(samples, 50), 4), round(percentile(samples, 99), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--boxes", type=int, nargs="+", default=[10, 100, 300, 1000])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    from ai_module import strawberry_analyzer as sa
+
+    for n in args.boxes:
+        result, names = make_result(n)
+        results = [result]
+        assert legacy_loop(results, names)[1] == vectorized(sa, results, names)[1]
+        repeat = max(5, args.repeat // max(1, n // 100))  # 박스가 많을수록 반복 수를 줄임
+        loop_p50, loop_p99 = timed(lambda: legacy_loop(results, names), repeat)
+        vec_p50, vec_p99 = timed(lambda: vectorized(sa, results, names), args.repeat)
+        print({
+            "boxes": n,
+            "loop_p50_ms": loop_p50, "loop_p99_ms": loop_p99,
+            "vectorized_p50_ms": vec_p50, "vectorized_p99_ms": vec_p99,
+            "speedup": round(loop_p50 / vec_p50, 1) if vec_p50 else None,
+        })
+
+
+if __name__ == "__main__":
+    main()
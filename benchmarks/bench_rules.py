@@ -0,0 +1,109 @@
+# benchmarks/bench_rules.py
+"""
+센서 규칙 엔진(rule_engine.py) 평가 비용 측정.
+  - 엔진 단독: config.RULES (규칙 수를 늘리려면 --copies) 로 합성 측정값(1분 간격, 일교차 + 잡음 +
+    가끔 이상치/급수/수위 급감)을 평가해 readings/s, 측정값 하나당 us, 발생한 이벤트 수를 출력
+  - 평가 루프: 규칙은 요청 처리 중이 아니라 RuleEvaluator 가 저장된 행을 읽어 평가하므로,
+    --rows 개 행을 DB 에 넣은 뒤 step() 한 번으로 따라잡는 시간 (DB 조회 + 평가 + 상태 저장, --batch 행씩 조회)
+
+    python benchmarks/bench_rules.py [--readings 100000] [--copies 1 10] [--rows 20000] [--batch 1000]
+
+임시 디렉터리에 DB 를 만들어 측정하므로 프로젝트의 database.db 는 건드리지 않습니다.
+"""
+
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+
+from common import ROOT_DIR  # noqa: F401  (sys.path 설정)
+
+
+def synthetic_readings(n, seed=0):
+    rng = random.Random(seed)
+    t0 = time.time() - n * 60
+    soil, water = 60.0, 80.0
+    readings = []
+    for i in range(n):
+        day = math.sin(2 * math.pi * (i % 1440) / 1440)
+        soil = 70.0 if soil < 20 else soil - rng.random() * 0.05
+        water = 90.0 if water < 10 else water - rng.random() * 0.02
+        temp = 24 + 8 * day + rng.gauss(0, 0.3)
+        if rng.random() < 0.001:
+            temp += rng.choice((-1, 1)) * 6
+        if rng.random() < 0.0005:
+            water -= 8
+        readings.append(({
+            "soil_moisture": round(soil, 2), "air_temperature": round(temp, 2),
+            "air_humidity": round(60 - 10 * day + rng.gauss(0, 1), 2),
+            "light_intensity": max(0.0, round(800 * day, 1)), "water_level": round(water, 2),
+        }, t0 + i * 60))
+    return readings
+
+
+def bench_engine(specs, readings):
+    from rule_engine import RuleEngine, rules_from_config
+
+    events = []
+    engine = RuleEngine(rules_from_config(specs), emit=events.append)
+    t0 = time.perf_counter()
+    for reading, ts in readings:
+        engine.evaluate(reading, ts)
+    elapsed = time.perf_counter() - t0
+    return {
+        "rules": len(engine.rules), "readings": len(readings),
+        "readings_per_s": round(len(readings) / elapsed), "us_per_reading": round(elapsed / len(readings) * 1e6, 2),
+        "events": len(events),
+    }
+
+
+def bench_evaluator(specs, readings, batch):
+    from database import db_manager
+    from rule_engine import RuleEngine, RuleEvaluator, rules_from_config
+
+    rows = [db_manager.normalize_sensor_reading(reading) for reading, _ in readings]
+    for start in range(0, len(rows), 1000):
+        db_manager.save_sensor_data_batch(rows[start:start + 1000])
+    events = []
+    evaluator = RuleEvaluator(RuleEngine(rules_from_config(specs), emit=events.append), batch=batch)
+    evaluator.cursor = 0
+    t0 = time.perf_counter()
+    evaluated = evaluator.step()
+    elapsed = time.perf_counter() - t0
+    return {
+        "evaluator_rows": evaluated, "batch": batch, "rows_per_s": round(evaluated / elapsed),
+        "us_per_row": round(elapsed / evaluated * 1e6, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readings", type=int, default=100_000)
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 10], help="config.RULES 를 몇 벌 복제해 평가할지")
+    parser.add_argument("--rows", type=int, default=20_000, help="평가 루프 측정에 쓸 DB 행 수")
+    parser.add_argument("--batch", type=int, default=1000, help="평가 루프가 한 번에 읽는 행 수")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.WARNING)
+
+    from database import db_manager
+
+    tmp = tempfile.TemporaryDirectory()
+    db_manager.set_db_path(os.path.join(tmp.name, "bench.db"))
+    db_manager.ensure_schema()
+
+    import config
+    readings = synthetic_readings(args.readings)
+    for copies in args.copies:
+        specs = {f"{name}#{k}": spec for k in range(copies) for name, spec in config.RULES.items()}
+        print(bench_engine(specs, readings))
+    print(bench_evaluator(config.RULES, readings[:args.rows], args.batch))
+
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
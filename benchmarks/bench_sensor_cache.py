@@ -0,0 +1,127 @@
+# benchmarks/bench_sensor_cache.py
+"""
+센서 메모리 캐시(SENSOR_CACHE_SIZE) 사용 전/후 비교.
+  - db_manager 함수 호출당 지연(us)
+  - /api/latest_data, 짧은 구간 /api/sensor_data 처리량(req/s): Flask 테스트 클라이언트를 여러 스레드에서
+    동시에 호출 (HTTP 서버 비용 제외, 앱+DB 경로만 측정)
+
+    python benchmarks/bench_sensor_cache.py [--rows 100000] [--requests 5000] [--threads 8]
+
+임시 디렉터리에 DB 를 만들어 측정하므로 프로젝트의 database.db 는 건드리지 않습니다.
+"""
+
+import argparse
+import os
+import tempfile
+import threading
+import time
+
+from common import ROOT_DIR  # noqa: F401  (sys.path 설정)
+
+def window_from(rows, hours=1):
+    """fill 로 만든 데이터의 마지막 hours 시간 구간 시작 시각."""
+    from datetime import datetime, timedelta
+
+    return datetime(2024, 1, 1) + timedelta(seconds=5 * (rows - 1)) - timedelta(hours=hours)
+
+
+def endpoints(rows):
+    """최신 값, 첫 페이지, 마지막 1시간 구간(720 행)."""
+    return ("/api/latest_data", "/api/sensor_data?limit=100",
+            f"/api/sensor_data?from={window_from(rows).isoformat()}&limit=1000")
+
+
+def calls(db_manager, rows):
+    """HTTP 없이 db_manager 함수만 호출하는 경우."""
+    since = window_from(rows).strftime("%Y-%m-%d %H:%M:%S")
+    return {
+        "get_latest_sensor_data()": db_manager.get_latest_sensor_data,
+        "iter_sensor_data(limit=100)": lambda: list(db_manager.iter_sensor_data(limit=100)),
+        "iter_sensor_data(from=-1h)": lambda: list(db_manager.iter_sensor_data(from_ts=since)),
+    }
+
+
+def per_call_us(fn, n=2000):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(n):
+        fn()
+    return round((time.perf_counter() - t0) / n * 1e6, 1)
+
+
+def fill(dbcore, rows):
+    """5초 간격 측정값을 rows 개 생성 (재귀 CTE 로 SQLite 내부에서 생성)."""
+    with dbcore.pooled_connection() as conn:
+        conn.execute(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < ?)
+            INSERT INTO sensor_data
+            (timestamp, soil_moisture, air_temperature, air_humidity, light_intensity, water_level)
+            SELECT datetime('2024-01-01', '+' || (n * 5) || ' seconds'),
+                   40 + (n % 20), 20 + (n % 10) * 0.5, 60 + (n % 30), n % 1000, 50
+            FROM seq
+            """,
+            (rows,),
+        )
+        conn.commit()
+
+
+def rps(client, url, total, threads):
+    per_thread = max(1, total // threads)
+    errors = []
+
+    def worker():
+        for _ in range(per_thread):
+            if client.get(url).status_code != 200:
+                errors.append(url)
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    elapsed = time.perf_counter() - t0
+    assert not errors, f"{len(errors)} failed requests"
+    return round(per_thread * threads / elapsed, 1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    import config
+    tmp = tempfile.TemporaryDirectory()
+    config.DB_PATH = os.path.join(tmp.name, "bench.db")
+    config.AI_WARMUP_ON_START = False
+    cache_size = config.SENSOR_CACHE_SIZE or 4096
+
+    from database import db_manager
+    from database import init as dbcore
+    dbcore.set_db_path(config.DB_PATH)
+    dbcore.init_db()
+    fill(dbcore, args.rows)
+
+    import app as server
+    client = server.app.test_client()
+    for size, label in ((0, "db"), (cache_size, "cache")):
+        config.SENSOR_CACHE_SIZE = size
+        db_manager.reload_sensor_cache()
+        for name, fn in calls(db_manager, args.rows).items():
+            print({"mode": label, "call": name, "rows": args.rows, "us_per_call": per_call_us(fn)})
+        for url in endpoints(args.rows):
+            client.get(url)  # 워밍업
+            print({"mode": label, "endpoint": url, "rows": args.rows,
+                   "req_per_sec": rps(client, url, args.requests, args.threads)})
+    dbcore.close_pool()
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
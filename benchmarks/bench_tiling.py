@@ -0,0 +1,115 @@
+# benchmarks/bench_tiling.py
+"""
+고해상도 이미지에서 통째 추론(640px 축소)과 타일 추론의 정확도/시간을 비교합니다.
+--images 폴더에 같은 이름의 YOLO 라벨(.txt: cls cx cy w h, 0~1 정규화)이 있으면 flower 모델의
+재현율/정밀도(IoU 0.5)를 함께 계산하고, 없으면 개수와 시간만 출력합니다.
+폴더를 주지 않으면 5MP(2592x1944) 합성 이미지로 시간만 측정합니다.
+
+    python benchmarks/bench_tiling.py [--images DIR] [--tiles 640 960] [--overlaps 0.1 0.2] [--batch 8]
+"""
+
+import argparse
+import glob
+import os
+import time
+
+from common import ensure_models
+
+
+def load_labels(image_path, width, height):
+    """YOLO 라벨 -> (N, 5) [cls, x1, y1, x2, y2] 픽셀 좌표. 라벨 파일이 없으면 None."""
+    import numpy as np
+
+    label_path = os.path.splitext(image_path)[0] + ".txt"
+    if not os.path.exists(label_path):
+        return None
+    rows = np.loadtxt(label_path, ndmin=2).reshape(-1, 5)
+    cx, cy, w, h = rows[:, 1] * width, rows[:, 2] * height, rows[:, 3] * width, rows[:, 4] * height
+    return np.stack([rows[:, 0], cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+
+
+def match(det, gt, iou=0.5):
+    """(맞춘 정답 수, 예측 수, 정답 수). 정답 하나에 예측 하나만 짝지웁니다."""
+    import numpy as np
+
+    if gt is None:
+        return None
+    det = np.asarray(det, dtype=float).reshape(-1, 6)
+    used = np.zeros(len(det), dtype=bool)
+    tp = 0
+    for g in gt:
+        if len(det) == 0:
+            break
+        iw = np.clip(np.minimum(g[3], det[:, 4]) - np.maximum(g[1], det[:, 2]), 0, None)
+        ih = np.clip(np.minimum(g[4], det[:, 5]) - np.maximum(g[2], det[:, 3]), 0, None)
+        inter = iw * ih
+        union = (g[3] - g[1]) * (g[4] - g[2]) + (det[:, 4] - det[:, 2]) * (det[:, 5] - det[:, 3]) - inter
+        ious = np.where(used, 0, inter / np.maximum(union, 1e-6))
+        best = int(ious.argmax())
+        if ious[best] >= iou:
+            used[best] = True
+            tp += 1
+    return tp, len(det), len(gt)
+
+
+def run(sa, images, mode):
+    total_ms, count = 0.0, 0
+    tp = n_det = n_gt = 0
+    labelled = False
+    for img, gt in images:
+        t0 = time.perf_counter()
+        if mode == "full":
+            result = sa.analyze_images([img])[0]
+        else:
+            result = sa.analyze_tiled(img, models=("flower",))
+        total_ms += (time.perf_counter() - t0) * 1000
+        count += result["flower_count"]
+        m = match(result["detections"]["flower"], gt)
+        if m is not None:
+            labelled = True
+            tp, n_det, n_gt = tp + m[0], n_det + m[1], n_gt + m[2]
+    row = {"ms_per_image": round(total_ms / len(images), 1), "flowers": count}
+    if labelled:
+        row["recall"] = round(tp / max(1, n_gt), 3)
+        row["precision"] = round(tp / max(1, n_det), 3)
+    return row
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--images", help="이미지(+YOLO 라벨) 폴더")
+    parser.add_argument("--tiles", type=int, nargs="+", default=[640, 960])
+    parser.add_argument("--overlaps", type=float, nargs="+", default=[0.1, 0.2])
+    parser.add_argument("--batch", type=int, default=8, help="forward 한 번에 넣는 타일 수")
+    args = parser.parse_args()
+
+    import logging
+    logging.disable(logging.INFO)
+
+    import cv2
+    import numpy as np
+    from ai_module import strawberry_analyzer as sa
+
+    ensure_models(sa)
+    images = []
+    if args.images:
+        for path in sorted(glob.glob(os.path.join(args.images, "*.jpg")) + glob.glob(os.path.join(args.images, "*.png"))):
+            img = cv2.imread(path)
+            images.append((img, load_labels(path, img.shape[1], img.shape[0])))
+    if not images:
+        print("! 이미지 폴더 없음 -> 5MP 합성 이미지 (정확도 없이 시간만)")
+        rng = np.random.default_rng(0)
+        images = [((rng.random((1944, 2592, 3)) * 255).astype(np.uint8), None) for _ in range(2)]
+
+    sa.analyze_images([images[0][0]])  # 워밍업
+    print({"mode": "full", "imgsz": sa.AI_IMGSZ, **run(sa, images, "full")})
+    sa.AI_TILE_BATCH = args.batch
+    for tile in args.tiles:
+        for overlap in args.overlaps:
+            sa.AI_TILE_SIZE, sa.AI_TILE_OVERLAP = tile, overlap
+            tiles = len(sa.tile_windows(*images[0][0].shape[:2], tile=tile, overlap=overlap))
+            print({"mode": "tiled", "tile": tile, "overlap": overlap, "tiles": tiles, **run(sa, images, "tiled")})
+
+
+if __name__ == "__main__":
+    main()
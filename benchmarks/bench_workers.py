@@ -0,0 +1,152 @@
+# benchmarks/bench_workers.py
+"""
+serve.py 워커 수에 따른 읽기 API 처리량과 메모리 측정.
+워커 수(--workers)마다 합성 DB(synth_db.py) 로 서버를 띄우고, 클라이언트 프로세스 여러 개(--clients)가
+--seconds 동안 닫힌 루프로 --paths 를 호출합니다. 클라이언트 자체가 GIL 에 묶이지 않도록 프로세스로 나눕니다.
+
+  rps / p50 / p95 : 처리량(req/s)과 지연(ms), speedup 은 워커 1개 대비
+  pss_mb          : 마스터 + 워커 프로세스의 PSS 합 (공유 페이지는 나눠서 셈. 모델 copy-on-write 공유 효과 확인용)
+
+    python benchmarks/bench_workers.py [--workers 1 2 4] [--clients 8] [--seconds 10] [--no-preload]
+
+ai_module/weights/*.pt 가 없으면 같은 구조(yolov8n.yaml)의 임의 가중치를 로드합니다.
+처리량은 CPU 코어 수까지만 늘어나므로 코어가 워커 수보다 적은 환경에서는 비례하지 않습니다.
+"""
+
+import argparse
+import json
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from common import ROOT_DIR, percentile
+
+
+def _serve(db_path, argv):
+    """--serve 모드: 임시 DB 로 serve.main 실행 (이 프로세스가 마스터)."""
+    import config
+    config.DB_PATH = db_path
+    config.SCHEDULER_ENABLED = False
+
+    from ai_module import strawberry_analyzer as sa
+    if not all(os.path.exists(p) for p in (sa.RIPE_MODEL_PATH, sa.FLOWER_MODEL_PATH)):
+        from ultralytics import YOLO
+        for name in ("ripe", "flower"):
+            sa.registry.register(name, lambda: YOLO("yolov8n.yaml"), sa._warm_yolo)
+
+    import serve
+    sys.argv = ["serve.py", *argv]
+    return serve.main()
+
+
+def _client(base, paths, seconds):
+    import requests
+
+    session = requests.Session()
+    samples, errors = [], 0
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        t0 = time.perf_counter()
+        try:
+            ok = session.get(base + paths[i % len(paths)], timeout=10).status_code < 500
+        except Exception:
+            ok = False
+        samples.append((time.perf_counter() - t0) * 1000)
+        errors += not ok
+        i += 1
+    return samples, errors
+
+
+def _pss_mb(pid):
+    import psutil
+
+    procs = [psutil.Process(pid)]
+    procs += procs[0].children(recursive=True)
+    total = 0
+    for p in procs:
+        try:
+            total += p.memory_full_info().pss
+        except (psutil.Error, AttributeError):  # PSS 는 Linux 만
+            return None
+    return round(total / 2**20, 1)
+
+
+def _wait_ready(base, proc, timeout=180):
+    import requests
+
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            # 503(모델 준비 전/실패)도 응답은 한 것이므로 준비된 것으로 봄
+            requests.get(base + "/healthz", timeout=1)
+            return
+        except Exception:
+            time.sleep(0.5)
+    raise RuntimeError("server did not start")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--clients", type=int, default=max(4, 2 * (os.cpu_count() or 1)))
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--paths", nargs="+", default=["/api/latest_data", "/api/sensor_data?limit=50"])
+    parser.add_argument("--days", type=float, default=30, help="합성 DB 기간(일)")
+    parser.add_argument("--port", type=int, default=18080)
+    parser.add_argument("--no-preload", dest="preload", action="store_false")
+    parser.add_argument("--serve", help=argparse.SUPPRESS)
+    args, rest = parser.parse_known_args()
+
+    if args.serve:
+        sys.exit(_serve(args.serve, rest))
+
+    from synth_db import build
+
+    tmp = tempfile.TemporaryDirectory()
+    pristine = os.path.join(tmp.name, "pristine.db")
+    print(f"# 합성 DB: {build(pristine, args.days)}", file=sys.stderr)
+    base = f"http://127.0.0.1:{args.port}"
+    baseline = None
+    for workers in args.workers:
+        db = os.path.join(tmp.name, f"w{workers}.db")
+        with open(pristine, "rb") as src, open(db, "wb") as dst:
+            dst.write(src.read())
+        cmd = [sys.executable, os.path.abspath(__file__), "--serve", db, "--workers", str(workers),
+               "--threads", str(args.threads), "--bind", f"127.0.0.1:{args.port}"]
+        if not args.preload:
+            cmd.append("--no-preload")
+        proc = subprocess.Popen(cmd, cwd=ROOT_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            _wait_ready(base, proc)
+            with ProcessPoolExecutor(args.clients) as pool:
+                _client(base, args.paths, 0.5)  # 워밍업
+                t0 = time.perf_counter()
+                futures = [pool.submit(_client, base, args.paths, args.seconds) for _ in range(args.clients)]
+                results = [f.result() for f in futures]
+                wall = time.perf_counter() - t0
+            samples = sorted(s for r in results for s in r[0])
+            rps = len(samples) / wall
+            baseline = baseline or rps
+            print(json.dumps({
+                "workers": workers, "threads": args.threads, "clients": args.clients, "preload": args.preload,
+                "requests": len(samples), "errors": sum(r[1] for r in results),
+                "rps": round(rps, 1), "speedup": round(rps / baseline, 2),
+                "p50_ms": round(percentile(samples, 50), 2), "p95_ms": round(percentile(samples, 95), 2),
+                "pss_mb": _pss_mb(proc.pid),
+            }))
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait(timeout=60)
+    tmp.cleanup()
+
+
+if __name__ == "__main__":
+    main()
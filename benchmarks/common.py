@@ -0,0 +1,49 @@
+# benchmarks/common.py
+"""벤치마크 스크립트 공용 도우미."""
+
+import os
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+def percentile(sorted_samples, q):
+    """정렬된 샘플의 q(0~100) 백분위수 (nearest-rank)."""
+    if not sorted_samples:
+        return None
+    k = max(0, min(len(sorted_samples) - 1, int(round(q / 100.0 * len(sorted_samples))) - 1))
+    return sorted_samples[k]
+
+
+def synthetic_jpeg(width=1280, height=960, seed=0):
+    """카메라 해상도와 비슷한 합성 JPEG 바이트."""
+    import cv2
+    import numpy as np
+
+    img = (np.random.default_rng(seed).random((height, width, 3)) * 255).astype(np.uint8)
+    ok, buf = cv2.imencode(".jpg", img)
+    return buf.tobytes()
+
+
+def ensure_models(sa):
+    """ai_module/weights/*.pt 가 없으면 같은 구조(yolov8n.yaml)의 임의 가중치로 대신합니다."""
+    from ultralytics import YOLO
+
+    for name in ("ripe", "flower"):
+        if sa.registry.get(name) is None:
+            print(f"! {name}.pt 없음 -> yolov8n.yaml 임의 가중치 사용")
+            sa.registry.set(name, YOLO("yolov8n.yaml"))
+
+
+def peak_rss_mb():
+    """이 프로세스의 최대 RSS(MB). 측정 항목마다 별도 프로세스에서 불러야 의미가 있습니다."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        import psutil
+
+        return round(psutil.Process().memory_info().peak_wset / 2**20, 1)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (2**20 if sys.platform == "darwin" else 2**10), 1)  # macOS 는 바이트, Linux 는 KiB
@@ -0,0 +1,107 @@
+# benchmarks/fake_esp32.py
+"""
+오프라인 부하 테스트용 가짜 ESP32 카메라 서버.
+노드 N 대를 한 프로세스에서 흉내 냅니다: GET /cam/<i>/capture -> 합성 JPEG (GET /capture 는 0번 노드)
+응답 지연과 실패율을 지정할 수 있고, HTTP/1.1 keep-alive 를 지원합니다.
+
+    python benchmarks/fake_esp32.py --port 8081 --nodes 8 --width 2592 --height 1944 --latency-ms 200 --fail-rate 0.05
+
+config.CAMERA_NODES 예: [{'name': f'cam-{i}', 'url': f'http://127.0.0.1:8081/cam/{i}'} for i in range(8)]
+"""
+
+import argparse
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from common import synthetic_jpeg
+
+_PATH = re.compile(r"^(?:/cam/(\d+))?/capture$")
+
+
+class FakeESP32Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, addr, nodes=1, width=1280, height=960, latency_ms=0.0, fail_rate=0.0, frames=4):
+        super().__init__(addr, _Handler)
+        self.nodes = nodes
+        self.latency = latency_ms / 1000.0
+        self.fail_rate = fail_rate
+        # 노드마다 미리 만든 프레임 몇 장을 돌려가며 응답 (JPEG 인코딩 비용을 측정에서 제외)
+        self.frames = [[synthetic_jpeg(width, height, seed=n * 100 + k) for k in range(frames)] for n in range(nodes)]
+        self.served = 0
+        self.failed = 0
+        self._lock = threading.Lock()
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def node_urls(self):
+        return [f"{self.url}/cam/{i}" for i in range(self.nodes)]
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _send(self, code, body, content_type):
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        server = self.server
+        m = _PATH.match(self.path.split("?", 1)[0])
+        node = int(m.group(1) or 0) if m else None
+        if node is None or node >= server.nodes:
+            self._send(404, b"not found", "text/plain")
+            return
+        if server.latency:
+            time.sleep(server.latency * random.uniform(0.5, 1.5))  # 센서 노출/전송 시간 흉내
+        if random.random() < server.fail_rate:
+            with server._lock:
+                server.failed += 1
+            self._send(503, b"camera busy", "text/plain")
+            return
+        with server._lock:
+            server.served += 1
+            frame = server.frames[node][server.served % len(server.frames[node])]
+        self._send(200, frame, "image/jpeg")
+
+
+def start(port=0, **kwargs):
+    """백그라운드 스레드에서 서버를 띄우고 반환합니다. (port=0 이면 빈 포트)"""
+    server = FakeESP32Server(("127.0.0.1", port), **kwargs)
+    threading.Thread(target=server.serve_forever, name="fake-esp32", daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8081)
+    parser.add_argument("--nodes", type=int, default=4)
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=960)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = FakeESP32Server(("0.0.0.0", args.port), nodes=args.nodes, width=args.width, height=args.height,
+                             latency_ms=args.latency_ms, fail_rate=args.fail_rate)
+    print(f"fake ESP32 x{args.nodes}: http://127.0.0.1:{args.port}/cam/<0..{args.nodes - 1}>/capture")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,299 @@
+# benchmarks/run_suite.py
+"""
+수집/대시보드/AI 분석 경로의 재현 가능한 성능 측정 모음. 결과는 JSON 으로 저장하고 기준값과 비교합니다.
+
+  http      : 합성 DB(synth_db.py, --days 별) 위에서 /sensor, /api/latest_data, /, /analysis 를
+              Flask 테스트 클라이언트와 실제 WSGI 서버(werkzeug, 스레드)로 --concurrency 개 스레드가 닫힌 루프로 호출
+  inference : analyze_ripeness / analyze_flowers 지연
+              stub = 같은 구조(yolov8n.yaml)의 임의 가중치, real = ai_module/weights/*.pt (없으면 건너뜀)
+
+항목마다 처리량(req/s), p50/p95/p99 지연(ms), 최대 RSS(MB)를 기록합니다.
+최대 RSS 를 항목별로 재기 위해 DB 크기별/가중치별로 별도 프로세스에서 측정합니다.
+/sensor 가 DB 에 쓰므로 매번 원본 합성 DB 의 복사본에서 측정합니다.
+
+    python benchmarks/run_suite.py --days 30 730 --out bench.json
+    python benchmarks/run_suite.py --days 30 --baseline bench.json --tolerance 0.15   # 회귀 시 종료 코드 1
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+from common import ROOT_DIR, peak_rss_mb, percentile, synthetic_jpeg
+
+HTTP_SCENARIOS = {
+    "ingest": ("POST", "/sensor"),
+    "latest": ("GET", "/api/latest_data"),
+    "dashboard": ("GET", "/"),
+    "analysis": ("GET", "/analysis"),
+}
+READING = {"soil_moisture": 41.5, "air_temperature": 22.1, "air_humidity": 63.0,
+           "light_intensity": 540.0, "water_level": 70.0}
+
+
+def _summary(samples_ms, wall_s, errors=0):
+    samples_ms = sorted(samples_ms)
+    return {
+        "count": len(samples_ms),
+        "errors": errors,
+        "throughput_rps": round(len(samples_ms) / wall_s, 1) if wall_s else None,
+        "p50_ms": round(percentile(samples_ms, 50), 3),
+        "p95_ms": round(percentile(samples_ms, 95), 3),
+        "p99_ms": round(percentile(samples_ms, 99), 3),
+    }
+
+
+def closed_loop(make_call, total, concurrency):
+    """스레드 concurrency 개가 각자 call() 을 반복해 total 번 호출. 스레드마다 make_call() 로 클라이언트를 만듦."""
+    per_thread = max(1, total // concurrency)
+    samples, errors = [], [0]
+    lock = threading.Lock()
+
+    def worker():
+        call = make_call()
+        local, failed = [], 0
+        for _ in range(per_thread):
+            t0 = time.perf_counter()
+            ok = call()
+            local.append((time.perf_counter() - t0) * 1000)
+            failed += not ok
+        with lock:
+            samples.extend(local)
+            errors[0] += failed
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return _summary(samples, time.perf_counter() - t0, errors[0])
+
+
+# --- 자식 프로세스: DB 크기 하나에 대한 HTTP 측정 ---
+
+def _http_calls(server, transport):
+    """transport 별로 {시나리오: 스레드당 호출 함수 생성기} 를 만듭니다."""
+    if transport == "test_client":
+        client = server.app.test_client()
+
+        def make(method, path):
+            if method == "POST":
+                return lambda: lambda: client.post(path, json=READING).status_code < 400
+            return lambda: lambda: client.get(path).status_code < 400
+        return {name: make(*spec) for name, spec in HTTP_SCENARIOS.items()}, None
+
+    import requests
+    from werkzeug.serving import make_server
+
+    httpd = make_server("127.0.0.1", 0, server.app, threaded=True)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{httpd.server_port}"
+
+    def make(method, path):
+        def per_thread():
+            session = requests.Session()  # 스레드마다 keep-alive 연결 하나
+            if method == "POST":
+                return lambda: session.post(base + path, json=READING).status_code < 400
+            return lambda: session.get(base + path).status_code < 400
+        return per_thread
+    return {name: make(*spec) for name, spec in HTTP_SCENARIOS.items()}, httpd
+
+
+def run_http(db_path, transports, scenarios, requests_n, concurrency, warmup):
+    import logging
+    logging.disable(logging.WARNING)
+
+    import config
+    config.DB_PATH = db_path
+    config.AI_WARMUP_ON_START = False
+    config.SCHEDULER_ENABLED = False
+    import app as server
+
+    rows = server.db_manager.get_latest_sensor_data()["id"]
+    results = []
+    for transport in transports:
+        calls, httpd = _http_calls(server, transport)
+        for name in scenarios:
+            make_call = calls[name]
+            call = make_call()
+            for _ in range(warmup):
+                call()
+            stats = closed_loop(make_call, requests_n, concurrency)
+            results.append({"kind": "http", "transport": transport, "scenario": name, "sensor_rows": rows,
+                            "concurrency": concurrency, **stats})
+        if httpd is not None:
+            httpd.shutdown()
+    server.sensor_writer.stop()
+    server.inference_jobs.stop()
+    for r in results:
+        r["peak_rss_mb"] = peak_rss_mb()  # 프로세스 전체 최대값 (DB 크기별 비교용)
+    return results
+
+
+# --- 자식 프로세스: 가중치 종류 하나에 대한 추론 측정 ---
+
+def run_inference(weights, runs, warmup):
+    import logging
+    logging.disable(logging.WARNING)
+
+    from ai_module import strawberry_analyzer as sa
+
+    if weights == "stub":
+        from ultralytics import YOLO
+        for name in ("ripe", "flower"):
+            sa.registry.set(name, YOLO("yolov8n.yaml"))
+    elif sa.get_ripe_model() is None or sa.get_flower_model() is None:
+        return [{"kind": "inference", "weights": weights, "skipped": "ai_module/weights 가중치 없음"}]
+
+    data = synthetic_jpeg()
+    results = []
+    for fn in (sa.analyze_ripeness, sa.analyze_flowers):
+        for _ in range(warmup):
+            fn(data)
+        samples = []
+        t0 = time.perf_counter()
+        for _ in range(runs):
+            t = time.perf_counter()
+            fn(data)
+            samples.append((time.perf_counter() - t) * 1000)
+        results.append({"kind": "inference", "weights": weights, "function": fn.__name__,
+                        **_summary(samples, time.perf_counter() - t0), "peak_rss_mb": peak_rss_mb()})
+    return results
+
+
+# --- 부모 프로세스: DB 준비, 자식 실행, 결과 저장/비교 ---
+
+def _child(args_list):
+    out = subprocess.run([sys.executable, os.path.abspath(__file__), *args_list],
+                         capture_output=True, text=True, cwd=ROOT_DIR)
+    lines = [l for l in out.stdout.splitlines() if l.startswith("[")]
+    if out.returncode != 0 or not lines:
+        raise RuntimeError(f"benchmark child failed: {' '.join(args_list)}\n{out.stderr[-3000:]}")
+    return json.loads(lines[-1])
+
+
+def _result_key(r):
+    if r["kind"] == "http":
+        return ("http", r["days"], r["transport"], r["scenario"])
+    return ("inference", r["weights"], r.get("function"))
+
+
+def compare(results, baseline, tolerance):
+    """p95 가 tolerance 비율보다 늘었거나 처리량이 그만큼 줄어든 항목 목록."""
+    base = {_result_key(r): r for r in baseline.get("results", []) if "p95_ms" in r}
+    regressions = []
+    for r in results:
+        b = base.get(_result_key(r))
+        if b is None or "p95_ms" not in r:
+            continue
+        p95 = r["p95_ms"] / b["p95_ms"] - 1 if b["p95_ms"] else 0.0
+        rps = 1 - r["throughput_rps"] / b["throughput_rps"] if b["throughput_rps"] else 0.0
+        r["vs_baseline"] = {"p95_change": round(p95, 3), "throughput_change": round(-rps, 3)}
+        if p95 > tolerance or rps > tolerance:
+            regressions.append(r)
+    return regressions
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=ROOT_DIR, timeout=10).stdout.strip() or None
+    except Exception:
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--days", type=float, nargs="+", default=[30, 730], help="합성 DB 기간(일). 30=1개월, 730=2년")
+    parser.add_argument("--interval", type=int, default=60, help="합성 센서 측정 간격(초)")
+    parser.add_argument("--transports", nargs="+", default=["test_client", "wsgi"], choices=["test_client", "wsgi"])
+    parser.add_argument("--scenarios", nargs="+", default=list(HTTP_SCENARIOS), choices=list(HTTP_SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000, help="시나리오당 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--weights", nargs="*", default=["stub", "real"], choices=["stub", "real"])
+    parser.add_argument("--runs", type=int, default=20, help="추론 함수당 측정 횟수")
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--data-dir", help="합성 DB 보관 위치 (같은 인자면 재사용, 기본: 임시 디렉터리)")
+    parser.add_argument("--out", help="결과 JSON 경로 (기본: 표준 출력)")
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="회귀로 볼 변화 비율 (p95 증가 / 처리량 감소)")
+    parser.add_argument("--single-http", help=argparse.SUPPRESS)
+    parser.add_argument("--single-inference", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single_http:
+        print(json.dumps(run_http(args.single_http, args.transports, args.scenarios, args.requests,
+                                  args.concurrency, args.warmup)))
+        return
+    if args.single_inference:
+        print(json.dumps(run_inference(args.single_inference, args.runs, args.warmup)))
+        return
+
+    from synth_db import build
+
+    tmp = None
+    data_dir = args.data_dir
+    if not data_dir:
+        tmp = tempfile.TemporaryDirectory()
+        data_dir = tmp.name
+    os.makedirs(data_dir, exist_ok=True)
+
+    results = []
+    common_args = ["--transports", *args.transports, "--scenarios", *args.scenarios,
+                   "--requests", str(args.requests), "--concurrency", str(args.concurrency),
+                   "--warmup", str(args.warmup), "--runs", str(args.runs)]
+    for days in args.days:
+        pristine = os.path.join(data_dir, f"synthetic-{days:g}d-{args.interval}s.db")
+        if not os.path.exists(pristine):
+            info = build(pristine, days, args.interval)
+            print(f"# 합성 DB {pristine}: {info}", file=sys.stderr)
+        work = os.path.join(data_dir, "work.db")
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(work + suffix):
+                os.remove(work + suffix)
+        shutil.copyfile(pristine, work)
+        for r in _child(["--single-http", work, *common_args]):
+            results.append({"days": days, **r})
+            print(f"# {json.dumps(results[-1], ensure_ascii=False)}", file=sys.stderr)
+    for weights in args.weights:
+        for r in _child(["--single-inference", weights, *common_args]):
+            results.append(r)
+            print(f"# {json.dumps(r, ensure_ascii=False)}", file=sys.stderr)
+
+    report = {
+        "meta": {"created_at": time.strftime("%Y-%m-%dT%H:%M:%S"), "git": _git_revision(),
+                 "python": platform.python_version(), "platform": platform.platform(),
+                 "cpus": os.cpu_count(), "args": {k: v for k, v in vars(args).items() if not k.startswith("single")}},
+        "results": results,
+    }
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        report["regressions"] = [_result_key(r) for r in regressions]
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"# 결과 저장: {args.out}", file=sys.stderr)
+    else:
+        print(text)
+    if tmp is not None:
+        tmp.cleanup()
+    if regressions:
+        for r in regressions:
+            print(f"! 회귀: {_result_key(r)} {r['vs_baseline']}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+# benchmarks/synth_db.py
+"""
+벤치마크용 합성 database.db 생성기.
+--days 일 동안 --interval 초 간격의 센서 측정값과, 하루 --images-per-day 장의 촬영/AI 분석 기록을 만듭니다.
+스키마는 앱과 같은 경로(dbcore.init_db: 마이그레이션, 롤업 트리거 포함)로 만들고,
+값은 재귀 CTE 로 SQLite 안에서 생성하므로 2년치(60초 간격 약 105만 행)도 수십 초면 끝납니다.
+같은 인자로 만든 DB 는 같은 내용이라 측정 결과를 기준값(baseline)과 비교할 수 있습니다.
+
+    python benchmarks/synth_db.py /tmp/bench-30d.db --days 30
+    python benchmarks/synth_db.py /tmp/bench-2y.db --days 730 --interval 60 --images-per-day 2
+"""
+
+import argparse
+import os
+import time
+
+from common import ROOT_DIR  # noqa: F401  (sys.path 설정)
+
+# 마지막 측정 시각 (결과가 실행 날짜에 따라 달라지지 않도록 고정)
+END_TS = "2025-01-01 00:00:00"
+
+
+def build(path, days=30, interval=60, images_per_day=2, end_ts=END_TS):
+    """path 에 새 DB 를 만들고 {'sensor_rows', 'images', 'seconds'} 를 반환합니다. (기존 파일은 덮어씀)"""
+    from database import init as dbcore
+
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    dbcore.set_db_path(path)
+    dbcore.init_db()
+
+    rows = int(days * 86400 // interval)
+    images = int(days * images_per_day)
+    t0 = time.perf_counter()
+    with dbcore.pooled_connection() as conn:
+        # 하루 주기(기온/조도)와 느린 흐름(토양 수분)을 가진 값. 롤업 트리거도 실제 수집과 똑같이 실행됨
+        conn.execute(
+            """
+            WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < :rows)
+            INSERT INTO sensor_data
+            (timestamp, soil_moisture, air_temperature, air_humidity, light_intensity, water_level)
+            SELECT datetime(:end, '-' || ((:rows - 1 - n) * :interval) || ' seconds'),
+                   35 + ((n * 7) % 300) / 10.0,
+                   18 + ((n * :interval / 3600) % 24) * 0.5,
+                   55 + (n % 40),
+                   CASE WHEN (n * :interval / 3600) % 24 BETWEEN 6 AND 18 THEN 200 + (n % 800) ELSE 0 END,
+                   20 + (n % 70)
+            FROM seq
+            """,
+            {"rows": rows, "end": end_ts, "interval": interval},
+        )
+        if images:
+            step = max(1, 86400 // max(1, images_per_day))
+            conn.execute(
+                """
+                WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < :images)
+                INSERT INTO image_capture (timestamp, file_path)
+                SELECT datetime(:end, '-' || ((:images - 1 - n) * :step) || ' seconds'),
+                       printf('sha256:%064x', n)
+                FROM seq
+                """,
+                {"images": images, "end": end_ts, "step": step},
+            )
+            conn.execute(
+                """
+                INSERT INTO ai_result (image_id, ripeness_score, flower_count, ripeness_text, flower_text, created_at)
+                SELECT id, 0.5 + (id % 50) / 100.0, id % 12,
+                       CASE id % 3 WHEN 0 THEN 'ripe' WHEN 1 THEN 'unripe' ELSE 'semi-ripe' END,
+                       (id % 12) || '개의 꽃 감지', timestamp
+                FROM image_capture
+                """
+            )
+        conn.commit()
+    dbcore.close_pool()
+    return {"sensor_rows": rows, "images": images, "seconds": round(time.perf_counter() - t0, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("path")
+    parser.add_argument("--days", type=float, default=30)
+    parser.add_argument("--interval", type=int, default=60, help="센서 측정 간격(초)")
+    parser.add_argument("--images-per-day", type=int, default=2)
+    args = parser.parse_args()
+    print(build(args.path, args.days, args.interval, args.images_per_day))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# camera_orchestrator.py
+"""
+여러 ESP32 카메라 노드에 동시에 촬영을 요청하고, 받은 JPEG 를 분석 경로로 넘기는 오케스트레이터.
+- 노드 목록은 config.CAMERA_NODES ({'name', 'url'}) 에서 읽습니다.
+- requests.Session 연결 풀(keep-alive)을 노드 간에 공유하고, 스레드 풀 크기(max_concurrency)로
+  동시에 받아 넘기는 이미지 수를 제한해 추론 대기열이 한꺼번에 넘치지 않게 합니다.
+- 노드별 연결/응답 타임아웃, 실패 시 지수 백오프(+지터) 재시도.
+- deliver(node, data) 가 RetryableDelivery 를 던지면 (예: 추론 대기열 가득 참) 같은 이미지를 백오프 후 다시 넘깁니다.
+"""
+
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+
+class CameraNode(NamedTuple):
+    name: str
+    url: str   # 예: 'http://192.168.4.1'
+
+
+class RetryableDelivery(Exception):
+    """지금은 넘길 수 없지만 잠시 후 다시 시도하면 되는 경우 (대기열 가득 참, 429/503 등)."""
+
+
+class CaptureError(Exception):
+    pass
+
+
+def nodes_from_config(specs: Iterable[Dict[str, str]]) -> List[CameraNode]:
+    nodes = [CameraNode(s["name"], s["url"].rstrip("/")) for s in specs]
+    names = [n.name for n in nodes]
+    if len(set(names)) != len(names):
+        raise ValueError(f"duplicate camera node names: {names}")
+    return nodes
+
+
+def http_deliver(callback_url: str, session: Optional[requests.Session] = None, timeout: float = 10.0):
+    """받은 이미지를 /camera/callback 으로 POST 하는 deliver 함수를 만듭니다. (429/503 은 재시도 대상)"""
+    session = session or requests.Session()
+
+    def deliver(node: CameraNode, data: bytes) -> Dict[str, Any]:
+        resp = session.post(callback_url, data=data, timeout=timeout,
+                            headers={"Content-Type": "image/jpeg", "X-Camera-Node": node.name})
+        if resp.status_code in (429, 503):
+            raise RetryableDelivery(f"callback returned {resp.status_code}")
+        resp.raise_for_status()
+        return resp.json()
+
+    return deliver
+
+
+class CaptureOrchestrator:
+    def __init__(
+        self,
+        nodes: Sequence[CameraNode],
+        deliver: Callable[[CameraNode, bytes], Any],
+        max_concurrency: int = 4,
+        connect_timeout: float = 3.0,
+        read_timeout: float = 10.0,
+        retries: int = 2,
+        backoff: float = 0.5,
+        capture_path: str = "/capture",
+    ) -> None:
+        self.nodes = {n.name: n for n in nodes}
+        self.deliver = deliver
+        self.max_concurrency = max(1, int(max_concurrency))
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = max(0, int(retries))
+        self.backoff = max(0.0, float(backoff))
+        self.capture_path = capture_path
+        self.session = requests.Session()
+        # 노드 수만큼 호스트별 풀, 호스트당 동시 연결은 동시 실행 수까지 재사용 (keep-alive)
+        adapter = HTTPAdapter(pool_connections=max(1, len(self.nodes)), pool_maxsize=self.max_concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="capture")
+
+    def _sleep_backoff(self, attempt: int) -> None:
+        # 0.5s, 1s, 2s ... 에 ±25% 지터 (노드들이 같은 순간에 다시 몰리지 않도록)
+        delay = self.backoff * (2 ** (attempt - 1))
+        time.sleep(delay * random.uniform(0.75, 1.25))
+
+    def _fetch(self, node: CameraNode) -> bytes:
+        resp = self.session.get(node.url + self.capture_path, timeout=self.timeout)
+        resp.raise_for_status()
+        if not resp.content:
+            raise CaptureError("empty image")
+        return resp.content
+
+    def capture(self, node: CameraNode) -> Dict[str, Any]:
+        """노드 하나: 촬영 이미지를 받아 deliver 로 넘깁니다. 결과 dict 는 예외 없이 항상 반환합니다."""
+        result: Dict[str, Any] = {"node": node.name, "ok": False, "attempts": 0}
+        t0 = time.perf_counter()
+        data = None
+        for attempt in range(1, self.retries + 2):
+            result["attempts"] = attempt
+            try:
+                if data is None:
+                    data = self._fetch(node)
+                    result["bytes"] = len(data)
+                    result["fetch_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+                result["delivered"] = self.deliver(node, data)
+                result["ok"] = True
+                result.pop("error", None)
+                break
+            except (requests.RequestException, CaptureError, RetryableDelivery) as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                if attempt <= self.retries:
+                    logging.warning(f"[capture] {node.name} 시도 {attempt} 실패, 재시도: {e}")
+                    self._sleep_backoff(attempt)
+            except Exception as e:
+                result["error"] = f"{type(e).__name__}: {e}"
+                break
+        result["total_ms"] = round((time.perf_counter() - t0) * 1000, 1)
+        if not result["ok"]:
+            logging.error(f"[capture] {node.name} 촬영 실패: {result['error']}")
+        return result
+
+    def capture_all(self, names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """모든(또는 지정한) 노드에 동시에 촬영을 요청하고, 노드 순서대로 결과를 반환합니다."""
+        if names is None:
+            targets = list(self.nodes.values())
+        else:
+            names = list(names)  # 생성기도 받을 수 있도록 (아래에서 두 번 순회)
+            unknown = [n for n in names if n not in self.nodes]
+            if unknown:
+                raise ValueError(f"unknown camera nodes: {', '.join(unknown)}")
+            targets = [self.nodes[n] for n in names]
+        results = list(self._pool.map(self.capture, targets))
+        ok = sum(r["ok"] for r in results)
+        logging.info(f"[capture] {ok}/{len(results)} 노드 촬영 완료")
+        return results
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
+        self.session.close()
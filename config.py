@@ -7,15 +7,222 @@ BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # SQLite 데이터베이스 파일 경로 (절대 경로)
 DB_PATH = os.path.join(BASE_DIR, 'database.db')
 
+# --- SQLite 연결 풀 / 튜닝 설정 ---
+
+# 풀에 유지할 최대 유휴 연결 수 (부족하면 임시 연결을 추가로 엽니다)
+DB_POOL_SIZE = 5
+# 잠금 대기 시간(ms), mmap 크기(byte), 페이지 캐시 크기(KiB)
+DB_BUSY_TIMEOUT_MS = 5000
+DB_MMAP_SIZE = 256 * 1024 * 1024
+DB_CACHE_SIZE_KB = 16 * 1024
+
 # 이미지 저장 폴더 경로 (절대 경로)
 # Flask의 static 폴더 안에 uploads 폴더를 만들어 이미지를 저장합니다.
 IMAGE_UPLOAD_FOLDER = os.path.join(BASE_DIR, 'static/uploads')
 
+# 카메라 이미지 보관 여부
+# False: 메모리에서만 분석하고 디스크에 저장하지 않음 (DB 에는 'sha256:<해시>' 만 기록)
+# True : IMAGE_UPLOAD_FOLDER 에 '<sha256>.jpg' 이름(내용 주소)으로 저장
+IMAGE_RETENTION = False
+
 # 웹 서버 포트
 PORT = 8080
 
+# --- 운영 서버(serve.py, gunicorn.conf.py) 설정 ---
+
+SERVER_HOST = '0.0.0.0'
+# 워커 프로세스 수 (0 이면 CPU 코어 수). 프로세스마다 GIL 이 따로라 읽기 API 처리량이 코어 수까지 거의 비례해 늘어남
+SERVER_WORKERS = 0
+# 워커 하나가 동시에 처리하는 요청 수 (/api/stream 처럼 열려 있는 스트림은 세지 않음)
+SERVER_THREADS = 8
+# True : 마스터 프로세스가 AI 모델을 한 번 로드/워밍업한 뒤 워커를 fork (가중치 메모리를 copy-on-write 로 공유)
+# False: 워커마다 따로 로드 (AI_WARMUP_ON_START 에 따라 시작 시 또는 첫 이미지 때)
+SERVER_PRELOAD_MODELS = True
+# 종료 신호 후 워커가 진행 중인 요청과 대기 중인 센서 데이터를 정리하도록 기다리는 최대 시간(초)
+SERVER_GRACEFUL_TIMEOUT = 30
+
 # --- ESP32 통신 및 카메라 설정 ---
 
 # ESP32의 IP 주소 (스마트팜 ESP32의 실제 IP 주소로 변경하세요)
 # 192.168.4.1은 ESP32가 Access Point 모드로 동작할 때 흔히 사용되는 IP입니다.
-ESP32_IP = '192.168.4.1'
\ No newline at end of file
+ESP32_IP = '192.168.4.1'
+
+# --- 카메라 촬영 오케스트레이터 설정 ---
+
+# 촬영을 요청할 카메라 노드 목록 (GET <url><CAMERA_CAPTURE_PATH> 가 JPEG 를 반환)
+CAMERA_NODES = [
+    {'name': 'esp32-cam', 'url': f'http://{ESP32_IP}'},
+]
+CAMERA_CAPTURE_PATH = '/capture'
+# 동시에 촬영/전달하는 노드 수 (추론 대기열 INFERENCE_QUEUE_SIZE 보다 작게)
+CAMERA_MAX_CONCURRENCY = 4
+# 노드별 연결/응답 타임아웃(초), 실패 시 재시도 횟수와 첫 백오프(초, 시도마다 2배)
+CAMERA_CONNECT_TIMEOUT = 3.0
+CAMERA_READ_TIMEOUT = 10.0
+CAMERA_RETRIES = 2
+CAMERA_BACKOFF_SECONDS = 0.5
+
+# --- 센서 일괄 수집(write-behind) 설정 ---
+
+# 백그라운드 writer 가 한 번에 기록하는 최대 행 수 / 최대 대기 시간(초)
+SENSOR_FLUSH_SIZE = 200
+SENSOR_FLUSH_INTERVAL = 1.0
+# 메모리 큐 최대 길이 (가득 차면 /sensor/batch 는 503 을 반환)
+SENSOR_QUEUE_MAXSIZE = 10000
+# /sensor/batch 한 요청에 허용되는 최대 측정값 수
+SENSOR_BATCH_MAX = 1000
+# 일괄 저장이 실패했을 때 같은 배치를 시도하는 최대 횟수와 첫 재시도 대기(초, 매번 2배, 최대 10초)
+# 모두 실패한 배치는 버리고 sensor_write_rows_total{result="dropped"} 로 집계
+SENSOR_FLUSH_MAX_ATTEMPTS = 5
+SENSOR_FLUSH_RETRY_DELAY = 0.5
+
+# --- 센서 이력 페이지네이션 설정 ---
+
+# 대시보드(/) 첫 화면에 표시할 행 수
+DASHBOARD_PAGE_SIZE = 50
+# /api/sensor_data 의 기본/최대 limit
+API_PAGE_LIMIT_DEFAULT = 100
+API_PAGE_LIMIT_MAX = 5000
+
+# --- 센서 롤업(다운샘플링) 조회 설정 ---
+
+# /api/sensor_rollup 자동 해상도 선택 시 구간 안에 최소한 확보할 버킷(점) 수
+ROLLUP_MIN_POINTS = 120
+# from/to 미지정 시 기본 조회 구간(시간)
+ROLLUP_DEFAULT_RANGE_HOURS = 24
+
+# --- 센서 메모리 캐시 설정 ---
+
+# 메모리에 보관하는 최근 센서 행 수 (최신 값, 짧은 구간 조회용 링 버퍼, 0 이면 사용 안 함)
+SENSOR_CACHE_SIZE = 4096
+# 다른 워커 프로세스가 저장한 센서 값/분석 결과를 이 워커의 /api/stream 구독자에게 전달하기 위해 변경을 확인하는 간격(초)
+# (조회 API 는 요청마다 확인하므로 이 값과 무관하게 최신 값을 반환)
+SENSOR_SYNC_INTERVAL = 0.5
+
+# --- 보관 기간 / Parquet 아카이브 설정 ---
+
+# 이 기간(일)이 지난 sensor_data, image_capture, ai_result, ai_detection 행은 Parquet 으로 옮긴 뒤 삭제
+RETENTION_DAYS = 30
+# 아카이브 위치: <ARCHIVE_DIR>/<테이블>/date=YYYY-MM-DD/part-*.parquet
+ARCHIVE_DIR = os.path.join(BASE_DIR, 'archive')
+# 한 번에 읽어 파일로 쓰는 행 수 / 삭제 트랜잭션 하나당 행 수 / incremental vacuum 한 단계의 페이지 수
+ARCHIVE_CHUNK_ROWS = 50000
+ARCHIVE_DELETE_BATCH = 5000
+ARCHIVE_VACUUM_PAGES = 2000
+
+# --- 백그라운드 작업 스케줄러 설정 ---
+
+SCHEDULER_ENABLED = True
+# 실행할 작업이 있는지 확인하는 간격(초) / 단일 실행 임대 유효 시간(초) / 작업별로 보관하는 실행 기록 수
+SCHEDULER_TICK_SECONDS = 1.0
+SCHEDULER_LEASE_SECONDS = 30
+SCHEDULER_RUN_HISTORY = 200
+# 작업별 일정: every('30s', '15m', '12h', '30d') 또는 cron('분 시 일 월 요일', UTC) 중 하나
+# jitter: 예정 시각에 더하는 0~jitter 임의 지연 / catch_up: 서버가 꺼져 있던 동안 놓친 실행을 시작 직후 한 번 실행
+SCHEDULER_JOBS = {
+    # 아카이브는 조금씩 자주 옮기는 편이 한 번에 옮기는 것보다 잠금 시간이 짧음
+    'cleanup': {'cron': '30 3 * * *', 'jitter': '10m', 'catch_up': True},
+    'camera_capture': {'every': '12h', 'jitter': '1m', 'catch_up': False},
+}
+
+# --- 실시간 스트림(/api/stream, SSE) 설정 ---
+
+# 동시 구독자 최대 수 (초과 시 503)
+STREAM_MAX_CLIENTS = 200
+# 구독자별 대기 이벤트 최대 수 (느린 클라이언트는 오래된 이벤트부터 버림)
+STREAM_CLIENT_QUEUE_SIZE = 100
+# 이벤트가 없을 때 연결 유지를 위해 주석(heartbeat)을 보내는 간격(초)
+STREAM_HEARTBEAT_SECONDS = 15
+
+# --- AI 추론 설정 ---
+
+# YOLO 입력 해상도 (letterbox 한 변 길이, 32의 배수)
+AI_IMGSZ = 640
+# 요약(개수, 최고 신뢰도 등)에 포함할 검출 박스의 최소 신뢰도 (ultralytics 기본 0.25)
+AI_CONF_THRESHOLD = 0.25
+
+# --- AI 타일 추론 설정 (고해상도 카메라) ---
+
+# 긴 변이 AI_TILE_MIN_SIDE 이상인 이미지를 겹치는 타일로 나눠 추론 (작은 꽃이 축소로 사라지는 것 방지)
+AI_TILE_ENABLED = False
+AI_TILE_MIN_SIDE = 1600
+# 타일 한 변 길이(32의 배수) / 이웃 타일과 겹치는 비율 (가장 큰 객체보다 넓게)
+AI_TILE_SIZE = 640
+AI_TILE_OVERLAP = 0.2
+# 한 번의 forward 에 묶어 넣는 타일 수 (메모리와 속도의 절충)
+AI_TILE_BATCH = 8
+# 타일 간 중복 제거 기준: 작은 박스 기준 교차 비율이 이 값을 넘으면 같은 객체로 간주
+AI_TILE_NMS_THRESHOLD = 0.6
+
+# --- AI 비동기 작업 큐 설정 ---
+
+# 분석 워커 스레드 수
+INFERENCE_WORKERS = 1
+# 프로세스당 torch intra-op 스레드 수 (프로세스 전역 설정이라 워커 스레드들이 나눠 씀)
+# 멀티 워커 서버(serve.py --workers N)에서는 N x 이 값 ≈ CPU 코어 수
+INFERENCE_TORCH_THREADS = 4
+# 대기열 최대 길이 (가득 차면 /camera/callback 은 429 반환)
+INFERENCE_QUEUE_SIZE = 16
+# /api/jobs/<id> 로 조회할 수 있도록 보관하는 완료 작업 수
+INFERENCE_JOB_HISTORY = 500
+
+# --- AI 마이크로 배칭 설정 ---
+
+# 동시에 들어온 이미지를 최대 AI_BATCH_MAX_SIZE 장 또는 AI_BATCH_MAX_WAIT_MS 까지 모아 한 번에 추론
+# 1 이면 배칭하지 않음. 배칭을 쓰려면 INFERENCE_WORKERS 도 배치 크기 이상으로 늘려야 배치가 채워집니다.
+# (배치가 클수록 처리량은 늘고, 첫 이미지의 대기 지연은 최대 AI_BATCH_MAX_WAIT_MS 만큼 늘어남)
+AI_BATCH_MAX_SIZE = 1
+AI_BATCH_MAX_WAIT_MS = 25
+
+# 서버 시작 시 AI 모델을 백그라운드에서 미리 로드하고 더미 추론으로 워밍업할지 여부
+# (False 면 첫 카메라 이미지가 들어올 때 로드)
+AI_WARMUP_ON_START = True
+
+# 추론 백엔드: 'pytorch' | 'onnx' | 'onnx-int8' | 'openvino'
+# (pytorch 외에는 'python -m ai_module.backends export --backend <이름>' 으로 가중치를 먼저 변환)
+AI_BACKEND = 'pytorch'
+
+# --- AI 결과 캐시 (지각 해시) 설정 ---
+
+AI_CACHE_ENABLED = True
+# dHash(64비트) 해밍 거리가 이 값 이하이면 같은 장면으로 보고 이전 결과를 재사용
+AI_CACHE_MAX_DISTANCE = 4
+# 최대 보관 항목 수 (LRU) / 유효 시간(초) — 12시간 주기 촬영을 넘길 수 있도록 24시간
+AI_CACHE_MAX_ENTRIES = 256
+AI_CACHE_TTL_SECONDS = 24 * 60 * 60
+
+# --- 계측(/metrics) 및 샘플링 프로파일러 설정 ---
+
+# 경로별 지연 히스토그램, DB/AI 단계별 소요 시간, 대기열 길이, 캐시 적중 수를 /metrics 로 노출
+METRICS_ENABLED = True
+# /api/profiler/start 로 켜는 샘플링 프로파일러의 기본 샘플 간격 / 한 번에 실행할 수 있는 최대 시간(초)
+PROFILER_INTERVAL_MS = 10
+PROFILER_MAX_SECONDS = 300
+
+# --- 센서 규칙 엔진 (저장된 센서 값을 규칙으로 평가해 장치 명령/알림 발생) ---
+
+RULES_ENABLED = True
+# 규칙마다 조건 하나: above/below(임계값), zscore(이동 평균/표준편차 기준 |z|, window: 표본 수),
+# rate_above/rate_below(분당 변화량). for: 조건 유지 시간, cooldown: 해제 후 다시 발생하기까지 최소 간격
+# action/clear_action: 발생/해제 때 보낼 장치 명령 (없으면 severity 수준의 알림)
+RULES = {
+    'soil_dry': {'field': 'soil_moisture', 'below': 30, 'for': '10m', 'cooldown': '30m',
+                 'action': {'actuator': 'pump', 'command': 'on', 'seconds': 30}},
+    'too_hot': {'field': 'air_temperature', 'above': 30, 'for': '5m',
+                'action': {'actuator': 'fan', 'command': 'on'},
+                'clear_action': {'actuator': 'fan', 'command': 'off'}},
+    'temperature_anomaly': {'field': 'air_temperature', 'zscore': 4, 'window': 60, 'min_samples': 30,
+                            'severity': 'warning'},
+    'water_level_drop': {'field': 'water_level', 'rate_below': -5, 'severity': 'critical',
+                         'message': '물탱크 수위가 분당 5 이상 떨어지고 있습니다 (누수 확인)'},
+}
+# 장치 명령을 POST 할 주소 (예: f'http://{ESP32_IP}/control'). None 이면 /api/rules, /api/stream 으로만 확인
+ACTUATOR_URL = None
+ACTUATOR_TIMEOUT = 3.0
+# 디스패치 큐 최대 길이 / /api/rules 로 조회할 수 있도록 보관하는 최근 이벤트 수
+RULE_DISPATCH_QUEUE_SIZE = 1000
+RULE_EVENT_HISTORY = 200
+# 멀티 워커(serve.py)에서도 DB 임대를 가진 한 프로세스만 규칙을 평가: 새로 저장된 센서 값을 확인하는 간격(초) /
+# 임대 유효 시간(초, 평가하던 프로세스가 죽으면 이 시간 뒤 다른 워커가 저장된 상태에서 이어서 평가)
+RULES_EVAL_INTERVAL = 1.0
+RULES_LEASE_SECONDS = 30
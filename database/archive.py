@@ -0,0 +1,267 @@
+# database/archive.py
+"""
+보관 기간이 지난 행을 삭제하는 대신 날짜별 Parquet 파일로 옮기는 아카이브 계층.
+
+    <ARCHIVE_DIR>/<테이블>/date=YYYY-MM-DD/part-<첫 id>-<끝 id>.parquet
+
+- archive_expired(): 만료된 행을 id 순으로 chunk_rows 개씩 읽어 Parquet 으로 쓰고, 같은 행을 배치 트랜잭션으로
+  삭제한 뒤 incremental vacuum 으로 빈 페이지를 돌려줍니다. 파일을 먼저 쓰고(임시 파일 -> 교체) 지우므로
+  중간에 멈춰도 데이터는 사라지지 않으며, 다시 실행하면 같은 이름의 파일을 덮어쓰고 이어서 진행합니다.
+- iter_range(): 아카이브와 현재 DB 를 함께 구간 조회해 DataFrame 조각으로 차례로 돌려줍니다. (전체를 메모리에 올리지 않음)
+
+pyarrow / pandas 는 실제로 아카이브를 다룰 때만 import 합니다.
+"""
+
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence
+
+from database import init as dbcore
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class ArchiveSpec(NamedTuple):
+    table: str
+    columns: str      # SELECT 목록 (파일에 저장되는 컬럼)
+    source: str       # FROM 절
+    ts_expr: str      # 만료/구간 판단에 쓰는 시각 (SQL)
+    id_expr: str      # keyset 진행 및 삭제 기준 id (SQL)
+    ts_column: str    # 파일 안의 시각 컬럼 이름 (날짜 파티션 기준)
+
+
+# ai_detection / ai_result 는 이미지 촬영 시각으로 만료를 판단하고, image_capture 보다 먼저 옮깁니다.
+# (image_capture 를 먼저 지우면 ON DELETE CASCADE 로 보관 전에 사라짐)
+ARCHIVE_SPECS = (
+    ArchiveSpec("ai_detection", "d.*, ic.timestamp AS image_timestamp",
+                "ai_detection d JOIN image_capture ic ON ic.id = d.image_id",
+                "ic.timestamp", "d.id", "image_timestamp"),
+    ArchiveSpec("ai_result", "ar.*, ic.timestamp AS image_timestamp",
+                "ai_result ar JOIN image_capture ic ON ic.id = ar.image_id",
+                "ic.timestamp", "ar.id", "image_timestamp"),
+    ArchiveSpec("image_capture", "*", "image_capture", "timestamp", "id", "timestamp"),
+    ArchiveSpec("sensor_data", "*", "sensor_data", "timestamp", "id", "timestamp"),
+)
+_SPECS = {spec.table: spec for spec in ARCHIVE_SPECS}
+
+
+def _spec(table: str) -> ArchiveSpec:
+    if table not in _SPECS:
+        raise ValueError(f"unknown archive table: {table}")
+    return _SPECS[table]
+
+
+def _archive_dir(archive_dir: Optional[str]) -> str:
+    return archive_dir or dbcore._cfg("ARCHIVE_DIR", "archive")
+
+
+def _arrow_schema(conn, spec: ArchiveSpec, names: Sequence[str]):
+    """SQLite 선언 타입 -> Arrow 타입. 파일마다 스키마가 같아야 함께 읽을 수 있으므로 값이 아닌 선언을 따릅니다."""
+    import pyarrow as pa
+
+    declared = {r[1]: (r[2] or "").upper() for r in conn.execute(f"PRAGMA table_info({spec.table})")}
+    fields = []
+    for name in names:
+        decl = declared.get(name, "TEXT")
+        if "INT" in decl:
+            fields.append(pa.field(name, pa.int64()))
+        elif "REAL" in decl or "FLOA" in decl or "DOUB" in decl:
+            fields.append(pa.field(name, pa.float64()))
+        else:
+            fields.append(pa.field(name, pa.string()))
+    return pa.schema(fields)
+
+
+def _write_partitions(rows, schema, spec: ArchiveSpec, base_dir: str) -> int:
+    """행들을 날짜별로 나눠 part-<첫 id>-<끝 id>.parquet 로 씁니다. 쓴 파일 수를 반환합니다."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    names = schema.names
+    ts_idx, id_idx = names.index(spec.ts_column), names.index("id")
+    by_day: Dict[str, List[Any]] = {}
+    for r in rows:
+        day = (r[ts_idx] or "0000-00-00")[:10]
+        by_day.setdefault(day, []).append(r)
+
+    for day, day_rows in by_day.items():
+        part_dir = os.path.join(base_dir, spec.table, f"date={day}")
+        os.makedirs(part_dir, exist_ok=True)
+        path = os.path.join(part_dir, f"part-{day_rows[0][id_idx]:012d}-{day_rows[-1][id_idx]:012d}.parquet")
+        table = pa.Table.from_arrays(
+            [pa.array([r[i] for r in day_rows], type=schema.field(i).type) for i in range(len(names))],
+            schema=schema,
+        )
+        tmp_path = path + ".tmp"
+        pq.write_table(table, tmp_path, compression="zstd")
+        os.replace(tmp_path, path)
+    return len(by_day)
+
+
+def _delete_ids(conn, table: str, ids: Sequence[int], batch: int) -> None:
+    """
+    보관한 행을 batch 개씩 별도 트랜잭션으로 삭제 (한 번에 오래 쓰기 잠금을 잡지 않도록).
+    배치마다 프로세스 간 쓰기 잠금을 잡아, 서버 워커의 쓰기와 busy_timeout 재시도 없이 번갈아 들어갑니다.
+    """
+    for start in range(0, len(ids), batch):
+        with dbcore.write_lock, conn:
+            conn.executemany(f"DELETE FROM {table} WHERE id = ?", ((i,) for i in ids[start:start + batch]))
+
+
+def incremental_vacuum(conn, pages_per_step: int = 2000) -> int:
+    """
+    빈 페이지를 pages_per_step 개씩 파일에서 돌려줍니다. 반환값은 돌려준 페이지 수.
+    auto_vacuum 이 INCREMENTAL 이 아닌 기존 DB 는 한 번만 전체 VACUUM 으로 전환합니다.
+    단계마다 프로세스 간 쓰기 잠금을 잡습니다. 최초 1회 전체 VACUUM 동안에는 다른 쓰기(센서 수집 포함)가
+    잠금에서 기다리므로(DB 크기에 따라 수 초 이상) 'database is locked' 로 실패하지는 않지만 응답이 늦어집니다.
+    """
+    conn.commit()
+    with dbcore.write_lock:
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            logging.info("[archive] auto_vacuum 을 INCREMENTAL 로 전환합니다. (최초 1회 전체 VACUUM)")
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return 0
+    freed = 0
+    while True:
+        with dbcore.write_lock:
+            free = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free == 0:
+                return freed
+            step = min(free, pages_per_step)
+            conn.execute(f"PRAGMA incremental_vacuum({int(step)})").fetchall()
+        freed += step
+
+
+def archive_expired(
+    retention_days: Optional[int] = None,
+    archive_dir: Optional[str] = None,
+    chunk_rows: Optional[int] = None,
+    delete_batch: Optional[int] = None,
+    tables: Optional[Sequence[str]] = None,
+    delete: bool = True,
+) -> Dict[str, int]:
+    """
+    retention_days 보다 오래된 행을 Parquet 으로 옮기고(delete=True 면 DB 에서 삭제) 테이블별 행 수를 반환합니다.
+    기본값은 config 의 RETENTION_DAYS / ARCHIVE_DIR / ARCHIVE_CHUNK_ROWS / ARCHIVE_DELETE_BATCH 입니다.
+    """
+    retention_days = int(retention_days if retention_days is not None else dbcore._cfg("RETENTION_DAYS", 30))
+    chunk_rows = int(chunk_rows or dbcore._cfg("ARCHIVE_CHUNK_ROWS", 50000))
+    delete_batch = int(delete_batch or dbcore._cfg("ARCHIVE_DELETE_BATCH", 5000))
+    base_dir = _archive_dir(archive_dir)
+    cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).strftime(TS_FORMAT)
+    if tables:
+        for t in tables:
+            _spec(t)
+        # image_capture 를 지우면 자식 행도 CASCADE 로 지워지므로 자식 테이블도 함께 보관
+        wanted = set(tables) | ({"ai_detection", "ai_result"} if "image_capture" in tables else set())
+        specs = [spec for spec in ARCHIVE_SPECS if spec.table in wanted]
+    else:
+        specs = ARCHIVE_SPECS
+
+    counts: Dict[str, int] = {}
+    conn = dbcore.connect()
+    try:
+        for spec in specs:
+            archived, files, last_id = 0, 0, 0
+            schema = None
+            while True:
+                cur = conn.execute(
+                    f"SELECT {spec.columns} FROM {spec.source} "
+                    f"WHERE {spec.ts_expr} < ? AND {spec.id_expr} > ? ORDER BY {spec.id_expr} LIMIT ?",
+                    (cutoff, last_id, chunk_rows),
+                )
+                rows = cur.fetchall()
+                if not rows:
+                    break
+                if schema is None:
+                    schema = _arrow_schema(conn, spec, [d[0] for d in cur.description])
+                files += _write_partitions(rows, schema, spec, base_dir)
+                ids = [r["id"] for r in rows]
+                if delete:
+                    _delete_ids(conn, spec.table, ids, delete_batch)
+                archived += len(rows)
+                last_id = ids[-1]
+            counts[spec.table] = archived
+            if archived:
+                logging.info(f"[archive] {spec.table}: {cutoff} 이전 {archived}건 -> Parquet {files}개")
+        if delete and any(counts.values()):
+            freed = incremental_vacuum(conn, int(dbcore._cfg("ARCHIVE_VACUUM_PAGES", 2000)))
+            logging.info(f"[archive] incremental vacuum: {freed} 페이지 반환")
+    finally:
+        conn.close()
+    return counts
+
+
+def _archive_batches(spec, base_dir, from_ts, to_ts, columns, batch_rows):
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+
+    path = os.path.join(base_dir, spec.table)
+    if not os.path.isdir(path):
+        return
+    partitioning = ds.partitioning(pa.schema([("date", pa.string())]), flavor="hive")
+    dataset = ds.dataset(path, format="parquet", partitioning=partitioning)
+    flt = None
+    ts = ds.field(spec.ts_column)
+    # 날짜 파티션 이름으로 먼저 디렉터리를 거르고, 파일 안에서는 시각 컬럼으로 거름
+    if from_ts:
+        flt = (ds.field("date") >= from_ts[:10]) & (ts >= from_ts)
+    if to_ts:
+        cond = (ds.field("date") <= to_ts[:10]) & (ts <= to_ts)
+        flt = cond if flt is None else flt & cond
+    for batch in dataset.to_batches(columns=list(columns) if columns else None, filter=flt, batch_size=batch_rows):
+        if batch.num_rows:
+            df = batch.to_pandas()
+            yield df.drop(columns=["date"], errors="ignore")
+
+
+def _live_batches(spec, from_ts, to_ts, columns, batch_rows):
+    import pandas as pd
+
+    where, params = [], []
+    if from_ts:
+        where.append(f"{spec.ts_expr} >= ?")
+        params.append(from_ts)
+    if to_ts:
+        where.append(f"{spec.ts_expr} <= ?")
+        params.append(to_ts)
+    sql = f"SELECT {spec.columns} FROM {spec.source}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY {spec.id_expr}"
+
+    conn = dbcore.connect()
+    try:
+        cur = conn.execute(sql, params)
+        names = [d[0] for d in cur.description]
+        while True:
+            rows = cur.fetchmany(batch_rows)
+            if not rows:
+                break
+            df = pd.DataFrame.from_records([tuple(r) for r in rows], columns=names)
+            yield df[list(columns)] if columns else df
+    finally:
+        conn.close()
+
+
+def iter_range(
+    table: str,
+    from_ts: Optional[str] = None,
+    to_ts: Optional[str] = None,
+    columns: Optional[Sequence[str]] = None,
+    batch_rows: int = 50000,
+    archive_dir: Optional[str] = None,
+) -> Iterator["pandas.DataFrame"]:  # noqa: F821
+    """
+    아카이브(Parquet)와 현재 DB 에서 from_ts~to_ts ('YYYY-MM-DD HH:MM:SS', UTC) 구간의 행을
+    batch_rows 행 이하의 DataFrame 조각으로 차례로 돌려줍니다. 아카이브 조각이 먼저 나오며
+    조각 사이의 순서는 보장하지 않으므로 집계(합계/개수/최대 등)는 조각별로 누적해서 계산하세요.
+
+        for df in iter_range("sensor_data", "2024-01-01 00:00:00", "2024-12-31 23:59:59", ["timestamp", "air_temperature"]):
+            ...
+    """
+    spec = _spec(table)
+    yield from _archive_batches(spec, _archive_dir(archive_dir), from_ts, to_ts, columns, batch_rows)
+    yield from _live_batches(spec, from_ts, to_ts, columns, batch_rows)
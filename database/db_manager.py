@@ -1,8 +1,17 @@
 # database/db_manager.py
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
 import sqlite3
 import os
+import json
+import math
+import sys
+import threading
+import time
+from datetime import datetime, timezone
+import metrics
 from database import init as dbcore
+from database.pubsub import hub
+from database.sensor_cache import SensorRingCache
 
 # (기존 set_db_path, get_db_connection, _to_float, 센서 관련 함수들은 동일하므로 생략)
 # ... (이전 코드와 동일한 부분) ...
@@ -10,16 +19,231 @@ from database import init as dbcore
 def set_db_path(path: str) -> None:
     dbcore.set_db_path(path)
 
+def ensure_schema() -> None:
+    """테이블/인덱스 생성 및 미적용 마이그레이션 적용 (여러 번 호출해도 안전)."""
+    dbcore.create_tables()
+
 def get_db_connection():
+    """풀과 무관한 단독 연결 (호출 측에서 close 필요)."""
     return dbcore.connect()
 
+# 일반 조회/저장은 풀에서 연결을 빌려 쓰고 반납합니다. (매번 open/PRAGMA 설정 비용 제거)
+# 빌린 순간부터 반납까지를 호출한 함수 이름별로 db_query_duration_seconds 에 기록합니다.
+_checkouts: Dict[int, tuple] = {}
+
+def _acquire():
+    conn = dbcore.get_pool().acquire()
+    if metrics.enabled():
+        _checkouts[id(conn)] = (sys._getframe(1).f_code.co_name, time.perf_counter())
+    return conn
+
+def _release(conn) -> None:
+    checkout = _checkouts.pop(id(conn), None)
+    if checkout is not None:
+        op, t0 = checkout
+        metrics.DB_QUERY_SECONDS.labels(op).observe(time.perf_counter() - t0)
+        # finally 에서 호출되므로 처리 중인 예외가 있으면 여기서 보임 (RuntimeError 로 감싼 sqlite3 오류 포함)
+        exc = sys.exc_info()[1]
+        if exc is not None:
+            err = exc if isinstance(exc, sqlite3.Error) else exc.__cause__
+            if isinstance(err, sqlite3.Error):
+                busy = "locked" in str(err) or "busy" in str(err)
+                metrics.DB_ERRORS.labels(op, "busy" if busy else "error").inc()
+    dbcore.get_pool().release(conn)
+
 def _to_float(v):
+    """센서 값을 float 로 변환. 빈 값과 NaN/inf 는 None (SQLite 는 NaN 을 NULL 로 저장하므로 캐시/발행 값도 맞춤)."""
     if v is None or v == "":
         return None
     try:
-        return float(v)
+        x = float(v)
     except (TypeError, ValueError):
         raise ValueError(f"numeric expected, got {v!r}")
+    return x if math.isfinite(x) else None
+
+SENSOR_FIELDS = dbcore.SENSOR_FIELDS
+
+# 장치 시계가 조금 빠른 정도는 허용하고, 그보다 먼 미래 시각은 거부 (최신 값/보관 기간 계산이 어긋나지 않도록)
+SENSOR_TS_MAX_FUTURE_SECONDS = 300
+
+def _to_timestamp(v) -> Optional[str]:
+    """
+    측정 시각(ISO 문자열 또는 epoch 초)을 DB 저장 형식('YYYY-MM-DD HH:MM:SS', UTC)으로 변환.
+    오프셋이 없는 문자열은 UTC 로 간주합니다. 없으면 None (저장 시각을 씀).
+    """
+    if v is None or v == "":
+        return None
+    if isinstance(v, bool):
+        raise ValueError(f"timestamp expected, got {v!r}")
+    try:
+        if isinstance(v, (int, float)):
+            dt = datetime.fromtimestamp(v, timezone.utc)
+        elif isinstance(v, str):
+            dt = datetime.fromisoformat(v.strip().replace("Z", "+00:00"))
+            dt = dt.astimezone(timezone.utc) if dt.tzinfo is not None else dt.replace(tzinfo=timezone.utc)
+        else:
+            raise TypeError
+    except (TypeError, ValueError, OverflowError, OSError):
+        raise ValueError(f"timestamp expected (ISO datetime or epoch seconds), got {v!r}")
+    if (dt - datetime.now(timezone.utc)).total_seconds() > SENSOR_TS_MAX_FUTURE_SECONDS:
+        raise ValueError(f"timestamp is in the future: {v!r}")
+    return dt.strftime(TS_FORMAT)
+
+def normalize_sensor_reading(data: Dict[str, Any]) -> tuple:
+    """
+    센서 JSON 한 건을 (timestamp, *SENSOR_FIELDS) 튜플로 변환합니다.
+    timestamp 는 선택 항목이며, 없으면 None 이고 저장할 때의 시각이 찍힙니다.
+    """
+    if not isinstance(data, dict):
+        raise ValueError(f"object expected, got {type(data).__name__}")
+    return (_to_timestamp(data.get("timestamp")), *(_to_float(data.get(f)) for f in SENSOR_FIELDS))
+
+# ---------------------------------------------------------------------------
+# 최근 센서 값 메모리 캐시 (최신 행 + 최근 N 행 링 버퍼)
+# 이 모듈을 거치는 쓰기는 커밋 직후 캐시에 반영되고(write-through), 처음 사용할 때 DB 에서 채웁니다.
+# 다른 프로세스(멀티 워커 서버의 다른 워커, 외부 스크립트)가 추가한 행은 조회 때 sync_sensor_cache() 가
+# PRAGMA data_version 으로 변경 여부를 확인해 따라잡습니다. (행을 지우거나 고쳤다면 reload_sensor_cache())
+# ---------------------------------------------------------------------------
+
+_sensor_cache: Optional[SensorRingCache] = None
+_sensor_cache_path: Optional[str] = None
+# 센서 쓰기는 프로세스 간 쓰기 잠금으로 한 줄로 세움 (같은 DB 를 쓰는 다른 워커 포함, SQLite 도 쓰기는 한 번에 하나)
+# 대기 시간은 db_lock_wait_seconds{lock="sensor_write"} 로 기록
+_sensor_write_lock = metrics.TimedLock(dbcore.write_lock, metrics.DB_LOCK_WAIT_SECONDS.labels("sensor_write"))
+# 그 밖의 쓰기(분석 결과, 결과 캐시, 스케줄러 임대/작업, 분석 작업 상태)도 같은 잠금으로 세워 busy_timeout 에 기대지 않음
+_write_lock = metrics.TimedLock(dbcore.write_lock, metrics.DB_LOCK_WAIT_SECONDS.labels("write"))
+# 캐시 채우기/덧붙이기/따라잡기는 프로세스 안에서만 직렬화 (읽기가 다른 워커의 쓰기를 기다리지 않도록 분리)
+_sensor_cache_lock = threading.RLock()
+
+_cache_hit = metrics.SENSOR_CACHE_REQUESTS.labels("hit")
+_cache_miss = metrics.SENSOR_CACHE_REQUESTS.labels("miss")
+
+def _sensor_cache_capacity() -> int:
+    return int(dbcore._cfg("SENSOR_CACHE_SIZE", 4096))
+
+# 변경 감지 전용 연결: data_version 은 "이 연결 밖에서" 커밋이 있을 때마다 바뀌는 값이라 쓰기에는 쓰지 않음
+_version_conn: Optional[sqlite3.Connection] = None
+_version_key: Optional[tuple] = None
+_version_lock = threading.Lock()
+_seen_version: Optional[int] = None
+
+def _data_version() -> int:
+    global _version_conn, _version_key
+    key = (os.getpid(), dbcore._resolve_db_path())
+    with _version_lock:
+        if _version_key != key:
+            # fork 로 물려받은 연결은 쓰지 않고 닫지도 않음 (부모 프로세스의 것)
+            if _version_conn is not None and _version_key[0] == key[0]:
+                _version_conn.close()
+            _version_conn, _version_key = dbcore.connect(), key
+        return _version_conn.execute("PRAGMA data_version").fetchone()[0]
+
+def reload_sensor_cache() -> Optional[SensorRingCache]:
+    """DB 의 최근 SENSOR_CACHE_SIZE 행으로 캐시를 다시 채웁니다. (0 이면 캐시 사용 안 함)"""
+    global _sensor_cache, _sensor_cache_path, _seen_version
+    capacity = _sensor_cache_capacity()
+    with _sensor_cache_lock:
+        if capacity <= 0:
+            _sensor_cache = None
+            return None
+        # 읽기 전에 버전을 기록: 읽는 도중의 커밋은 다음 sync 에서 다시 확인됨
+        version = _data_version()
+        conn = _acquire()
+        try:
+            rows = conn.execute(
+                f"SELECT id, timestamp, {', '.join(SENSOR_FIELDS)} FROM sensor_data ORDER BY id DESC LIMIT ?",
+                (capacity,),
+            ).fetchall()
+            older_max_ts = None
+            if len(rows) == capacity:
+                # 버퍼에 못 들어간 행들의 가장 늦은 시각 (timestamp 인덱스를 뒤에서부터 훑다가 첫 행에서 멈춤)
+                row = conn.execute(
+                    "SELECT timestamp FROM sensor_data WHERE id < ? ORDER BY timestamp DESC LIMIT 1",
+                    (rows[-1]["id"],),
+                ).fetchone()
+                older_max_ts = row[0] if row else None
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB select failed for sensor cache: {e}") from e
+        finally:
+            _release(conn)
+        cache = SensorRingCache(capacity, SENSOR_FIELDS)
+        cache.load(rows[::-1], older_max_ts)
+        _sensor_cache, _sensor_cache_path, _seen_version = cache, dbcore._resolve_db_path(), version
+        return cache
+
+def _get_sensor_cache() -> Optional[SensorRingCache]:
+    """현재 DB 의 캐시 (없거나 DB 경로가 바뀌었으면 새로 채움)."""
+    cache = _sensor_cache
+    if cache is not None and _sensor_cache_path == dbcore._resolve_db_path():
+        return cache
+    if _sensor_cache_capacity() <= 0:
+        return None
+    return reload_sensor_cache()
+
+def _sync_rows_locked(cache: SensorRingCache) -> List[Dict[str, Any]]:
+    """캐시의 마지막 id 이후 커밋된 행을 읽어 덧붙입니다. (_sensor_cache_lock 안에서 호출)"""
+    conn = _acquire()
+    try:
+        rows = conn.execute(
+            f"SELECT id, timestamp, {', '.join(SENSOR_FIELDS)} FROM sensor_data WHERE id > ? ORDER BY id",
+            (cache.last_id(),),
+        ).fetchall()
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for sensor cache sync: {e}") from e
+    finally:
+        _release(conn)
+    # 커밋 순서 = id 순서 (SQLite 는 쓰기 트랜잭션이 한 번에 하나) 이므로 id > 마지막 id 로 빠짐없이 따라잡음
+    for r in rows:
+        cache.append(r["id"], r["timestamp"], [r[f] for f in SENSOR_FIELDS])
+    return [dict(r) for r in rows]
+
+def sync_sensor_cache() -> int:
+    """
+    다른 연결/프로세스가 커밋한 새 센서 행을 캐시에 반영하고 구독자(/api/stream)에게 발행합니다.
+    바뀐 것이 없으면 PRAGMA 한 번으로 끝납니다. 반영한 행 수를 반환합니다.
+    """
+    global _seen_version
+    cache = _sensor_cache
+    if cache is None or _sensor_cache_path != dbcore._resolve_db_path():
+        return 0
+    if _data_version() == _seen_version:
+        return 0
+    with _sensor_cache_lock:
+        version = _data_version()
+        if version == _seen_version:
+            return 0
+        rows = _sync_rows_locked(cache)
+        _seen_version = version
+    if rows:
+        hub.publish_many("sensor", rows)
+    return len(rows)
+
+def _fresh_sensor_cache() -> Optional[SensorRingCache]:
+    """조회용 캐시: 다른 프로세스가 쓴 행까지 반영된 상태로 반환합니다."""
+    cache = _get_sensor_cache()
+    if cache is not None:
+        sync_sensor_cache()
+    return cache
+
+def _append_own_rows(cache: SensorRingCache, first_id: int, append) -> Optional[List[Dict[str, Any]]]:
+    """
+    방금 커밋한 행(first_id 부터)을 캐시에 반영합니다.
+    - 캐시의 마지막 id 바로 다음이면 append() 로 덧붙이고 None (호출 측이 자기 행을 발행)
+    - 사이에 다른 프로세스의 행이 끼어 있으면 DB 에서 따라잡고 가져온 행 목록 (호출 측이 그 행들을 발행)
+    - 조회 쪽 sync 가 이미 가져갔으면 빈 목록 (그쪽에서 발행됨)
+    """
+    with _sensor_cache_lock:
+        last = cache.last_id()
+        if first_id == last + 1:
+            append()
+            return None
+        if first_id <= last:
+            return []
+        return _sync_rows_locked(cache)
+
+def sensor_cache_stats() -> Dict[str, Any]:
+    cache = _sensor_cache
+    return cache.stats() if cache is not None else {"enabled": False}
 
 def save_sensor_data(
     soil_moisture: Optional[float] = None,
@@ -33,47 +257,246 @@ def save_sensor_data(
     ah = _to_float(air_humidity)
     li = _to_float(light_intensity)
     wl = _to_float(water_level)
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            INSERT INTO sensor_data
-            (soil_moisture, air_temperature, air_humidity, light_intensity, water_level)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (sm, at, ah, li, wl),
-        )
-        conn.commit()
-        return cur.lastrowid
-    except sqlite3.Error as e:
-        raise RuntimeError(f"DB insert failed: {e}") from e
-    finally:
-        conn.close()
+    with _sensor_write_lock:
+        cache = _get_sensor_cache()
+        conn = _acquire()
+        try:
+            cur = conn.cursor()
+            # RETURNING 으로 DB 가 채운 id/timestamp 를 받아 추가 조회 없이 캐시 반영/구독자 발행
+            cur.execute(
+                """
+                INSERT INTO sensor_data
+                (soil_moisture, air_temperature, air_humidity, light_intensity, water_level)
+                VALUES (?, ?, ?, ?, ?)
+                RETURNING id, timestamp
+                """,
+                (sm, at, ah, li, wl),
+            )
+            row_id, ts = cur.fetchone()
+            conn.commit()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB insert failed: {e}") from e
+        finally:
+            _release(conn)
+    # 캐시 반영은 잠금 밖에서: 순서가 뒤바뀌어도 _append_own_rows 가 DB 에서 id 순으로 따라잡음
+    synced = None
+    if cache is not None:
+        synced = _append_own_rows(cache, row_id, lambda: cache.append(row_id, ts, (sm, at, ah, li, wl)))
+    if synced is None:
+        hub.publish("sensor", {"id": row_id, "timestamp": ts, **dict(zip(SENSOR_FIELDS, (sm, at, ah, li, wl)))})
+    elif synced:
+        hub.publish_many("sensor", synced)
+    return row_id
+
+def save_sensor_data_batch(rows: Sequence[tuple]) -> int:
+    """
+    normalize_sensor_reading 형식의 튜플들을 한 번의 트랜잭션(executemany)으로 저장합니다.
+    측정 시각이 없는 행에는 저장 시각을 찍습니다.
+    """
+    if not rows:
+        return 0
+    # timestamp 를 직접 넣어, 커밋 후 발행하는 값이 DB 와 정확히 같도록 함
+    now = datetime.now(timezone.utc).strftime(TS_FORMAT)
+    rows = [(row[0] or now, *row[1:]) for row in rows]
+    with _sensor_write_lock:
+        cache = _get_sensor_cache()
+        conn = _acquire()
+        try:
+            with conn:
+                conn.executemany(
+                    """
+                    INSERT INTO sensor_data
+                    (timestamp, soil_moisture, air_temperature, air_humidity, light_intensity, water_level)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                    """,
+                    rows,
+                )
+                # 한 트랜잭션 안의 AUTOINCREMENT id 는 연속이므로 마지막 id 로 전체 id 를 복원 (테이블 조회 없음)
+                last_id = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB batch insert failed: {e}") from e
+        finally:
+            _release(conn)
+    first_id = last_id - len(rows) + 1
+    synced = None
+    if cache is not None:
+        synced = _append_own_rows(cache, first_id, lambda: cache.append_many(first_id, rows))
+    if synced is None:
+        hub.publish_many("sensor", (
+            {"id": first_id + i, "timestamp": row[0], **dict(zip(SENSOR_FIELDS, row[1:]))}
+            for i, row in enumerate(rows)
+        ))
+    elif synced:
+        hub.publish_many("sensor", synced)
+    return len(rows)
 
 def get_all_sensor_data() -> List[Dict[str, Any]]:
-    conn = get_db_connection()
+    conn = _acquire()
     try:
         cur = conn.cursor()
-        cur.execute("SELECT * FROM sensor_data ORDER BY datetime(timestamp) DESC, id DESC")
+        cur.execute("SELECT * FROM sensor_data ORDER BY timestamp DESC, id DESC")
         rows = cur.fetchall()
         return [dict(r) for r in rows]
     except sqlite3.Error as e:
         raise RuntimeError(f"DB select failed: {e}") from e
     finally:
-        conn.close()
+        _release(conn)
+
+SENSOR_COLUMNS = ("id", "timestamp") + SENSOR_FIELDS
+
+def _select_columns(fields: Optional[Sequence[str]]) -> str:
+    """fields 를 허용 컬럼으로 검증하고, 커서용 id 를 항상 포함한 SELECT 목록을 만듭니다."""
+    if not fields:
+        return ", ".join(SENSOR_COLUMNS)
+    unknown = [f for f in fields if f not in SENSOR_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+    cols = ["id"] + [f for f in SENSOR_COLUMNS if f in fields and f != "id"]
+    return ", ".join(cols)
+
+def iter_sensor_data(
+    before_id: Optional[int] = None,
+    limit: Optional[int] = None,
+    from_ts: Optional[str] = None,
+    to_ts: Optional[str] = None,
+    fields: Optional[Sequence[str]] = None,
+    chunk_size: int = 500,
+) -> Iterator[Dict[str, Any]]:
+    """
+    sensor_data 를 최신순(id DESC)으로 조금씩(fetchmany) 읽어 한 행씩 돌려주는 제너레이터.
+    before_id 보다 작은 id 부터 시작하는 keyset 페이지네이션이라 OFFSET 없이 어느 페이지든 일정한 비용입니다.
+    from_ts / to_ts 는 'YYYY-MM-DD HH:MM:SS' (UTC) 범위 조건입니다.
+    """
+    cols = _select_columns(fields)
+    # 최근 구간은 메모리 링 버퍼로 응답 (버퍼만으로 정확히 답할 수 없으면 DB 로)
+    cache = _fresh_sensor_cache()
+    if cache is not None:
+        try:
+            cached = cache.query(before_id, limit, from_ts, to_ts, fields)
+        except ValueError:
+            cached = None  # 고정 형식이 아닌 시각 -> SQL 의 datetime() 에 맡김
+        if cached is not None:
+            _cache_hit.inc()
+            yield from cached
+            return
+        _cache_miss.inc()
+
+    where, params = [], []
+    if before_id is not None:
+        where.append("id < ?")
+        params.append(int(before_id))
+    if from_ts:
+        where.append("timestamp >= datetime(?)")
+        params.append(from_ts)
+    if to_ts:
+        where.append("timestamp <= datetime(?)")
+        params.append(to_ts)
+    sql = f"SELECT {cols} FROM sensor_data"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY id DESC"
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(int(limit))
+
+    conn = _acquire()
+    try:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(chunk_size)
+            if not rows:
+                break
+            for r in rows:
+                yield dict(r)
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed: {e}") from e
+    finally:
+        _release(conn)
+
+def get_sensor_data_page(
+    before_id: Optional[int] = None,
+    limit: int = 50,
+    **filters: Any,
+) -> List[Dict[str, Any]]:
+    """iter_sensor_data 의 한 페이지를 리스트로 반환합니다. (대시보드 첫 화면용)"""
+    return list(iter_sensor_data(before_id=before_id, limit=limit, **filters))
 
 def get_latest_sensor_data() -> Optional[Dict[str, Any]]:
-    conn = get_db_connection()
+    """가장 최근 센서 행. 캐시가 있으면 변경 확인(PRAGMA data_version) 외에는 DB 를 읽지 않습니다."""
+    cache = _fresh_sensor_cache()
+    if cache is not None:
+        _cache_hit.inc()
+        return cache.latest()
+    conn = _acquire()
     try:
         cur = conn.cursor()
-        cur.execute("SELECT * FROM sensor_data ORDER BY datetime(timestamp) DESC, id DESC LIMIT 1")
+        cur.execute("SELECT * FROM sensor_data ORDER BY timestamp DESC, id DESC LIMIT 1")
         row = cur.fetchone()
         return dict(row) if row else None
     except sqlite3.Error as e:
         raise RuntimeError(f"DB select failed: {e}") from e
     finally:
-        conn.close()
+        _release(conn)
+
+# ---------------------------------------------------------------------------
+# 롤업(분/시/일) 조회 — 원본 sensor_data 를 스캔하지 않는 차트용 데이터
+# ---------------------------------------------------------------------------
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+def pick_rollup_resolution(from_ts: str, to_ts: str, min_points: int) -> str:
+    """구간 안에 min_points 개 이상의 버킷이 나오는 가장 거친 해상도를 고릅니다."""
+    span = (datetime.strptime(to_ts, TS_FORMAT) - datetime.strptime(from_ts, TS_FORMAT)).total_seconds()
+    for resolution in ("day", "hour"):
+        if span / dbcore.ROLLUP_RESOLUTIONS[resolution][2] >= min_points:
+            return resolution
+    return "minute"
+
+def get_sensor_rollup(
+    resolution: str,
+    from_ts: str,
+    to_ts: str,
+    fields: Optional[Sequence[str]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    [from_ts, to_ts] 구간의 롤업 버킷을 시간순으로 반환합니다.
+    각 필드는 {'min', 'max', 'mean', 'count', 'last'} 딕셔너리로 표현됩니다.
+    """
+    if resolution not in dbcore.ROLLUP_RESOLUTIONS:
+        raise ValueError(f"unknown resolution: {resolution}")
+    fields = list(fields) if fields else list(SENSOR_FIELDS)
+    unknown = [f for f in fields if f not in SENSOR_FIELDS]
+    if unknown:
+        raise ValueError(f"unknown fields: {', '.join(unknown)}")
+
+    table, bucket_fmt, _ = dbcore.ROLLUP_RESOLUTIONS[resolution]
+    cols = ", ".join(f"{f}_{stat}" for f in fields for stat in dbcore.ROLLUP_STATS)
+    # 시작 시각이 속한 버킷부터 포함
+    from_bucket = datetime.strptime(from_ts, TS_FORMAT).strftime(bucket_fmt)
+    conn = _acquire()
+    try:
+        cur = conn.execute(
+            f"SELECT bucket, {cols} FROM {table} WHERE bucket >= ? AND bucket <= ? ORDER BY bucket",
+            (from_bucket, to_ts),
+        )
+        result = []
+        for r in cur:
+            item: Dict[str, Any] = {"bucket": r["bucket"]}
+            for f in fields:
+                count = r[f"{f}_count"]
+                item[f] = {
+                    "min": r[f"{f}_min"],
+                    "max": r[f"{f}_max"],
+                    "mean": (r[f"{f}_sum"] / count) if count else None,
+                    "count": count,
+                    "last": r[f"{f}_last"],
+                }
+            result.append(item)
+        return result
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for rollup: {e}") from e
+    finally:
+        _release(conn)
 
 # ---------------------------------------------------------------------------
 # ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼ AI 및 이미지 관련 (개선된 부분) ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼
@@ -85,69 +508,200 @@ def save_image_analysis_result(
     flower_count: Optional[int] = None, # score -> count 로 이름 변경
     ripeness_text: Optional[str] = None,
     flower_text: Optional[str] = None,
+    cached: bool = False,
+    detections: Optional[Dict[str, Sequence[Sequence[float]]]] = None,
+    summary: Optional[Dict[str, Any]] = None,
+    content_hash: Optional[str] = None,
 ) -> Dict[str, int]:
     """
     (개선된 통합 함수)
     이미지 경로와 AI 분석 결과를 한 번의 트랜잭션으로 DB에 저장합니다.
-    - image_capture 테이블에 파일 경로 저장
-    - ai_result 테이블에 분석 결과 저장
+    - image_capture 테이블에 촬영 1회당 한 행 저장 (같은 내용의 이미지여도 새 행, 촬영 시각은 지금)
+      content_hash 를 주지 않으면 내용 주소 경로에서 sha256 을 꺼내 기록
+    - ai_result 테이블에 분석 결과 저장 (cached=True 면 추론 없이 캐시 결과를 재사용한 기록)
+    - ai_detection 테이블에 검출 박스 전체 저장 (모델별 [class_id, confidence, x1, y1, x2, y2] 목록)
+    - summary(모델별 클래스 개수/최대/평균 신뢰도)는 ai_result.summary_json 에 JSON 으로 저장
     """
     if not file_path:
         raise ValueError("file_path is required")
 
-    conn = get_db_connection()
-    try:
-        cur = conn.cursor()
+    with _write_lock:
+        conn = _acquire()
+        try:
+            cur = conn.cursor()
 
-        # 1. image_capture 테이블에 이미지 경로 저장
-        cur.execute(
-            "INSERT INTO image_capture (file_path) VALUES (?)",
-            (file_path,)
-        )
-        image_id = cur.lastrowid # 방금 생성된 이미지 ID 가져오기
+            # 1. image_capture 테이블에 이번 촬영 기록 저장
+            #    (파일은 내용 주소로 공유하더라도 행은 촬영마다 따로 두어, 결과가 이번 촬영 시각을 갖도록 함)
+            cur.execute(
+                "INSERT INTO image_capture (file_path, content_hash) VALUES (?, ?)",
+                (file_path, content_hash or dbcore._content_hash_of(file_path)),
+            )
+            image_id = cur.lastrowid # 방금 생성된 이미지 ID 가져오기
 
-        # 2. ai_result 테이블에 위 ID를 사용하여 분석 결과 저장
-        cur.execute(
-            """
-            INSERT INTO ai_result
-            (image_id, ripeness_score, flower_count, ripeness_text, flower_text)
-            VALUES (?, ?, ?, ?, ?)
-            """,
-            (image_id, ripeness_score, flower_count, ripeness_text, flower_text),
-        )
-        ai_result_id = cur.lastrowid
+            # 2. ai_result 테이블에 위 ID를 사용하여 분석 결과 저장
+            cur.execute(
+                """
+                INSERT INTO ai_result
+                (image_id, ripeness_score, flower_count, ripeness_text, flower_text, cached, summary_json)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                RETURNING id, created_at
+                """,
+                (image_id, ripeness_score, flower_count, ripeness_text, flower_text, int(bool(cached)),
+                 json.dumps(summary, ensure_ascii=False) if summary else None),
+            )
+            ai_result_id, created_at = cur.fetchone()
 
-        # 3. 모든 작업이 성공하면 최종 확정(commit)
-        conn.commit()
+            # 3. 검출 박스는 이번 촬영 행에 모델별 executemany 한 번으로 저장
+            if detections:
+                for model, rows in detections.items():
+                    if len(rows):
+                        cur.executemany(
+                            """
+                            INSERT INTO ai_detection
+                            (image_id, model, class_id, confidence, x1, y1, x2, y2)
+                            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                            """,
+                            ((image_id, model, int(r[0]), r[1], r[2], r[3], r[4], r[5]) for r in rows),
+                        )
 
-        return {"image_id": image_id, "ai_result_id": ai_result_id}
+            # 4. 모든 작업이 성공하면 최종 확정(commit)
+            conn.commit()
 
-    except sqlite3.Error as e:
-        conn.rollback() # 오류 발생 시 모든 작업을 취소
-        raise RuntimeError(f"DB transaction failed for image analysis: {e}") from e
-    finally:
-        conn.close()
+        except sqlite3.Error as e:
+            conn.rollback() # 오류 발생 시 모든 작업을 취소
+            raise RuntimeError(f"DB transaction failed for image analysis: {e}") from e
+        finally:
+            _release(conn)
+
+    # 5. 커밋된 결과를 실시간 구독자에게 발행 (검출 박스 목록은 제외)
+    #    사이에 다른 프로세스가 저장한 결과가 있으면 그 결과들까지 id 순서로 발행
+    own = {
+        "image_id": image_id, "ai_result_id": ai_result_id, "created_at": created_at,
+        "file_path": file_path, "ripeness_score": ripeness_score, "ripeness_text": ripeness_text,
+        "flower_count": flower_count, "flower_text": flower_text, "cached": bool(cached),
+    }
+    _analysis_follower.advance(ai_result_id, own)
+    return {"image_id": image_id, "ai_result_id": ai_result_id}
+
+class _CommitFollower:
+    """
+    다른 프로세스(멀티 워커)가 커밋한 행도 이 프로세스의 구독자에게 발행하기 위한 id 커서.
+    커서는 이 프로세스가 발행까지 마친 마지막 id (None: 아직 기준이 없음 -> 과거 행은 발행하지 않음).
+    쓰기는 프로세스 간 잠금으로 한 번에 하나씩 커밋되므로 id 순서 = 커밋 순서이고, id > 커서 로 빠짐없이 따라잡습니다.
+    """
+
+    def __init__(self, topic: str, table: str, rows_sql: str, to_event: Callable[[sqlite3.Row], Dict[str, Any]],
+                 id_key: str) -> None:
+        self.topic = topic
+        self.table = table
+        self.rows_sql = rows_sql  # 마지막 id 하나를 받아 그 뒤의 행을 id 오름차순으로 반환하는 SELECT
+        self.to_event = to_event
+        self.id_key = id_key      # 이벤트에서 id 를 읽을 키
+        self.cursor: Optional[int] = None
+        self._key: Optional[tuple] = None
+        self._seen_version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _rows_after(self, last_id: int) -> List[Dict[str, Any]]:
+        conn = _acquire()
+        try:
+            rows = conn.execute(self.rows_sql, (last_id,)).fetchall()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB select failed for {self.topic} sync: {e}") from e
+        finally:
+            _release(conn)
+        return [self.to_event(r) for r in rows]
+
+    def _check_key(self) -> None:
+        """DB 경로가 바뀌었거나 fork 된 자식이면 커서를 초기화합니다. (_lock 안에서 호출)"""
+        key = (os.getpid(), dbcore._resolve_db_path())
+        if self._key != key:
+            self.cursor, self._key, self._seen_version = None, key, None
+
+    def advance(self, row_id: int, own: Dict[str, Any]) -> None:
+        """
+        방금 커밋한 행(row_id)까지 커서를 옮기고 발행합니다.
+        - 커서 바로 다음(또는 커서가 없음)이면 자기 행만
+        - 사이에 다른 프로세스의 행이 있으면 DB 에서 읽은 행들 (자기 행 포함)
+        - sync 가 이미 발행했으면 발행하지 않음
+        """
+        with self._lock:
+            self._check_key()
+            last = self.cursor
+            if last is not None and row_id <= last:
+                return
+            if last is None or row_id == last + 1:
+                self.cursor = row_id
+                events = [own]
+            else:
+                events = self._rows_after(last)
+                if events:
+                    self.cursor = events[-1][self.id_key]
+        hub.publish_many(self.topic, events)
+
+    def sync(self) -> int:
+        """
+        다른 프로세스가 저장한 새 행을 발행합니다. (id > 마지막으로 발행한 id)
+        처음 호출하면 현재 마지막 id 를 기준으로 삼고 발행하지 않습니다. 바뀐 것이 없으면 PRAGMA 한 번으로 끝납니다.
+        """
+        with self._lock:
+            self._check_key()
+            version = _data_version()
+            if version == self._seen_version:
+                return 0
+            if self.cursor is None:
+                conn = _acquire()
+                try:
+                    self.cursor = conn.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table}").fetchone()[0]
+                except sqlite3.Error as e:
+                    raise RuntimeError(f"DB select failed for {self.topic} sync: {e}") from e
+                finally:
+                    _release(conn)
+                self._seen_version = version
+                return 0
+            events = self._rows_after(self.cursor)
+            if events:
+                self.cursor = events[-1][self.id_key]
+            self._seen_version = version
+        hub.publish_many(self.topic, events)
+        return len(events)
+
+_analysis_follower = _CommitFollower(
+    "analysis", "ai_result",
+    """
+    SELECT r.image_id, r.id AS ai_result_id, r.created_at, i.file_path, r.ripeness_score, r.ripeness_text,
+           r.flower_count, r.flower_text, r.cached
+    FROM ai_result r JOIN image_capture i ON i.id = r.image_id
+    WHERE r.id > ? ORDER BY r.id
+    """,
+    lambda r: {**dict(r), "cached": bool(r["cached"])},
+    "ai_result_id",
+)
+
+def sync_analysis_results() -> int:
+    """다른 프로세스가 저장한 새 분석 결과를 구독자(/api/stream)에게 발행합니다. 발행한 결과 수를 반환합니다."""
+    return _analysis_follower.sync()
 
 
 def find_image_id_by_path(file_path: str) -> Optional[int]:
-    """절대경로 기준으로 image_capture.id 조회 (없으면 None)."""
+    """절대경로 기준으로 image_capture.id 조회 (같은 경로를 여러 번 촬영했으면 가장 최근 행, 없으면 None)."""
     abs_path = os.path.abspath(file_path)
-    conn = get_db_connection()
+    conn = _acquire()
     try:
         cur = conn.cursor()
-        cur.execute("SELECT id FROM image_capture WHERE file_path = ?", (abs_path,))
+        cur.execute("SELECT id FROM image_capture WHERE file_path = ? ORDER BY id DESC LIMIT 1", (abs_path,))
         row = cur.fetchone()
         return row["id"] if row else None
     except sqlite3.Error as e:
         raise RuntimeError(f"DB select image_capture failed: {e}") from e
     finally:
-        conn.close()
+        _release(conn)
         
 def get_all_analysis_data(limit: int = 30) -> List[Dict[str, Any]]:
     """
     이미지 캡처 기록과 AI 분석 결과를 합쳐서 최신순으로 가져옵니다.
     """
-    conn = get_db_connection()
+    conn = _acquire()
     try:
         cur = conn.cursor()
         # image_capture 테이블과 ai_result 테이블을 id로 연결(JOIN)합니다.
@@ -159,10 +713,11 @@ def get_all_analysis_data(limit: int = 30) -> List[Dict[str, Any]]:
                 ic.file_path,
                 ar.ripeness_text,
                 ar.ripeness_score,
-                ar.flower_count
+                ar.flower_count,
+                ar.cached
             FROM image_capture ic
             JOIN ai_result ar ON ic.id = ar.image_id
-            ORDER BY datetime(ic.timestamp) DESC, ic.id DESC
+            ORDER BY ic.timestamp DESC, ic.id DESC
             LIMIT ?
             """,
             (limit,),
@@ -172,7 +727,436 @@ def get_all_analysis_data(limit: int = 30) -> List[Dict[str, Any]]:
     except sqlite3.Error as e:
         raise RuntimeError(f"DB select failed for analysis data: {e}") from e
     finally:
-        conn.close()
+        _release(conn)
+
+def get_detection_class_counts(
+    from_ts: str,
+    to_ts: str,
+    model: Optional[str] = None,
+) -> List[Dict[str, Any]]:
+    """
+    [from_ts, to_ts] 에 촬영된 이미지들의 모델/클래스별 검출 수와 평균·최대 신뢰도.
+    image_capture.timestamp 인덱스로 기간을 좁힌 뒤 ai_detection 의 커버링 인덱스만 읽습니다.
+    """
+    sql = """
+        SELECT d.model, d.class_id, COUNT(*) AS count, COUNT(DISTINCT d.image_id) AS images,
+               AVG(d.confidence) AS mean_confidence, MAX(d.confidence) AS max_confidence
+        FROM image_capture ic
+        JOIN ai_detection d ON d.image_id = ic.id
+        WHERE ic.timestamp >= ? AND ic.timestamp <= ?
+    """
+    params: List[Any] = [from_ts, to_ts]
+    if model:
+        sql += " AND d.model = ?"
+        params.append(model)
+    sql += " GROUP BY d.model, d.class_id ORDER BY d.model, d.class_id"
+    conn = _acquire()
+    try:
+        return [dict(r) for r in conn.execute(sql, params)]
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for detection counts: {e}") from e
+    finally:
+        _release(conn)
+
+# ---------------------------------------------------------------------------
+# 지각 해시 결과 캐시 영속화 (ai_module.result_cache.PerceptualResultCache 용)
+# ---------------------------------------------------------------------------
+
+# SQLite INTEGER 는 부호 있는 64비트이므로 64비트 해시를 부호 있는 값으로 바꿔 저장
+def _to_signed64(v: int) -> int:
+    return v - (1 << 64) if v >= (1 << 63) else v
+
+def _to_unsigned64(v: int) -> int:
+    return v + (1 << 64) if v < 0 else v
+
+def load_result_cache(limit: int) -> List[tuple]:
+    """최근 항목부터 limit 개를 (phash, result, created_at) 리스트로 반환합니다."""
+    conn = _acquire()
+    try:
+        cur = conn.execute(
+            "SELECT phash, result_json, created_at FROM ai_result_cache ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        )
+        return [(_to_unsigned64(r["phash"]), json.loads(r["result_json"]), r["created_at"]) for r in cur]
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for result cache: {e}") from e
+    finally:
+        _release(conn)
+
+def save_result_cache_entry(phash: int, result: Dict[str, Any], created_at: float) -> None:
+    with _write_lock:
+        conn = _acquire()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO ai_result_cache (phash, result_json, created_at) VALUES (?, ?, ?)",
+                (_to_signed64(phash), json.dumps(result, ensure_ascii=False), created_at),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB insert failed for result cache: {e}") from e
+        finally:
+            _release(conn)
+
+def delete_result_cache_entries(phashes: Sequence[int]) -> None:
+    with _write_lock:
+        conn = _acquire()
+        try:
+            conn.executemany("DELETE FROM ai_result_cache WHERE phash = ?", [(_to_signed64(h),) for h in phashes])
+            conn.commit()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB delete failed for result cache: {e}") from e
+        finally:
+            _release(conn)
+
+# ---------------------------------------------------------------------------
+# 작업 스케줄러 상태 (다음 실행 시각, 실행 기록, 단일 실행 임대)
+# 시각은 epoch 초(REAL), 기록용 시각은 TS_FORMAT 텍스트입니다.
+# ---------------------------------------------------------------------------
+
+def get_scheduler_jobs() -> Dict[str, Dict[str, Any]]:
+    conn = _acquire()
+    try:
+        return {r["name"]: dict(r) for r in conn.execute("SELECT * FROM scheduler_job")}
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for scheduler jobs: {e}") from e
+    finally:
+        _release(conn)
+
+def upsert_scheduler_job(name: str, spec: str, next_run: float) -> None:
+    """작업을 등록합니다. 일정(spec)이 바뀐 경우에만 next_run 을 새로 계산한 값으로 덮어씁니다."""
+    with _write_lock:
+        conn = _acquire()
+        try:
+            conn.execute(
+                """
+                INSERT INTO scheduler_job (name, spec, next_run) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET spec = excluded.spec, next_run = excluded.next_run
+                WHERE scheduler_job.spec IS NOT excluded.spec
+                """,
+                (name, spec, next_run),
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB upsert failed for scheduler job: {e}") from e
+        finally:
+            _release(conn)
+
+def claim_scheduler_job(name: str, expected_next_run: float, next_run: float) -> bool:
+    """
+    next_run 이 아직 expected_next_run 일 때만 다음 시각으로 옮기고 요청 표시를 지웁니다. (compare-and-set)
+    임대가 넘어가는 순간에도 같은 회차를 두 프로세스가 실행하지 않도록 합니다.
+    """
+    with _write_lock:
+        conn = _acquire()
+        try:
+            cur = conn.execute(
+                "UPDATE scheduler_job SET next_run = ?, requested = 0 WHERE name = ? AND next_run = ?",
+                (next_run, name, expected_next_run),
+            )
+            conn.commit()
+            return cur.rowcount == 1
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB update failed for scheduler job: {e}") from e
+        finally:
+            _release(conn)
+
+def request_scheduler_run(name: str, now: float) -> bool:
+    """작업을 바로 실행하도록 요청합니다. (임대를 가진 프로세스가 다음 tick 에 실행) 없는 작업이면 False."""
+    with _write_lock:
+        conn = _acquire()
+        try:
+            cur = conn.execute(
+                "UPDATE scheduler_job SET requested = 1, next_run = MIN(next_run, ?) WHERE name = ?", (now, name)
+            )
+            conn.commit()
+            return cur.rowcount == 1
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB update failed for scheduler job: {e}") from e
+        finally:
+            _release(conn)
+
+def record_scheduler_run(
+    name: str,
+    trigger: str,
+    owner: str,
+    started_at: str,
+    duration_ms: float,
+    status: str,
+    error: Optional[str] = None,
+    history: int = 200,
+) -> None:
+    """실행 결과를 scheduler_run 에 남기고 작업의 마지막 실행 정보를 갱신합니다. (작업별 최근 history 건 유지)"""
+    with _write_lock:
+        conn = _acquire()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO scheduler_run (job, trigger, owner, started_at, duration_ms, status, error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (name, trigger, owner, started_at, duration_ms, status, error),
+                )
+                conn.execute(
+                    """
+                    UPDATE scheduler_job
+                    SET last_started = ?, last_duration_ms = ?, last_status = ?, last_error = ?, run_count = run_count + 1
+                    WHERE name = ?
+                    """,
+                    (started_at, duration_ms, status, error, name),
+                )
+                conn.execute(
+                    """
+                    DELETE FROM scheduler_run WHERE job = ? AND id <= (
+                        SELECT id FROM scheduler_run WHERE job = ? ORDER BY id DESC LIMIT 1 OFFSET ?
+                    )
+                    """,
+                    (name, name, int(history)),
+                )
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB insert failed for scheduler run: {e}") from e
+        finally:
+            _release(conn)
+
+def get_scheduler_runs(name: Optional[str] = None, limit: int = 20) -> List[Dict[str, Any]]:
+    conn = _acquire()
+    try:
+        if name:
+            cur = conn.execute("SELECT * FROM scheduler_run WHERE job = ? ORDER BY id DESC LIMIT ?", (name, limit))
+        else:
+            cur = conn.execute("SELECT * FROM scheduler_run ORDER BY id DESC LIMIT ?", (limit,))
+        return [dict(r) for r in cur]
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for scheduler runs: {e}") from e
+    finally:
+        _release(conn)
+
+def claim_scheduler_lease(name: str, owner: str, ttl: float, now: float) -> bool:
+    """
+    임대(lease)를 얻거나 연장합니다. 다른 소유자의 임대가 아직 유효하면 False.
+    여러 gunicorn 워커/프로세스 중 임대를 가진 하나만 작업을 실행합니다.
+    """
+    with _write_lock:
+        conn = _acquire()
+        try:
+            cur = conn.execute(
+                """
+                INSERT INTO scheduler_lease (name, owner, expires_at) VALUES (?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                WHERE scheduler_lease.owner = excluded.owner OR scheduler_lease.expires_at < ?
+                """,
+                (name, owner, now + ttl, now),
+            )
+            conn.commit()
+            return cur.rowcount == 1
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB upsert failed for scheduler lease: {e}") from e
+        finally:
+            _release(conn)
+
+def release_scheduler_lease(name: str, owner: str) -> None:
+    with _write_lock:
+        conn = _acquire()
+        try:
+            conn.execute("DELETE FROM scheduler_lease WHERE name = ? AND owner = ?", (name, owner))
+            conn.commit()
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB delete failed for scheduler lease: {e}") from e
+        finally:
+            _release(conn)
+
+def get_scheduler_lease(name: str) -> Optional[Dict[str, Any]]:
+    conn = _acquire()
+    try:
+        row = conn.execute("SELECT * FROM scheduler_lease WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for scheduler lease: {e}") from e
+    finally:
+        _release(conn)
+
+# ---------------------------------------------------------------------------
+# AI 분석 작업 상태 (ai_module.inference_queue.InferenceJobQueue 용)
+# 작업을 받은 워커가 아니어도 /api/jobs/<id> 에 답할 수 있도록 상태가 바뀔 때마다 저장합니다.
+# ---------------------------------------------------------------------------
+
+def save_inference_job(job: Dict[str, Any], history: int = 500) -> None:
+    """
+    작업 상태를 저장합니다. 상태는 queued -> running -> done/failed 로만 진행하므로, 제출 스레드의 queued 저장이
+    워커의 running/done 저장보다 늦게 도착해도 덮어쓰지 않습니다. 끝난 작업이면 최근 history 건만 남기고 정리합니다.
+    """
+    finished = job.get("finished_at") is not None
+    with _write_lock:
+        conn = _acquire()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO inference_job (id, status, submitted_at, started_at, finished_at, result_json, error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT(id) DO UPDATE SET
+                        status = excluded.status, started_at = excluded.started_at,
+                        finished_at = excluded.finished_at, result_json = excluded.result_json, error = excluded.error
+                    WHERE inference_job.status = 'queued'
+                       OR (inference_job.status = 'running' AND excluded.status IN ('done', 'failed'))
+                    """,
+                    (job["id"], job["status"], job["submitted_at"], job.get("started_at"), job.get("finished_at"),
+                     json.dumps(job["result"], ensure_ascii=False) if job.get("result") is not None else None,
+                     job.get("error")),
+                )
+                if finished:
+                    conn.execute(
+                        """
+                        DELETE FROM inference_job WHERE finished_at < (
+                            SELECT finished_at FROM inference_job WHERE finished_at IS NOT NULL
+                            ORDER BY finished_at DESC LIMIT 1 OFFSET ?
+                        )
+                        """,
+                        (max(1, int(history)) - 1,),
+                    )
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB upsert failed for inference job: {e}") from e
+        finally:
+            _release(conn)
+
+def get_inference_job(job_id: str) -> Optional[Dict[str, Any]]:
+    conn = _acquire()
+    try:
+        row = conn.execute("SELECT * FROM inference_job WHERE id = ?", (job_id,)).fetchone()
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for inference job: {e}") from e
+    finally:
+        _release(conn)
+    if row is None:
+        return None
+    job = dict(row)
+    result_json = job.pop("result_json")
+    job["result"] = json.loads(result_json) if result_json else None
+    return job
+
+# ---------------------------------------------------------------------------
+# 센서 규칙 엔진 (rule_engine.RuleEvaluator 용)
+# 임대를 가진 한 프로세스가 커밋된 sensor_data 행을 id 순으로 평가하고, 이벤트/엔진 상태를 저장해
+# 다른 워커도 /api/stream, /api/rules 로 전달/조회합니다.
+# ---------------------------------------------------------------------------
+
+def get_max_sensor_id() -> int:
+    conn = _acquire()
+    try:
+        return conn.execute("SELECT COALESCE(MAX(id), 0) FROM sensor_data").fetchone()[0]
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for sensor max id: {e}") from e
+    finally:
+        _release(conn)
+
+def get_first_sensor_id_since(after_id: int, since: str) -> Optional[int]:
+    """id 가 after_id 보다 크고 timestamp 가 since(TS_FORMAT, UTC) 이후인 첫 행의 id. 없으면 None."""
+    conn = _acquire()
+    try:
+        return conn.execute(
+            "SELECT MIN(id) FROM sensor_data WHERE id > ? AND timestamp >= ?", (after_id, since)
+        ).fetchone()[0]
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for sensor id: {e}") from e
+    finally:
+        _release(conn)
+
+def get_sensor_rows_after(after_id: int, limit: int = 1000) -> List[Dict[str, Any]]:
+    """id 가 after_id 보다 큰 센서 행을 id 오름차순(커밋 순서)으로 최대 limit 건 반환합니다."""
+    conn = _acquire()
+    try:
+        rows = conn.execute(
+            f"SELECT id, timestamp, {', '.join(SENSOR_FIELDS)} FROM sensor_data WHERE id > ? ORDER BY id LIMIT ?",
+            (after_id, max(1, int(limit))),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for sensor rows: {e}") from e
+    finally:
+        _release(conn)
+
+_rule_follower = _CommitFollower(
+    "rule", "rule_event",
+    "SELECT id, event_json FROM rule_event WHERE id > ? ORDER BY id",
+    lambda r: {**json.loads(r["event_json"]), "id": r["id"]},
+    "id",
+)
+
+def save_rule_event(event: Dict[str, Any], history: int = 200) -> int:
+    """규칙 이벤트를 저장하고 구독자에게 발행합니다. 최근 history 건만 남깁니다."""
+    with _write_lock:
+        conn = _acquire()
+        try:
+            with conn:
+                event_id = conn.execute(
+                    "INSERT INTO rule_event (rule, state, event_json) VALUES (?, ?, ?)",
+                    (event["rule"], event["state"], json.dumps(event, ensure_ascii=False)),
+                ).lastrowid
+                conn.execute("DELETE FROM rule_event WHERE id <= ?", (event_id - max(1, int(history)),))
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB insert failed for rule event: {e}") from e
+        finally:
+            _release(conn)
+    _rule_follower.advance(event_id, {**event, "id": event_id})
+    return event_id
+
+def get_rule_events(limit: int = 50) -> List[Dict[str, Any]]:
+    """최근 규칙 이벤트 (최신순)."""
+    conn = _acquire()
+    try:
+        rows = conn.execute(
+            "SELECT id, event_json FROM rule_event ORDER BY id DESC LIMIT ?", (max(1, int(limit)),)
+        ).fetchall()
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for rule events: {e}") from e
+    finally:
+        _release(conn)
+    return [{**json.loads(r["event_json"]), "id": r["id"]} for r in rows]
+
+def sync_rule_events() -> int:
+    """다른 프로세스(규칙을 평가하는 워커)가 저장한 새 규칙 이벤트를 구독자에게 발행합니다."""
+    return _rule_follower.sync()
+
+def save_rule_engine_state(owner: str, cursor: int, status: Dict[str, Any], state: Dict[str, Any],
+                           now: float) -> None:
+    """
+    평가를 맡은 프로세스의 엔진 상태를 저장합니다.
+    status: /api/rules 로 보여줄 값, state: 이어서 평가하기 위한 값 (RuleEngine.export_state), cursor: 마지막으로 평가한 행 id
+    """
+    with _write_lock:
+        conn = _acquire()
+        try:
+            with conn:
+                conn.execute(
+                    """
+                    INSERT INTO rule_engine_state (name, owner, updated_at, cursor, status_json, state_json)
+                    VALUES ('rules', ?, ?, ?, ?, ?)
+                    ON CONFLICT(name) DO UPDATE SET
+                        owner = excluded.owner, updated_at = excluded.updated_at, cursor = excluded.cursor,
+                        status_json = excluded.status_json, state_json = excluded.state_json
+                    """,
+                    (owner, now, cursor, json.dumps(status, ensure_ascii=False, allow_nan=False),
+                     json.dumps(state, allow_nan=False)),
+                )
+        except sqlite3.Error as e:
+            raise RuntimeError(f"DB upsert failed for rule engine state: {e}") from e
+        finally:
+            _release(conn)
+
+def get_rule_engine_state() -> Optional[Dict[str, Any]]:
+    conn = _acquire()
+    try:
+        row = conn.execute("SELECT * FROM rule_engine_state WHERE name = 'rules'").fetchone()
+    except sqlite3.Error as e:
+        raise RuntimeError(f"DB select failed for rule engine state: {e}") from e
+    finally:
+        _release(conn)
+    if row is None:
+        return None
+    state = dict(row)
+    state["status"] = json.loads(state.pop("status_json"))
+    state["state"] = json.loads(state.pop("state_json"))
+    return state
 
 # ---------------------------------------------------------------------------
 # ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼ 기존 함수 (대체됨) ▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼▼
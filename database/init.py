@@ -1,15 +1,27 @@
 # database/init.py (개선된 버전)
 
+from contextlib import contextmanager
 from pathlib import Path
+import os
+import queue
+import re
 import sqlite3
-from typing import Optional
+import threading
+from typing import Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+import metrics
 
 DB_PATH: Optional[str] = None
 
-# ... (set_db_path, _resolve_db_path, connect 함수는 이전과 동일) ...
 def set_db_path(path: str) -> None:
     global DB_PATH
     DB_PATH = path
+    close_pool()
 
 def _resolve_db_path() -> str:
     if DB_PATH:
@@ -20,15 +32,171 @@ def _resolve_db_path() -> str:
     except Exception:
         return "database.db"
 
+def _cfg(name: str, default):
+    try:
+        import config
+        return getattr(config, name, default)
+    except Exception:
+        return default
+
+def _apply_pragmas(conn: sqlite3.Connection) -> None:
+    """연결 1개당 한 번만 적용하는 성능/일관성 PRAGMA."""
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute(f"PRAGMA busy_timeout = {int(_cfg('DB_BUSY_TIMEOUT_MS', 5000))};")
+    # 새 DB 파일은 처음부터 incremental vacuum 가능하게 (이미 테이블이 있으면 효과 없음, archive 가 1회 전환)
+    conn.execute("PRAGMA auto_vacuum = INCREMENTAL;")
+    # WAL: 읽기와 쓰기가 서로를 막지 않음 (DB 파일 단위로 유지되는 설정)
+    conn.execute("PRAGMA journal_mode = WAL;")
+    # WAL 에서는 NORMAL 이어도 손상 없이 안전, 커밋마다 fsync 하지 않음
+    conn.execute("PRAGMA synchronous = NORMAL;")
+    conn.execute(f"PRAGMA mmap_size = {int(_cfg('DB_MMAP_SIZE', 256 * 1024 * 1024))};")
+    # 음수 값은 KiB 단위
+    conn.execute(f"PRAGMA cache_size = -{int(_cfg('DB_CACHE_SIZE_KB', 16 * 1024))};")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+
 def connect() -> sqlite3.Connection:
+    """풀과 무관한 새 연결 (관리 작업용). 사용 후 직접 close() 해야 합니다."""
     path = _resolve_db_path()
     Path(path).parent.mkdir(parents=True, exist_ok=True)
     conn = sqlite3.connect(path, check_same_thread=False)
     conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
+    _apply_pragmas(conn)
     return conn
 
 
+# ---------------------------------------------------------------------------
+# 스레드 안전 연결 풀
+# ---------------------------------------------------------------------------
+
+class ConnectionPool:
+    """
+    열린 연결을 재사용하는 간단한 풀.
+    한 연결은 한 번에 한 스레드만 빌려 쓰며, 풀이 비어 있으면 임시 연결을 새로 엽니다.
+    """
+
+    def __init__(self, size: int) -> None:
+        self.size = max(1, int(size))
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=self.size)
+        self._closed = False
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            metrics.DB_CONNECTIONS_OPENED.inc()
+            return connect()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        if conn.in_transaction:
+            conn.rollback()
+        if self._closed:
+            conn.close()
+            return
+        try:
+            self._idle.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+    def close(self) -> None:
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+_pool: Optional[ConnectionPool] = None
+_pool_lock = threading.Lock()
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(_cfg("DB_POOL_SIZE", 5))
+    return _pool
+
+def close_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+            _pool = None
+
+# ---------------------------------------------------------------------------
+# 프로세스 간 쓰기 잠금 (멀티 워커 서버)
+# ---------------------------------------------------------------------------
+
+class ProcessWriteLock:
+    """
+    같은 DB 파일에 쓰는 모든 프로세스/스레드를 한 줄로 세우는 재진입 가능 잠금.
+    스레드끼리는 RLock, 프로세스끼리는 '<DB 경로>-writelock' 파일의 flock 으로 막습니다.
+    SQLite 의 busy_timeout 재시도(점점 길어지는 sleep)와 달리 잠금이 풀리는 즉시 다음 쓰기가 들어가므로
+    워커가 여러 개여도 쓰기가 몰릴 때 'database is locked' 없이 순서대로 처리됩니다.
+    flock 이 없는 플랫폼(Windows)에서는 프로세스 내 잠금으로만 동작합니다.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._fd: Optional[int] = None
+        self._fd_key: Optional[tuple] = None
+
+    def _lock_fd(self) -> int:
+        # fork 한 자식은 부모의 fd 를 물려받지만 flock 은 열린 파일 단위라 공유되므로 프로세스마다 새로 엽니다.
+        key = (os.getpid(), _resolve_db_path())
+        if self._fd_key != key:
+            if self._fd is not None:
+                os.close(self._fd)
+            path = key[1] + "-writelock"
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+            self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+            self._fd_key = key
+        return self._fd
+
+    def acquire(self) -> bool:
+        self._lock.acquire()
+        if self._depth == 0 and fcntl is not None:
+            try:
+                fcntl.flock(self._lock_fd(), fcntl.LOCK_EX)
+            except BaseException:
+                self._lock.release()
+                raise
+        self._depth += 1
+        return True
+
+    def release(self) -> None:
+        self._depth -= 1
+        if self._depth == 0 and fcntl is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+        self._lock.release()
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+
+write_lock = ProcessWriteLock()
+
+
+@contextmanager
+def pooled_connection() -> Iterator[sqlite3.Connection]:
+    """
+    풀에서 연결을 빌려주고, 블록이 끝나면 되돌려 놓습니다.
+    커밋은 호출 측 책임이며, 커밋되지 않은 트랜잭션은 반납 시 롤백됩니다.
+    """
+    pool = get_pool()
+    conn = pool.acquire()
+    try:
+        yield conn
+    finally:
+        pool.release(conn)
+
+
 def create_tables() -> None:
     sql_sensor = """
     CREATE TABLE IF NOT EXISTS sensor_data (
@@ -42,14 +210,15 @@ def create_tables() -> None:
     );
     """
 
+    # 촬영 1회 = 1행. 같은 이미지를 다시 찍으면 file_path(내용 주소)와 content_hash 가 같은 행이 또 생김
     sql_img = """
     CREATE TABLE IF NOT EXISTS image_capture (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-        file_path TEXT NOT NULL UNIQUE
+        file_path TEXT NOT NULL,
+        content_hash TEXT
     );
     """
-    #                       ▲▲▲▲▲▲ (개선) UNIQUE 제약 조건 추가
 
     sql_ai = """
     CREATE TABLE IF NOT EXISTS ai_result (
@@ -57,18 +226,20 @@ def create_tables() -> None:
         image_id INTEGER NOT NULL,
         ripeness_score REAL,
         flower_count INTEGER,
-    #   ▲▲▲▲▲▲▲▲▲▲▲▲ (개선) score -> count, REAL -> INTEGER 로 변경
+        -- (개선) score -> count, REAL -> INTEGER 로 변경
         ripeness_text TEXT,
         flower_text TEXT,
         created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
         FOREIGN KEY(image_id) REFERENCES image_capture(id) ON DELETE CASCADE
     );
     """
-    idx_sensor_ts = "CREATE INDEX IF NOT EXISTS idx_sensor_timestamp ON sensor_data (timestamp DESC);"
-    idx_img_ts = "CREATE INDEX IF NOT EXISTS idx_image_timestamp ON image_capture (timestamp DESC);"
+    # 오름차순 (timestamp, rowid) 인덱스를 역방향으로 읽으면 'timestamp DESC, id DESC' 정렬과 일치
+    idx_sensor_ts = "CREATE INDEX IF NOT EXISTS idx_sensor_timestamp ON sensor_data (timestamp);"
+    idx_img_ts = "CREATE INDEX IF NOT EXISTS idx_image_timestamp ON image_capture (timestamp);"
     idx_ai_img = "CREATE INDEX IF NOT EXISTS idx_ai_image_id ON ai_result (image_id);"
 
-    with connect() as conn:
+    # 워커 여러 개가 동시에 시작해도 마이그레이션은 한 프로세스씩 (나머지는 이미 적용된 버전을 보고 건너뜀)
+    with write_lock, pooled_connection() as conn:
         conn.execute(sql_sensor)
         conn.execute(sql_img)
         conn.execute(sql_ai)
@@ -76,31 +247,389 @@ def create_tables() -> None:
         conn.execute(idx_img_ts)
         conn.execute(idx_ai_img)
         conn.commit()
+        migrate(conn)
+
+# ---------------------------------------------------------------------------
+# 스키마 마이그레이션 (PRAGMA user_version 으로 적용 여부 기록)
+# ---------------------------------------------------------------------------
+
+# 모든 timestamp 는 UTC 'YYYY-MM-DD HH:MM:SS' 고정 형식 텍스트로 저장합니다.
+# 이 형식은 문자열 비교 = 시간 비교이므로 datetime() 으로 감싸지 않고
+# 컬럼을 그대로 비교/정렬할 수 있어 timestamp 인덱스를 사용할 수 있습니다.
+TIMESTAMP_TABLES = ("sensor_data", "image_capture")
+
+def _migrate_v1_canonical_timestamps(conn: sqlite3.Connection) -> None:
+    """ISO 'T' 구분자, 소수초, 타임존 오프셋 등이 섞인 기존 값을 고정 형식으로 정규화."""
+    for table in TIMESTAMP_TABLES:
+        conn.execute(
+            f"""
+            UPDATE {table}
+            SET timestamp = datetime(timestamp)
+            WHERE timestamp IS NOT NULL
+              AND datetime(timestamp) IS NOT NULL
+              AND timestamp IS NOT datetime(timestamp)
+            """
+        )
+    # 기존 (timestamp DESC) 인덱스는 'timestamp DESC, id DESC' 정렬에 쓰이지 못하므로 재생성
+    conn.execute("DROP INDEX IF EXISTS idx_sensor_timestamp")
+    conn.execute("CREATE INDEX idx_sensor_timestamp ON sensor_data (timestamp)")
+    conn.execute("DROP INDEX IF EXISTS idx_image_timestamp")
+    conn.execute("CREATE INDEX idx_image_timestamp ON image_capture (timestamp)")
+
+# ---------------------------------------------------------------------------
+# 센서 롤업(다운샘플링) 테이블: 분/시/일 단위 min, max, sum, count, last
+# sensor_data INSERT 트리거로 같은 트랜잭션 안에서 증분 갱신됩니다.
+# ---------------------------------------------------------------------------
+
+SENSOR_FIELDS = ("soil_moisture", "air_temperature", "air_humidity", "light_intensity", "water_level")
+
+# resolution -> (테이블명, 버킷 strftime 형식, 버킷 길이(초))
+ROLLUP_RESOLUTIONS = {
+    "minute": ("sensor_rollup_minute", "%Y-%m-%d %H:%M:00", 60),
+    "hour": ("sensor_rollup_hour", "%Y-%m-%d %H:00:00", 3600),
+    "day": ("sensor_rollup_day", "%Y-%m-%d 00:00:00", 86400),
+}
+ROLLUP_STATS = ("min", "max", "sum", "count", "last")
+
+def _rollup_columns() -> list:
+    return [f"{f}_{stat}" for f in SENSOR_FIELDS for stat in ROLLUP_STATS]
+
+def _rollup_upsert_sql(table: str, bucket_fmt: str, row: str) -> str:
+    """
+    한 행(row 접두어: 'NEW.' 또는 '')을 롤업 버킷에 누적하는 UPSERT 문.
+    NULL 측정값은 min/max/last 를 바꾸지 않고 count 에도 포함되지 않습니다.
+    """
+    values = []
+    updates = []
+    for f in SENSOR_FIELDS:
+        v = f"{row}{f}"
+        values += [v, v, f"coalesce({v}, 0)", f"({v} IS NOT NULL)", v]
+        updates += [
+            f"{f}_min = coalesce(min({f}_min, excluded.{f}_min), {f}_min, excluded.{f}_min)",
+            f"{f}_max = coalesce(max({f}_max, excluded.{f}_max), {f}_max, excluded.{f}_max)",
+            f"{f}_sum = {f}_sum + excluded.{f}_sum",
+            f"{f}_count = {f}_count + excluded.{f}_count",
+            f"{f}_last = coalesce(excluded.{f}_last, {f}_last)",
+        ]
+    cols = ", ".join(["bucket"] + _rollup_columns())
+    vals = ", ".join([f"strftime('{bucket_fmt}', {row}timestamp)"] + values)
+    if row:
+        source = f"VALUES ({vals})"
+    else:
+        # 기존 데이터 백필: id 순으로 재생하여 트리거와 동일한 결과(last 포함)를 만듭니다.
+        source = f"SELECT {vals} FROM sensor_data WHERE timestamp IS NOT NULL ORDER BY id"
+    return (
+        f"INSERT INTO {table} ({cols}) {source} "
+        f"ON CONFLICT(bucket) DO UPDATE SET {', '.join(updates)}"
+    )
+
+def _migrate_v2_sensor_rollups(conn: sqlite3.Connection) -> None:
+    for table, bucket_fmt, _ in ROLLUP_RESOLUTIONS.values():
+        stat_cols = []
+        for f in SENSOR_FIELDS:
+            stat_cols += [f"{f}_min REAL", f"{f}_max REAL", f"{f}_sum REAL NOT NULL DEFAULT 0",
+                          f"{f}_count INTEGER NOT NULL DEFAULT 0", f"{f}_last REAL"]
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (bucket TEXT PRIMARY KEY, {', '.join(stat_cols)}) WITHOUT ROWID"
+        )
+        conn.execute(f"DELETE FROM {table}")
+        conn.execute(_rollup_upsert_sql(table, bucket_fmt, ""))
+        conn.execute(
+            f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{table}
+            AFTER INSERT ON sensor_data
+            WHEN NEW.timestamp IS NOT NULL
+            BEGIN
+                {_rollup_upsert_sql(table, bucket_fmt, "NEW.")};
+            END
+            """
+        )
+
+def _migrate_v3_ai_result_cache(conn: sqlite3.Connection) -> None:
+    """지각 해시 결과 캐시 테이블 + 캐시 적중 여부 컬럼."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_result_cache (
+            phash INTEGER PRIMARY KEY,
+            result_json TEXT NOT NULL,
+            created_at REAL NOT NULL
+        )
+        """
+    )
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(ai_result)")}
+    if "cached" not in cols:
+        conn.execute("ALTER TABLE ai_result ADD COLUMN cached INTEGER NOT NULL DEFAULT 0")
+
+def _migrate_v4_ai_detection(conn: sqlite3.Connection) -> None:
+    """모델 검출 박스 전체를 보관하는 테이블. 좌표는 원본 이미지 픽셀 기준."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS ai_detection (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            image_id INTEGER NOT NULL,
+            model TEXT NOT NULL,
+            class_id INTEGER NOT NULL,
+            confidence REAL NOT NULL,
+            x1 REAL, y1 REAL, x2 REAL, y2 REAL,
+            FOREIGN KEY(image_id) REFERENCES image_capture(id) ON DELETE CASCADE
+        )
+        """
+    )
+    # 기간별 클래스 집계: image_capture(timestamp) 범위 -> 이 인덱스만으로 집계 (테이블 접근 없음)
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_detection_image_class "
+        "ON ai_detection (image_id, model, class_id, confidence)"
+    )
+
+def _migrate_v5_ai_result_summary(conn: sqlite3.Connection) -> None:
+    """모델별 클래스 요약(개수, 최대/평균 신뢰도)을 JSON 으로 ai_result 에 보관."""
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(ai_result)")}
+    if "summary_json" not in cols:
+        conn.execute("ALTER TABLE ai_result ADD COLUMN summary_json TEXT")
+
+def _migrate_v6_scheduler(conn: sqlite3.Connection) -> None:
+    """백그라운드 작업 스케줄러: 작업별 다음 실행 시각, 실행 기록, 단일 실행 임대(lease)."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scheduler_job (
+            name TEXT PRIMARY KEY,
+            spec TEXT NOT NULL,
+            next_run REAL NOT NULL,
+            requested INTEGER NOT NULL DEFAULT 0,
+            last_started TEXT,
+            last_duration_ms REAL,
+            last_status TEXT,
+            last_error TEXT,
+            run_count INTEGER NOT NULL DEFAULT 0
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scheduler_run (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            job TEXT NOT NULL,
+            trigger TEXT NOT NULL,
+            owner TEXT,
+            started_at TEXT NOT NULL,
+            duration_ms REAL,
+            status TEXT NOT NULL,
+            error TEXT
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_scheduler_run_job ON scheduler_run (job, id)")
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS scheduler_lease (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        )
+        """
+    )
+
+def _migrate_v7_inference_job(conn: sqlite3.Connection) -> None:
+    """AI 분석 작업 상태: 멀티 워커에서 작업을 받은 워커가 아니어도 /api/jobs/<id> 에 답할 수 있도록 저장."""
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS inference_job (
+            id TEXT PRIMARY KEY,
+            status TEXT NOT NULL,
+            submitted_at REAL NOT NULL,
+            started_at REAL,
+            finished_at REAL,
+            result_json TEXT,
+            error TEXT
+        )
+        """
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_inference_job_finished ON inference_job (finished_at)")
+
+def _migrate_v8_rule_events(conn: sqlite3.Connection) -> None:
+    """
+    규칙 엔진: 임대를 가진 한 프로세스만 평가하므로, 발생/해제 이벤트와 엔진 상태를 저장해
+    다른 워커도 /api/stream, /api/rules 로 전달/조회하고, 임대를 넘겨받은 프로세스가 이어서 평가할 수 있게 함.
+    (cursor: 마지막으로 평가한 sensor_data.id, state_json: 규칙/필드별 평가 상태)
+    """
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rule_event (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+            rule TEXT NOT NULL,
+            state TEXT NOT NULL,
+            event_json TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS rule_engine_state (
+            name TEXT PRIMARY KEY,
+            owner TEXT NOT NULL,
+            updated_at REAL NOT NULL,
+            cursor INTEGER NOT NULL,
+            status_json TEXT NOT NULL,
+            state_json TEXT NOT NULL
+        )
+        """
+    )
+
+def _migrate_v9_legacy_columns(conn: sqlite3.Connection) -> None:
+    """
+    초기 스키마로 만든 DB(ai_result.flower_score, UNIQUE 가 없는 image_capture.file_path)를 현재 스키마에 맞춤.
+    같은 file_path 의 중복 image_capture 행은 가장 작은 id 로 합치고(결과/검출은 그 행으로 옮김) UNIQUE 인덱스를 만듭니다.
+    """
+    cols = {r[1] for r in conn.execute("PRAGMA table_info(ai_result)")}
+    if "flower_score" in cols and "flower_count" not in cols:
+        conn.execute("ALTER TABLE ai_result RENAME COLUMN flower_score TO flower_count")
+
+    unique_cols = set()
+    for index in conn.execute("PRAGMA index_list(image_capture)").fetchall():
+        if index["unique"]:
+            unique_cols |= {tuple(r["name"] for r in conn.execute(f"PRAGMA index_info({index['name']})"))}
+    if ("file_path",) in unique_cols:
+        return
+    conn.execute(
+        """
+        CREATE TEMP TABLE image_capture_dup AS
+        SELECT id, (SELECT min(k.id) FROM image_capture k WHERE k.file_path = i.file_path) AS keep_id
+        FROM image_capture i
+        WHERE id <> (SELECT min(k.id) FROM image_capture k WHERE k.file_path = i.file_path)
+        """
+    )
+    for table in ("ai_result", "ai_detection"):
+        conn.execute(
+            f"""
+            UPDATE {table}
+            SET image_id = (SELECT keep_id FROM image_capture_dup d WHERE d.id = {table}.image_id)
+            WHERE image_id IN (SELECT id FROM image_capture_dup)
+            """
+        )
+    # 결과를 모두 옮긴 뒤라 ON DELETE CASCADE 로 지워지는 행은 없음
+    conn.execute("DELETE FROM image_capture WHERE id IN (SELECT id FROM image_capture_dup)")
+    conn.execute("DROP TABLE image_capture_dup")
+    conn.execute("CREATE UNIQUE INDEX idx_image_file_path ON image_capture (file_path)")
+
+_SHA256_HEX = re.compile(r"[0-9a-f]{64}")
+
+def _content_hash_of(file_path: str) -> Optional[str]:
+    """내용 주소 경로('sha256:<hex>' 또는 '<dir>/<hex>.<ext>')에서 sha256 을 꺼냄. 아니면 None."""
+    name = file_path[len("sha256:"):] if file_path.startswith("sha256:") else os.path.splitext(os.path.basename(file_path))[0]
+    return name if _SHA256_HEX.fullmatch(name) else None
+
+def _migrate_v10_capture_per_row(conn: sqlite3.Connection) -> None:
+    """
+    image_capture 를 촬영마다 한 행으로: file_path 의 UNIQUE 를 없애고 내용 해시는 중복 가능한 content_hash 컬럼에 둡니다.
+    (같은 내용 주소 행을 재사용하면 새 결과가 예전 촬영 시각을 갖게 되어 보관 기간 정리에서 함께 지워짐)
+    테이블에 직접 선언된 UNIQUE 는 지울 수 없으므로 테이블을 다시 만듭니다. (migrate 가 외래 키 검사를 끈 상태에서 실행)
+    """
+    autoindex = any(
+        index["origin"] == "u" for index in conn.execute("PRAGMA index_list(image_capture)").fetchall()
+    )
+    if autoindex:
+        conn.execute(
+            """
+            CREATE TABLE image_capture_new (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+                file_path TEXT NOT NULL,
+                content_hash TEXT
+            )
+            """
+        )
+        conn.execute("INSERT INTO image_capture_new (id, timestamp, file_path) SELECT id, timestamp, file_path FROM image_capture")
+        conn.execute("DROP TABLE image_capture")
+        conn.execute("ALTER TABLE image_capture_new RENAME TO image_capture")
+    else:
+        conn.execute("DROP INDEX IF EXISTS idx_image_file_path")
+        cols = {r[1] for r in conn.execute("PRAGMA table_info(image_capture)")}
+        if "content_hash" not in cols:
+            conn.execute("ALTER TABLE image_capture ADD COLUMN content_hash TEXT")
+    rows = conn.execute("SELECT id, file_path FROM image_capture WHERE content_hash IS NULL").fetchall()
+    conn.executemany(
+        "UPDATE image_capture SET content_hash = ? WHERE id = ?",
+        ((h, r["id"]) for r in rows if (h := _content_hash_of(r["file_path"])) is not None),
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_image_timestamp ON image_capture (timestamp)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_image_file_path ON image_capture (file_path)")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_image_content_hash ON image_capture (content_hash)")
+
+_MIGRATIONS = (
+    (1, _migrate_v1_canonical_timestamps),
+    (2, _migrate_v2_sensor_rollups),
+    (3, _migrate_v3_ai_result_cache),
+    (4, _migrate_v4_ai_detection),
+    (5, _migrate_v5_ai_result_summary),
+    (6, _migrate_v6_scheduler),
+    (7, _migrate_v7_inference_job),
+    (8, _migrate_v8_rule_events),
+    (9, _migrate_v9_legacy_columns),
+    (10, _migrate_v10_capture_per_row),
+)
+
+def migrate(conn: sqlite3.Connection) -> int:
+    """
+    아직 적용되지 않은 마이그레이션을 순서대로 적용하고 최종 버전을 반환합니다.
+    테이블을 다시 만드는 단계가 ON DELETE CASCADE 를 일으키지 않도록 외래 키 검사를 끄고 적용한 뒤,
+    끝에서 참조 무결성을 확인합니다. (foreign_keys 는 트랜잭션 밖에서만 바꿀 수 있음)
+    """
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version >= _MIGRATIONS[-1][0]:
+        return version
+    conn.execute("PRAGMA foreign_keys = OFF")
+    try:
+        # 마이그레이션 전부터 있던 위반(외래 키 검사 없이 쓰인 옛 DB)은 문제 삼지 않음
+        known = {tuple(r) for r in conn.execute("PRAGMA foreign_key_check")}
+        for target, step in _MIGRATIONS:
+            if version >= target:
+                continue
+            # DDL 도 같은 트랜잭션에 넣어 단계가 중간에 실패하면 통째로 되돌림 (sqlite3 는 DDL 앞에서 BEGIN 하지 않음)
+            conn.execute("BEGIN")
+            with conn:
+                step(conn)
+                broken = [tuple(r) for r in conn.execute("PRAGMA foreign_key_check") if tuple(r) not in known]
+                if broken:
+                    raise sqlite3.IntegrityError(f"migration {target} broke foreign keys: {broken[:5]}")
+                conn.execute(f"PRAGMA user_version = {int(target)}")
+            version = target
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON")
+    return version
 
 def init_db(drop_all: bool = False) -> None:
-    # ... (이전과 동일) ...
-    with connect() as conn:
-        cur = conn.cursor()
-        if drop_all:
-            cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
-            for (tname,) in cur.fetchall():
-                cur.execute(f"DROP TABLE IF EXISTS {tname}")
-            conn.commit()
-            cur.execute("VACUUM")
-            conn.commit()
+    if drop_all:
+        close_pool()
+        with write_lock:
+            conn = connect()
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT name FROM sqlite_master WHERE type='table' AND name NOT LIKE 'sqlite_%'")
+                for (tname,) in cur.fetchall():
+                    cur.execute(f"DROP TABLE IF EXISTS {tname}")
+                cur.execute("PRAGMA user_version = 0")
+                conn.commit()
+                cur.execute("VACUUM")
+                conn.commit()
+            finally:
+                conn.close()
     create_tables()
 
 # (개선) 어떤 테이블이든 정리할 수 있도록 함수 일반화
 def clean_old_records(table_name: str, retention_days: int) -> int:
-    """지정된 테이블에서 retention_days보다 오래된 레코드를 삭제합니다."""
+    """
+    지정된 테이블에서 retention_days보다 오래된 레코드를 삭제합니다.
+    sensor_rollup_* 테이블은 INSERT 트리거로만 갱신되므로 원본을 지워도 장기 이력은 남습니다.
+    """
     # 테이블 이름에 허용되지 않는 문자가 있는지 간단히 확인 (SQL Injection 방지)
     if not table_name.isidentifier():
         raise ValueError(f"Invalid table name: {table_name}")
 
-    with connect() as conn:
+    with write_lock, pooled_connection() as conn:
         cur = conn.cursor()
-        # f-string을 사용해 동적으로 쿼리 생성
-        query = f"DELETE FROM {table_name} WHERE datetime(timestamp) < datetime('now', ?)"
+        # f-string을 사용해 동적으로 쿼리 생성 (컬럼을 감싸지 않아야 인덱스 사용)
+        query = f"DELETE FROM {table_name} WHERE timestamp < datetime('now', ?)"
         cur.execute(query, (f"-{retention_days} days",))
         deleted = cur.rowcount or 0
         conn.commit()
@@ -0,0 +1,107 @@
+# database/pubsub.py
+"""
+프로세스 내 발행/구독 허브.
+db_manager 가 커밋 직후 새 센서 값/분석 결과를 발행하면, 구독자(/api/stream SSE 연결)마다
+크기가 제한된 큐로 전달합니다. 구독자가 늦으면 가장 오래된 이벤트부터 버리고 개수를 셉니다.
+"""
+
+import itertools
+import logging
+import threading
+from collections import deque
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+Event = Tuple[int, str, Dict[str, Any]]  # (id, 이벤트 이름, 데이터)
+
+
+class Subscription:
+    """구독자 한 명의 큐. publish 는 절대 막히지 않고, get 만 기다립니다."""
+
+    def __init__(self, maxsize: int = 100, topics: Optional[Iterable[str]] = None) -> None:
+        self._events: "deque[Event]" = deque(maxlen=max(1, int(maxsize)))
+        self._cond = threading.Condition()
+        self.topics = frozenset(topics) if topics else None
+        self.dropped = 0
+        self.closed = False
+
+    def _push(self, event: Event) -> None:
+        if self.topics is not None and event[1] not in self.topics:
+            return
+        with self._cond:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1  # deque(maxlen) 가 가장 오래된 이벤트를 버림
+            self._events.append(event)
+            self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Event]:
+        """다음 이벤트. timeout 안에 없거나 구독이 닫히면 None."""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            return self._events.popleft() if self._events else None
+
+    def take_dropped(self) -> int:
+        """마지막 호출 이후 버려진 이벤트 수를 반환하고 0 으로 되돌립니다."""
+        with self._cond:
+            dropped, self.dropped = self.dropped, 0
+            return dropped
+
+    def close(self) -> None:
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class EventHub:
+    """구독자 목록과 이벤트 번호를 관리합니다. max_subscribers 를 넘으면 subscribe 가 None 을 반환합니다."""
+
+    def __init__(self, max_subscribers: int = 200) -> None:
+        self.max_subscribers = max_subscribers
+        self._subs: List[Subscription] = []
+        self._lock = threading.Lock()
+        self._ids = itertools.count(1)
+        self.published = 0
+
+    def subscribe(self, maxsize: int = 100, topics: Optional[Iterable[str]] = None) -> Optional[Subscription]:
+        with self._lock:
+            if len(self._subs) >= self.max_subscribers:
+                return None
+            sub = Subscription(maxsize, topics)
+            self._subs.append(sub)
+            return sub
+
+    def unsubscribe(self, sub: Subscription) -> None:
+        sub.close()
+        with self._lock:
+            if sub in self._subs:
+                self._subs.remove(sub)
+
+    def publish(self, name: str, data: Dict[str, Any]) -> None:
+        """모든 구독자 큐에 이벤트를 넣습니다. 호출한 쪽(DB 쓰기)에는 예외를 전파하지 않습니다."""
+        try:
+            with self._lock:
+                event = (next(self._ids), name, data)
+                subs = list(self._subs)
+                self.published += 1
+            for sub in subs:
+                sub._push(event)
+        except Exception as e:
+            logging.error(f"[pubsub] '{name}' 이벤트 발행 실패: {e}")
+
+    def publish_many(self, name: str, items: Iterable[Dict[str, Any]]) -> None:
+        for data in items:
+            self.publish(name, data)
+
+    def subscriber_count(self) -> int:
+        with self._lock:
+            return len(self._subs)
+
+    def close_all(self) -> None:
+        with self._lock:
+            subs, self._subs = self._subs, []
+        for sub in subs:
+            sub.close()
+
+
+# 프로세스 전역 허브 (db_manager 가 발행, app 의 /api/stream 이 구독)
+hub = EventHub()
@@ -0,0 +1,144 @@
+# database/sensor_cache.py
+"""
+최근 센서 측정값 N 개를 메모리에 보관하는 고정 크기 링 버퍼.
+id / timestamp / 필드 값을 각각 numpy 배열로 들고 있어, 최신 값과 짧은 구간 조회를 DB 없이 응답합니다.
+db_manager 가 커밋 직후 append 하고(write-through), 시작 시 DB 의 최근 행으로 채웁니다.
+"""
+
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+def _epoch(ts: Optional[str]) -> int:
+    if not ts:
+        return 0
+    return int(datetime.strptime(ts, TS_FORMAT).replace(tzinfo=timezone.utc).timestamp())
+
+
+class SensorRingCache:
+    """
+    capacity 개를 넘으면 가장 오래된 행(id 순)부터 덮어씁니다.
+    측정 시각은 장치가 보낼 수도 있어 id 순서와 시간 순서가 다를 수 있으므로,
+    밀려난 행 중 가장 늦은 시각을 기억해 두고 시간 범위 조회가 버퍼만으로 정확한지 판단합니다.
+    """
+
+    def __init__(self, capacity: int, fields: Sequence[str]) -> None:
+        self.capacity = max(1, int(capacity))
+        self.fields = tuple(fields)
+        self._ids = np.zeros(self.capacity, dtype=np.int64)
+        self._epochs = np.zeros(self.capacity, dtype=np.int64)
+        self._ts = np.empty(self.capacity, dtype=object)
+        self._values = np.full((self.capacity, len(self.fields)), np.nan)  # None 은 NaN 으로 보관
+        self._next = 0   # 다음에 쓸 위치
+        self._size = 0
+        self._lock = threading.Lock()
+        self._latest: Optional[Dict[str, Any]] = None  # 최신 행은 dict 로도 들고 있어 복사만으로 응답
+        # 테이블 전체가 버퍼 안에 있는지 (한 번이라도 덮어쓰면 False)
+        self.complete = True
+        self.loaded = False
+        self._evicted_max_epoch: Optional[int] = None  # 버퍼 밖(더 작은 id)에 있는 행의 가장 늦은 시각
+
+    # --- 쓰기 ---
+    def load(self, rows: Sequence[Dict[str, Any]], older_max_ts: Optional[str] = None) -> None:
+        """
+        DB 의 최근 행들(오래된 것부터)로 버퍼를 다시 채웁니다. rows 가 capacity 개면 테이블이 더 크다고 봅니다.
+        older_max_ts: 그보다 오래된(id 가 작은) 행들 중 가장 늦은 timestamp
+        """
+        with self._lock:
+            self._next = self._size = 0
+            self._latest = None
+            self.complete = len(rows) < self.capacity
+            self._evicted_max_epoch = _epoch(older_max_ts) if older_max_ts else None
+            for row in rows[-self.capacity:]:
+                self._append_locked(row["id"], row["timestamp"], [row[f] for f in self.fields])
+            self.loaded = True
+
+    def append(self, row_id: int, ts: str, values: Sequence[Optional[float]]) -> None:
+        with self._lock:
+            self._append_locked(row_id, ts, values)
+
+    def append_many(self, first_id: int, rows: Sequence[Sequence[Any]]) -> None:
+        """rows: (timestamp, *필드 값) 튜플들. id 는 first_id 부터 연속."""
+        with self._lock:
+            for i, row in enumerate(rows):
+                self._append_locked(first_id + i, row[0], row[1:])
+
+    def _append_locked(self, row_id: int, ts: str, values: Sequence[Optional[float]]) -> None:
+        i = self._next
+        if self._size == self.capacity:
+            self.complete = False
+            evicted = int(self._epochs[i])
+            if self._evicted_max_epoch is None or evicted > self._evicted_max_epoch:
+                self._evicted_max_epoch = evicted
+        self._ids[i] = row_id
+        self._epochs[i] = _epoch(ts)
+        self._ts[i] = ts
+        self._values[i] = [np.nan if v is None else v for v in values]
+        self._next = (i + 1) % self.capacity
+        self._size = min(self._size + 1, self.capacity)
+        self._latest = {"id": int(row_id), "timestamp": ts,
+                        **{f: None if v is None else float(v) for f, v in zip(self.fields, values)}}
+
+    # --- 읽기 ---
+    def _rows(self, idx: np.ndarray, cols: Sequence[int], with_ts: bool = True) -> List[Dict[str, Any]]:
+        """선택한 위치들을 한 번에 파이썬 값으로 바꿔 행 dict 목록을 만듭니다. (NaN -> None)"""
+        names = ["id"] + (["timestamp"] if with_ts else []) + [self.fields[c] for c in cols]
+        columns = [self._ids[idx].tolist()]
+        if with_ts:
+            columns.append(self._ts[idx].tolist())
+        for c in cols:
+            columns.append([v if v == v else None for v in self._values[idx, c].tolist()])
+        return [dict(zip(names, values)) for values in zip(*columns)]
+
+    def latest(self) -> Optional[Dict[str, Any]]:
+        latest = self._latest
+        return dict(latest) if latest is not None else None
+
+    def last_id(self) -> int:
+        """버퍼에 있는 가장 큰 id (비어 있으면 0)."""
+        latest = self._latest
+        return latest["id"] if latest is not None else 0
+
+    def query(
+        self,
+        before_id: Optional[int] = None,
+        limit: Optional[int] = None,
+        from_ts: Optional[str] = None,
+        to_ts: Optional[str] = None,
+        fields: Optional[Sequence[str]] = None,
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        iter_sensor_data 와 같은 조건/정렬(id DESC)의 결과. 버퍼만으로 정확히 답할 수 없으면 None.
+        (조건을 만족하는 더 오래된 행이 이미 버퍼에서 밀려났을 수 있는 경우)
+        """
+        cols = [c for c, f in enumerate(self.fields) if f in fields] if fields else range(len(self.fields))
+        with_ts = not fields or "timestamp" in fields
+        with self._lock:
+            # 최신순 인덱스: next-1, next-2, ...
+            order = (self._next - 1 - np.arange(self._size)) % self.capacity
+            mask = np.ones(self._size, dtype=bool)
+            if before_id is not None:
+                mask &= self._ids[order] < int(before_id)
+            if from_ts:
+                mask &= self._epochs[order] >= _epoch(from_ts)
+            if to_ts:
+                mask &= self._epochs[order] <= _epoch(to_ts)
+            picked = order[mask]
+            if limit is not None:
+                picked = picked[:int(limit)]
+
+            if not self.complete and (limit is None or len(picked) < int(limit)):
+                # 결과가 limit 을 채우지 못했다면, 버퍼 밖의 행 중에도 조건을 만족하는 행이 있을 수 있음
+                evicted_max = self._evicted_max_epoch
+                if not from_ts or evicted_max is None or evicted_max >= _epoch(from_ts):
+                    return None
+            return self._rows(picked, cols, with_ts)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"capacity": self.capacity, "size": self._size, "complete": self.complete, "loaded": self.loaded}
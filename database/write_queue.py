@@ -0,0 +1,127 @@
+# database/write_queue.py
+"""
+센서 데이터 쓰기 지연(write-behind) 큐.
+요청 스레드는 메모리 큐에 넣기만 하고, 백그라운드 스레드가 모아서
+한 번의 트랜잭션(executemany)으로 sensor_data 에 기록합니다.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Any, Callable, Deque, List, Optional, Sequence, Tuple
+
+# normalize_sensor_reading 형식: (timestamp 또는 None, *센서 값)
+SensorRow = Tuple[Any, ...]
+
+
+class SensorWriteQueue:
+    """
+    크기(flush_size) 또는 시간(flush_interval) 임계치에 도달하면 flush 합니다.
+    이미 202 로 받은 행이므로 저장이 실패하면 같은 배치를 간격을 늘려 가며 다시 시도하고,
+    max_attempts 번 모두 실패한 배치만 버립니다. (dropped_rows 로 집계)
+    """
+
+    def __init__(
+        self,
+        flush_fn: Callable[[Sequence[SensorRow]], int],
+        flush_size: int = 200,
+        flush_interval: float = 1.0,
+        maxsize: int = 10000,
+        max_attempts: int = 5,
+        retry_delay: float = 0.5,
+        retry_max_delay: float = 10.0,
+    ) -> None:
+        self._flush_fn = flush_fn
+        self.flush_size = max(1, int(flush_size))
+        self.flush_interval = max(0.01, float(flush_interval))
+        self.maxsize = max(1, int(maxsize))
+        self.max_attempts = max(1, int(max_attempts))
+        self.retry_delay = max(0.0, float(retry_delay))
+        self.retry_max_delay = max(self.retry_delay, float(retry_max_delay))
+        # 큐, 종료 여부를 한 잠금으로 보호: 종료 확인과 넣기가 원자적이라 마지막 drain 이후에 행이 남지 않음
+        self._cond = threading.Condition()
+        self._rows: Deque[SensorRow] = deque()
+        self._stopping = False
+        self._thread: Optional[threading.Thread] = None
+        self.flushed_rows = 0
+        self.retried_batches = 0
+        self.dropped_rows = 0
+
+    # --- 생산자 측 ---
+    def put_many(self, rows: Sequence[SensorRow]) -> bool:
+        """
+        행들을 모두 넣거나 하나도 넣지 않습니다. 자리가 모자라면 False.
+        (일부만 넣으면 클라이언트가 재시도할 때 앞부분이 중복 저장됨)
+        """
+        rows = list(rows)
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("write queue is stopped")
+            if len(self._rows) + len(rows) > self.maxsize:
+                return False
+            self._rows.extend(rows)
+            if len(self._rows) >= self.flush_size:
+                self._cond.notify()
+        return True
+
+    def qsize(self) -> int:
+        return len(self._rows)
+
+    # --- 소비자(백그라운드 스레드) 측 ---
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        with self._cond:
+            self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="sensor-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """새 입력을 막고, 남은 큐를 모두 기록한 뒤 스레드를 종료합니다."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _take(self, limit: int) -> List[SensorRow]:
+        """잠금을 잡은 상태에서 호출."""
+        n = min(limit, len(self._rows))
+        return [self._rows.popleft() for _ in range(n)]
+
+    def _flush(self, batch: List[SensorRow]) -> None:
+        if not batch:
+            return
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                self._flush_fn(batch)
+                self.flushed_rows += len(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_attempts:
+                    self.dropped_rows += len(batch)
+                    logging.error(f"[sensor-writer] {len(batch)}건 일괄 저장 {attempt}회 실패, 버립니다: {e}")
+                    return
+                delay = min(self.retry_max_delay, self.retry_delay * 2 ** (attempt - 1))
+                self.retried_batches += 1
+                logging.warning(f"[sensor-writer] {len(batch)}건 일괄 저장 실패({attempt}회), {delay:.1f}초 뒤 재시도: {e}")
+                # 재시도하는 동안 새 행은 큐에 쌓이고, 가득 차면 생산자가 503 을 받음 (순서 유지)
+                time.sleep(delay)
+
+    def _run(self) -> None:
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            with self._cond:
+                while len(self._rows) < self.flush_size and not self._stopping:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                # 종료 중이면 이 루프가 큐를 끝까지 비움 (종료 후에는 새 행이 들어오지 않음)
+                if self._stopping and not self._rows:
+                    return
+                batch = self._take(self.flush_size)
+            self._flush(batch)
+            deadline = time.monotonic() + self.flush_interval
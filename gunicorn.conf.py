@@ -0,0 +1,24 @@
+# gunicorn.conf.py
+"""
+gunicorn 으로 실행할 때의 설정 (serve.py 와 같은 config 값과 준비 단계).
+
+    gunicorn -c gunicorn.conf.py app:app
+
+app 은 워커에서 import 하고(preload_app=False: DB 연결/백그라운드 스레드를 fork 로 물려주지 않음),
+스키마 적용과 AI 모델 미리 로드(SERVER_PRELOAD_MODELS)는 마스터의 on_starting 훅에서 한 번만 합니다.
+"""
+
+import serve
+
+bind = f"{serve.SERVER_HOST}:{serve.PORT}"
+workers = serve.default_workers()
+worker_class = "gthread"
+threads = serve.SERVER_THREADS
+graceful_timeout = serve.SERVER_GRACEFUL_TIMEOUT
+# 모델 워밍업/카메라 이미지 분석은 요청 스레드 밖(분석 큐)에서 실행되므로 기본 타임아웃으로 충분
+timeout = 30
+preload_app = False
+
+
+def on_starting(server):
+    serve.prepare_master(serve.SERVER_PRELOAD_MODELS)
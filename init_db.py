@@ -2,8 +2,12 @@
 import sys
 from typing import Optional
 from database import init as dbcore
+from database import archive, db_manager
 
-RETENTION_DAYS = 30
+try:
+    from config import RETENTION_DAYS
+except ImportError:
+    RETENTION_DAYS = 30
 
 def _ask_yesno(msg: str, default_no: bool = True) -> bool:
     ans = input(f"{msg} [{'y' if not default_no else 'Y'}/{'N' if default_no else 'n'}] ").strip().lower()
@@ -17,15 +21,24 @@ def init_or_reset_interactive() -> None:
     print("✅ 완료")
 
 def clean_old_records() -> int:
-    deleted = dbcore.clean_old_records(RETENTION_DAYS)
-    print(f"✅ {RETENTION_DAYS}일 이전 sensor_data 삭제: {deleted}건")
-    return deleted
+    """보관 기간이 지난 센서/이미지/분석 기록을 Parquet 아카이브로 옮기고 DB 에서 삭제합니다."""
+    counts = archive.archive_expired(RETENTION_DAYS)
+    if counts.get("sensor_data"):
+        db_manager.reload_sensor_cache()
+    for table, n in counts.items():
+        print(f"✅ {RETENTION_DAYS}일 이전 {table} 아카이브: {n}건")
+    return sum(counts.values())
+
+def migrate() -> None:
+    dbcore.create_tables()
+    print("✅ 스키마 마이그레이션 완료")
 
 def _usage():
     print("사용법:\n"
           "  python init_db.py           # 대화형 초기화(존재 시 물어봄)\n"
           "  python init_db.py init      # 대화형 초기화\n"
-          "  python init_db.py clean     # 30일 이전 sensor_data 정리\n")
+          "  python init_db.py clean     # 보관 기간(RETENTION_DAYS) 이전 기록을 Parquet 으로 옮기고 삭제\n"
+          "  python init_db.py migrate   # 기존 DB 에 스키마 마이그레이션 적용\n")
 
 if __name__ == "__main__":
     if len(sys.argv) == 1:
@@ -36,5 +49,7 @@ if __name__ == "__main__":
         init_or_reset_interactive()
     elif cmd == "clean":
         clean_old_records()
+    elif cmd == "migrate":
+        migrate()
     else:
         _usage()
\ No newline at end of file
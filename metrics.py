@@ -0,0 +1,370 @@
+# metrics.py
+"""
+가벼운 계측 모듈: Prometheus 텍스트 형식(/metrics)으로 내보내는 카운터/히스토그램/수집 함수와
+실행 중에 켜고 끌 수 있는 샘플링 프로파일러.
+- 히스토그램 관측 1회는 perf_counter 2번 + 잠금 1번 + bisect 정도(~1 us)라 요청 경로에 넣어도 부담이 없습니다.
+- 대기열 길이, 캐시 적중 수처럼 이미 어딘가에 있는 값은 collector 로 등록해 /metrics 조회 시점에만 읽습니다.
+- set_enabled(False) 면 모든 관측이 즉시 반환됩니다. (config.METRICS_ENABLED)
+"""
+
+import os
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter as _Tally
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# 초 단위 (0.5 ms ~ 30 s): 캐시 응답부터 CPU 추론까지 한 눈금 체계로 봅니다.
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_enabled = True
+
+
+def set_enabled(value: bool) -> None:
+    global _enabled
+    _enabled = bool(value)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _label_text(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _number(v: float) -> str:
+    if v == float("inf"):
+        return "+Inf"
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+
+    def labels(self, *values):
+        # 받은 값 그대로를 키로 써서 요청마다 문자열 변환을 하지 않음 (문자열은 출력할 때 만듦)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name}: expected labels {self.label_names}, got {values}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def _sorted_children(self):
+        return sorted(((tuple(str(v) for v in key), child) for key, child in list(self._children.items())),
+                      key=lambda item: item[0])
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    def header(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class _CounterChild:
+    __slots__ = ("value", "_lock")
+
+    def __init__(self) -> None:
+        self.value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1) -> None:
+        if _enabled:
+            with self._lock:
+                self.value += amount
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterChild()
+
+    def inc(self, amount: float = 1) -> None:
+        self.labels().inc(amount)
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, child in self._sorted_children():
+            lines.append(f"{self.name}{_label_text(self.label_names, key)} {_number(child.value)}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("_child", "_t0")
+
+    def __init__(self, child) -> None:
+        self._child = child
+
+    def __enter__(self):
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._child.observe(time.perf_counter() - self._t0)
+
+
+class _HistogramChild:
+    __slots__ = ("bounds", "counts", "sum", "_lock")
+
+    def __init__(self, bounds: Tuple[float, ...]) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # 마지막 칸은 +Inf
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value: float) -> None:
+        if not _enabled:
+            return
+        i = bisect_left(self.bounds, value)  # le(<=) 경계
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+
+    def time(self) -> _Timer:
+        """with hist.labels(...).time(): ... 블록의 소요 시간을 관측합니다."""
+        return _Timer(self)
+
+    def snapshot(self) -> Tuple[List[int], float]:
+        with self._lock:
+            return list(self.counts), self.sum
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self.labels().observe(value)
+
+    def time(self) -> _Timer:
+        return self.labels().time()
+
+    def render(self) -> List[str]:
+        lines = self.header()
+        for key, child in self._sorted_children():
+            counts, total = child.snapshot()
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = f'le="{_number(bound)}"'
+                lines.append(f"{self.name}_bucket{_label_text(self.label_names, key, le)} {cumulative}")
+            labels = _label_text(self.label_names, key)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Collector(_Metric):
+    """
+    조회 시점에 fn() 을 호출해 값을 읽는 지표. fn 은 숫자 하나(라벨 없음) 또는
+    {라벨 값 튜플: 숫자} dict 를 반환합니다. 예외가 나면 그 지표만 빠집니다.
+    """
+
+    def __init__(self, name: str, help: str, fn: Callable[[], object], labels: Sequence[str] = (),
+                 kind: str = "gauge") -> None:
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def render(self) -> List[str]:
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        if value is None:
+            return []
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        lines = self.header()
+        for key, v in items:
+            if v is None:
+                continue
+            key = key if isinstance(key, tuple) else (key,)
+            lines.append(f"{self.name}{_label_text(self.label_names, key)} {_number(v)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        """같은 이름이 이미 있으면 기존 지표를 돌려줍니다. (모듈 재로딩, 테스트에서 여러 번 import)"""
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not isinstance(metric, Collector):
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self._metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, help, labels))
+
+
+def histogram(name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, help, labels, buckets))
+
+
+def collector(name: str, help: str, fn: Callable[[], object], labels: Sequence[str] = (),
+              kind: str = "gauge") -> Collector:
+    """조회 시점에 읽는 지표 등록 (같은 이름으로 다시 등록하면 새 fn 으로 교체)."""
+    return REGISTRY.register(Collector(name, help, fn, labels, kind))
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class TimedLock:
+    """with 블록에 들어가기까지 기다린 시간을 histogram 에 기록하는 잠금 래퍼 (Lock / RLock 모두 가능)."""
+
+    def __init__(self, lock, wait_histogram: _HistogramChild) -> None:
+        self._lock = lock
+        self._wait = wait_histogram
+
+    def __enter__(self):
+        t0 = time.perf_counter()
+        self._lock.acquire()
+        self._wait.observe(time.perf_counter() - t0)
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self._lock.release()
+
+
+# --- 여러 모듈이 함께 쓰는 지표 ---
+DB_QUERY_SECONDS = histogram(
+    "db_query_duration_seconds", "DB 연결을 빌린 순간부터 반납까지 (db_manager 함수별)", ("op",))
+DB_LOCK_WAIT_SECONDS = histogram(
+    "db_lock_wait_seconds", "프로세스 내 DB 쓰기 잠금 대기 시간", ("lock",))
+DB_ERRORS = counter(
+    "db_errors_total", "sqlite3 오류 (busy: database is locked/busy, 그 외 error)", ("op", "kind"))
+DB_CONNECTIONS_OPENED = counter(
+    "db_pool_connections_opened_total", "풀에 쉬는 연결이 없어 새로 연 연결 수 (풀 크기를 넘어 계속 늘면 풀이 부족)")
+SENSOR_CACHE_REQUESTS = counter(
+    "sensor_cache_requests_total", "센서 링 버퍼 조회 (hit: 메모리로 응답, miss: DB 로 넘어감)", ("result",))
+AI_STAGE_SECONDS = histogram(
+    "ai_stage_duration_seconds", "AI 분석 단계별 소요 시간 (decode/preprocess/forward/postprocess)",
+    ("stage", "model"))
+
+
+# ---------------------------------------------------------------------------
+# 샘플링 프로파일러 (기본 꺼짐, /api/profiler 로 실행 중에 켜고 끔)
+# ---------------------------------------------------------------------------
+
+def _frame_label(code) -> str:
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}"
+
+
+class SamplingProfiler:
+    """
+    interval 마다 모든 스레드의 호출 스택(sys._current_frames)을 찍어 같은 스택끼리 셉니다.
+    결과는 flamegraph.pl / speedscope 가 읽는 collapsed 형식 ('스레드;바깥;...;안쪽 횟수') 입니다.
+    꺼져 있을 때는 스레드도 없으므로 비용이 없고, 켜져 있을 때 비용은 interval 과 스레드 수에 비례합니다.
+    """
+
+    def __init__(self, max_depth: int = 64) -> None:
+        self.max_depth = max_depth
+        self.interval = 0.01
+        self.samples = 0
+        self.started_at: Optional[float] = None
+        self.stopped_at: Optional[float] = None
+        self._stacks: "_Tally[str]" = _Tally()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.01, duration: Optional[float] = None) -> bool:
+        """이미 실행 중이면 False. duration 초가 지나면 스스로 멈춥니다. 이전 결과는 지웁니다."""
+        with self._lock:
+            if self.running:
+                return False
+            self.interval = max(0.001, float(interval))
+            self._stacks = _Tally()
+            self.samples = 0
+            self.started_at, self.stopped_at = time.time(), None
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, args=(duration,), name="sampling-profiler", daemon=True)
+            self._thread.start()
+            return True
+
+    def stop(self) -> bool:
+        with self._lock:
+            if not self.running:
+                return False
+            self._stop.set()
+            thread = self._thread
+        thread.join(timeout=5)
+        return True
+
+    def _run(self, duration: Optional[float]) -> None:
+        me = threading.get_ident()
+        deadline = time.monotonic() + duration if duration else None
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                stack = []
+                while frame is not None and len(stack) < self.max_depth:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self._stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            if deadline is not None and time.monotonic() >= deadline:
+                break
+        self.stopped_at = time.time()
+
+    def collapsed(self, limit: Optional[int] = None) -> str:
+        # dict() 복사는 GIL 아래에서 한 번에 끝나므로 샘플링 스레드가 실행 중이어도 안전
+        stacks = _Tally(dict(self._stacks)).most_common(limit)
+        return "".join(f"{stack} {count}\n" for stack, count in stacks)
+
+    def status(self) -> Dict[str, object]:
+        end = self.stopped_at or time.time()
+        return {"running": self.running, "interval_ms": round(self.interval * 1000, 2),
+                "samples": self.samples, "distinct_stacks": len(self._stacks),
+                "seconds": round(end - self.started_at, 1) if self.started_at else 0}
+
+
+profiler = SamplingProfiler()
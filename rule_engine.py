@@ -0,0 +1,483 @@
+# rule_engine.py
+"""
+센서 규칙 엔진: 커밋된 센서 측정값을 선언형 규칙으로 평가해 장치 명령/알림을 냅니다.
+- 조건 (규칙마다 하나)
+    above / below           : 임계값
+    zscore                  : 이동 평균/표준편차 기준 |z| 가 값 이상 (window: 대략적인 표본 수, min_samples 이후부터)
+    rate_above / rate_below : 분당 변화량 (RATE_MIN_INTERVAL 초 이상 떨어진 기준값과 비교)
+- for: 조건이 이 시간 동안 계속 유지되어야 발생, cooldown: 해제 후 다시 발생하기까지 최소 간격
+- 발생(fired)/해제(cleared) 때 한 번씩만 이벤트를 냅니다 (매 측정마다 명령을 반복하지 않음).
+  action / clear_action 이 있으면 장치 명령, 없으면 알림(severity)입니다.
+- 상태는 필드마다 지수 가중 이동 평균/분산과 직전 값, 규칙마다 시작 시각/활성 여부뿐이라
+  측정값 하나의 평가가 O(규칙 수) 이고 sensor_data 를 다시 조회하지 않습니다.
+- 이벤트는 로컬 디스패치 큐(RuleDispatcher)에 넣고, 백그라운드 스레드가 sink(로그, DB 저장 + /api/stream, 장치 HTTP)로 넘깁니다.
+- 멀티 워커(serve.py, gunicorn)에서는 RuleEvaluator 가 DB 임대를 가진 한 프로세스에서만 sensor_data 의 새 행을
+  id(커밋) 순서대로 평가합니다. 워커마다 측정값 일부만 보거나 같은 명령을 워커 수만큼 보내지 않도록 하기 위함이며,
+  평가 상태는 DB 에 저장되어 임대를 넘겨받은 프로세스(또는 재시작한 서버)가 이어서 평가합니다.
+"""
+
+import logging
+import math
+import os
+import queue
+import socket
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from database import db_manager
+from scheduler import parse_duration
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+CONDITIONS = ("above", "below", "zscore", "rate_above", "rate_below")
+DEFAULT_WINDOW = 60
+DEFAULT_MIN_SAMPLES = 30
+# 변화량은 이 시간(초) 이상 떨어진 기준값과 비교 (측정 간격이 짧을 때 잡음이 분당 변화량으로 부풀려지지 않도록)
+RATE_MIN_INTERVAL = 30.0
+
+
+class RollingStats:
+    """
+    지수 가중 이동 평균/분산. 값 두 개만 보관하는 O(1) 상태로,
+    최근 window 개 정도의 표본에 가중치가 몰립니다. (alpha = 2 / (window + 1))
+    """
+
+    __slots__ = ("alpha", "mean", "var", "count")
+
+    def __init__(self, window: int) -> None:
+        self.alpha = 2.0 / (max(1, int(window)) + 1)
+        self.mean = 0.0
+        self.var = 0.0
+        self.count = 0
+
+    def zscore(self, x: float) -> float:
+        std = math.sqrt(self.var)
+        return (x - self.mean) / std if std > 0 else 0.0
+
+    def update(self, x: float) -> None:
+        if self.count == 0:
+            self.mean = x
+        else:
+            diff = x - self.mean
+            incr = self.alpha * diff
+            self.mean += incr
+            self.var = (1.0 - self.alpha) * (self.var + diff * incr)
+        self.count += 1
+
+
+class _FieldState:
+    """필드 하나의 스트리밍 상태: 직전 값, 변화량 기준값/시각, window 별 이동 통계."""
+
+    __slots__ = ("prev", "ref", "ref_ts", "stats")
+
+    def __init__(self) -> None:
+        self.prev: Optional[float] = None
+        self.ref: Optional[float] = None
+        self.ref_ts: Optional[float] = None
+        self.stats: Dict[int, RollingStats] = {}
+
+
+class Rule:
+    def __init__(self, name: str, field: str, condition: str, limit: float, hold: float = 0.0,
+                 cooldown: float = 0.0, window: int = DEFAULT_WINDOW, min_samples: int = DEFAULT_MIN_SAMPLES,
+                 action: Optional[dict] = None, clear_action: Optional[dict] = None,
+                 severity: str = "warning", message: Optional[str] = None) -> None:
+        if condition not in CONDITIONS:
+            raise ValueError(f"rule {name!r}: unknown condition {condition!r}")
+        self.name = name
+        self.field = field
+        self.condition = condition
+        self.limit = float(limit)
+        self.hold = max(0.0, float(hold))
+        self.cooldown = max(0.0, float(cooldown))
+        self.window = int(window)
+        self.min_samples = max(2, int(min_samples))
+        self.action = action
+        self.clear_action = clear_action
+        self.severity = severity
+        self.message = message or f"{field} {condition} {limit:g}"
+        # 평가 상태
+        self.since: Optional[float] = None   # 조건이 참이 된 시각
+        self.active = False
+        self.last_fired: Optional[float] = None
+        self.last_cleared: Optional[float] = None
+        self.fired_count = 0
+
+    @classmethod
+    def from_spec(cls, name: str, spec: Dict[str, Any]) -> "Rule":
+        conditions = [c for c in CONDITIONS if c in spec]
+        if len(conditions) != 1:
+            raise ValueError(f"rule {name!r} needs exactly one of {', '.join(CONDITIONS)}")
+        if not spec.get("field"):
+            raise ValueError(f"rule {name!r} needs a field")
+        condition = conditions[0]
+        return cls(
+            name, spec["field"], condition, spec[condition],
+            hold=parse_duration(spec.get("for", 0)),
+            cooldown=parse_duration(spec.get("cooldown", 0)),
+            window=spec.get("window", DEFAULT_WINDOW),
+            min_samples=spec.get("min_samples", DEFAULT_MIN_SAMPLES),
+            action=spec.get("action"),
+            clear_action=spec.get("clear_action"),
+            severity=spec.get("severity", "warning"),
+            message=spec.get("message"),
+        )
+
+    def check(self, x: float, ts: float, state: _FieldState) -> Optional[bool]:
+        """조건 판정. 아직 판단할 수 없으면(표본 부족, 직전 값 없음) None."""
+        c = self.condition
+        if c == "above":
+            return x > self.limit
+        if c == "below":
+            return x < self.limit
+        if c == "zscore":
+            stats = state.stats[self.window]
+            if stats.count < self.min_samples:
+                return None
+            return abs(stats.zscore(x)) >= self.limit
+        if state.ref is None or ts - state.ref_ts < RATE_MIN_INTERVAL:
+            return None
+        rate = (x - state.ref) / (ts - state.ref_ts) * 60.0
+        return rate > self.limit if c == "rate_above" else rate < self.limit
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            "name": self.name, "field": self.field, "condition": self.condition, "limit": self.limit,
+            "for_seconds": self.hold, "cooldown_seconds": self.cooldown, "active": self.active,
+            "pending_since": _fmt(self.since) if self.since is not None and not self.active else None,
+            "last_fired": _fmt(self.last_fired), "last_cleared": _fmt(self.last_cleared),
+            "fired_count": self.fired_count, "action": self.action, "severity": self.severity,
+        }
+
+
+def _fmt(ts: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(ts, timezone.utc).strftime(TS_FORMAT) if ts is not None else None
+
+
+class RuleEngine:
+    """
+    evaluate(reading) 로 측정값 하나를 평가하고, 발생/해제된 이벤트를 emit(event) 로 넘깁니다.
+    여러 요청 스레드가 동시에 불러도 되도록 평가 전체를 잠금 하나로 묶습니다. (평가 자체는 수 us)
+    """
+
+    def __init__(self, rules: Iterable[Rule], emit: Optional[Callable[[Dict[str, Any]], Any]] = None) -> None:
+        self.rules = list(rules)
+        names = [r.name for r in self.rules]
+        if len(set(names)) != len(names):
+            raise ValueError(f"duplicate rule names: {names}")
+        self.emit = emit
+        self._fields: Dict[str, _FieldState] = {}
+        self._by_field: Dict[str, List[Rule]] = {}
+        for rule in self.rules:
+            state = self._fields.setdefault(rule.field, _FieldState())
+            if rule.condition == "zscore":
+                state.stats.setdefault(rule.window, RollingStats(rule.window))
+            self._by_field.setdefault(rule.field, []).append(rule)
+        self._lock = threading.Lock()
+        self.evaluated = 0
+
+    def evaluate(self, reading: Dict[str, Any], ts: Optional[float] = None) -> List[Dict[str, Any]]:
+        """
+        측정값(필드 -> 값) 하나를 평가해 이번에 생긴 이벤트 목록을 반환합니다.
+        값이 None 이거나 NaN/inf 인 필드는 건너뜀 (판정도, 이동 통계/기준값 갱신도 하지 않음).
+        """
+        ts = time.time() if ts is None else ts
+        events: List[Dict[str, Any]] = []
+        with self._lock:
+            self.evaluated += 1
+            for field, rules in self._by_field.items():
+                x = reading.get(field)
+                if x is None:
+                    continue
+                x = float(x)
+                # NaN 은 모든 비교가 거짓이라 활성 규칙을 해제하고, 이동 통계에 들어가면 이후 z-score 가 전부 NaN 이 됨
+                if not math.isfinite(x):
+                    continue
+                state = self._fields[field]
+                for rule in rules:
+                    self._step(rule, rule.check(x, ts, state), x, ts, events)
+                # 판정이 끝난 뒤에 갱신 (이상치가 자기 자신의 기준값을 끌어당기지 않도록)
+                for stats in state.stats.values():
+                    stats.update(x)
+                state.prev = x
+                if state.ref is None or ts - state.ref_ts >= RATE_MIN_INTERVAL:
+                    state.ref, state.ref_ts = x, ts
+        if self.emit is not None:
+            for event in events:
+                self.emit(event)
+        return events
+
+    def _step(self, rule: Rule, cond: Optional[bool], x: float, ts: float, events: List[Dict[str, Any]]) -> None:
+        if cond is None:
+            return
+        if cond:
+            if rule.since is None:
+                rule.since = ts
+            if (not rule.active and ts - rule.since >= rule.hold
+                    and (rule.last_cleared is None or ts - rule.last_cleared >= rule.cooldown)):
+                rule.active, rule.last_fired = True, ts
+                rule.fired_count += 1
+                events.append(self._event(rule, "fired", x, ts, rule.action))
+        else:
+            rule.since = None
+            if rule.active:
+                rule.active, rule.last_cleared = False, ts
+                events.append(self._event(rule, "cleared", x, ts, rule.clear_action))
+
+    @staticmethod
+    def _event(rule: Rule, state: str, x: float, ts: float, command: Optional[dict]) -> Dict[str, Any]:
+        return {
+            "rule": rule.name, "state": state, "field": rule.field, "value": x, "timestamp": _fmt(ts),
+            "type": "command" if command else "alert", "command": command,
+            "severity": rule.severity, "message": rule.message,
+        }
+
+    def export_state(self) -> Dict[str, Any]:
+        """이어서 평가하는 데 필요한 상태 전체 (JSON 으로 저장 가능한 dict, restore_state 로 되돌림)."""
+        with self._lock:
+            return {
+                "evaluated": self.evaluated,
+                "rules": {r.name: {"since": r.since, "active": r.active, "last_fired": r.last_fired,
+                                   "last_cleared": r.last_cleared, "fired_count": r.fired_count}
+                          for r in self.rules},
+                "fields": {name: {"prev": s.prev, "ref": s.ref, "ref_ts": s.ref_ts,
+                                  "stats": {str(w): [st.mean, st.var, st.count] for w, st in s.stats.items()}}
+                           for name, s in self._fields.items()},
+            }
+
+    def restore_state(self, state: Dict[str, Any]) -> None:
+        """export_state() 의 값으로 상태를 되돌립니다. 지금 설정에 없는 규칙/필드/window 는 무시합니다."""
+        with self._lock:
+            self.evaluated = int(state.get("evaluated", 0))
+            saved_rules = state.get("rules", {})
+            for rule in self.rules:
+                saved = saved_rules.get(rule.name)
+                if saved is None:
+                    continue
+                rule.since, rule.active = saved["since"], bool(saved["active"])
+                rule.last_fired, rule.last_cleared = saved["last_fired"], saved["last_cleared"]
+                rule.fired_count = int(saved["fired_count"])
+            saved_fields = state.get("fields", {})
+            for name, field_state in self._fields.items():
+                saved = saved_fields.get(name)
+                if saved is None:
+                    continue
+                field_state.prev, field_state.ref, field_state.ref_ts = saved["prev"], saved["ref"], saved["ref_ts"]
+                for window, stats in field_state.stats.items():
+                    if str(window) in saved["stats"]:
+                        stats.mean, stats.var, count = saved["stats"][str(window)]
+                        stats.count = int(count)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            fields = {
+                name: {
+                    "last_value": s.prev,
+                    "stats": {str(w): {"mean": round(st.mean, 4), "std": round(math.sqrt(st.var), 4),
+                                       "samples": st.count} for w, st in s.stats.items()},
+                }
+                for name, s in self._fields.items()
+            }
+            return {"evaluated": self.evaluated, "rules": [r.status() for r in self.rules], "fields": fields}
+
+
+def rules_from_config(specs: Dict[str, Dict[str, Any]]) -> List[Rule]:
+    return [Rule.from_spec(name, spec) for name, spec in specs.items()]
+
+
+LEASE_NAME = "rules"
+
+
+def _parse_ts(value: str) -> float:
+    return datetime.strptime(value, TS_FORMAT).replace(tzinfo=timezone.utc).timestamp()
+
+
+class RuleEvaluator:
+    """
+    규칙을 한 프로세스에서만 평가하는 백그라운드 루프.
+    interval 마다 DB 임대(scheduler_lease 테이블의 'rules')를 얻거나 연장하고, 임대를 가진 동안
+    마지막으로 평가한 행 이후 커밋된 sensor_data 행을 id 순서대로 engine 에 넣습니다. (측정 시각은 행의 timestamp)
+    평가한 뒤에는 커서/엔진 상태를 DB 에 저장해, 임대를 넘겨받은 프로세스가 그 지점부터 같은 상태로 이어서 평가합니다.
+    밀린 행 중 lease_ttl 의 2배보다 오래된 행(서버가 멈춰 있던 동안 다른 경로로 쌓인 행)은 지금 명령을 내기엔 늦었으므로
+    평가하지 않고 건너뜁니다. 저장된 상태가 없으면 현재 마지막 행부터 시작합니다.
+    extra_status() 가 있으면 그 값도 /api/rules 용 상태에 더해 저장합니다. (예: 디스패치 큐 통계)
+    """
+
+    def __init__(self, engine: RuleEngine, interval: float = 1.0, lease_ttl: float = 30.0, batch: int = 1000,
+                 extra_status: Optional[Callable[[], Dict[str, Any]]] = None, owner: Optional[str] = None) -> None:
+        self.engine = engine
+        self.interval = max(0.05, float(interval))
+        self.lease_ttl = max(self.interval * 3, float(lease_ttl))
+        self.batch = max(1, int(batch))
+        self.extra_status = extra_status
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.is_leader = False
+        self.cursor: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="rule-evaluator", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.interval * 5)
+            self._thread = None
+        if self.is_leader:
+            try:
+                self.step()
+                db_manager.release_scheduler_lease(LEASE_NAME, self.owner)
+            except Exception as e:
+                logging.error(f"[rules] 임대 반납 실패: {e}")
+            self.is_leader = False
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                logging.error(f"[rules] 규칙 평가 중 오류: {e}")
+            self._stop.wait(self.interval)
+
+    def tick(self, now: Optional[float] = None) -> int:
+        """임대를 얻거나 연장하고, 가졌으면 새 행을 평가합니다. 평가한 행 수를 반환합니다."""
+        now = time.time() if now is None else now
+        leader = db_manager.claim_scheduler_lease(LEASE_NAME, self.owner, self.lease_ttl, now)
+        if leader != self.is_leader:
+            logging.info(f"[rules] {'임대 획득: 이 프로세스가 규칙을 평가합니다' if leader else '임대 상실'}")
+            self.is_leader = leader
+            # 다시 얻으면 그 사이 다른 프로세스가 저장한 상태에서 이어가도록 저장된 값을 다시 읽음
+            self.cursor = None
+        return self.step(now) if leader else 0
+
+    def _resume(self, now: float) -> None:
+        saved = db_manager.get_rule_engine_state()
+        if saved is None:
+            self.cursor = db_manager.get_max_sensor_id()
+        else:
+            self.engine.restore_state(saved["state"])
+            first = db_manager.get_first_sensor_id_since(saved["cursor"], _fmt(now - 2 * self.lease_ttl))
+            self.cursor = first - 1 if first is not None else db_manager.get_max_sensor_id()
+        logging.info(f"[rules] sensor_data id {self.cursor} 이후 행부터 평가합니다.")
+
+    def step(self, now: Optional[float] = None) -> int:
+        """새로 커밋된 행을 모두 평가하고 상태를 저장합니다. 평가한 행 수를 반환합니다."""
+        now = time.time() if now is None else now
+        resumed = self.cursor is None
+        if resumed:
+            self._resume(now)
+        total = 0
+        while True:
+            rows = db_manager.get_sensor_rows_after(self.cursor, self.batch)
+            for row in rows:
+                self.engine.evaluate(row, _parse_ts(row["timestamp"]))
+                self.cursor = row["id"]
+            total += len(rows)
+            if len(rows) < self.batch:
+                break
+        if total or resumed:
+            status = self.engine.status()
+            if self.extra_status is not None:
+                status.update(self.extra_status())
+            db_manager.save_rule_engine_state(self.owner, self.cursor, status, self.engine.export_state(), now)
+        return total
+
+
+class RuleDispatcher:
+    """
+    규칙 이벤트를 담는 로컬 디스패치 큐. 수집 요청은 넣기만 하고(가득 차면 버리고 개수를 셈),
+    백그라운드 스레드가 sink 들에 순서대로 넘깁니다. sink 하나가 실패해도 나머지는 계속 받습니다.
+    """
+
+    def __init__(self, sinks: Iterable[Callable[[Dict[str, Any]], Any]], maxsize: int = 1000,
+                 history: int = 200) -> None:
+        self.sinks = list(sinks)
+        self._queue: "queue.Queue[Dict[str, Any]]" = queue.Queue(maxsize=maxsize)
+        self._history: "deque[Dict[str, Any]]" = deque(maxlen=max(1, int(history)))
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.dispatched = 0
+        self.dropped = 0
+        self.sink_errors = 0
+
+    def put(self, event: Dict[str, Any]) -> bool:
+        self._history.append(event)
+        try:
+            self._queue.put_nowait(event)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.warning(f"[rules] 디스패치 큐가 가득 차 이벤트를 버렸습니다: {event['rule']} {event['state']}")
+            return False
+
+    def qsize(self) -> int:
+        return self._queue.qsize()
+
+    def recent(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """최근 이벤트 (최신순)."""
+        return list(self._history)[::-1][:limit]
+
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="rule-dispatcher", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = 10.0) -> None:
+        """남은 이벤트를 모두 넘긴 뒤 스레드를 종료합니다."""
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _deliver(self, event: Dict[str, Any]) -> None:
+        for sink in self.sinks:
+            try:
+                sink(event)
+            except Exception as e:
+                self.sink_errors += 1
+                logging.error(f"[rules] 이벤트 전달 실패 ({getattr(sink, '__name__', sink)}): {e}")
+        self.dispatched += 1
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                event = self._queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            self._deliver(event)
+        while True:
+            try:
+                self._deliver(self._queue.get_nowait())
+            except queue.Empty:
+                break
+
+    def stats(self) -> Dict[str, Any]:
+        return {"queued": self.qsize(), "dispatched": self.dispatched, "dropped": self.dropped,
+                "sink_errors": self.sink_errors}
+
+
+def http_actuator(url: str, timeout: float = 3.0, session=None):
+    """명령 이벤트의 command(dict)에 rule/state 를 더해 url 로 POST 하는 sink 를 만듭니다. 알림은 보내지 않음."""
+    import requests
+
+    session = session or requests.Session()
+
+    def send_command(event: Dict[str, Any]) -> None:
+        if not event.get("command"):
+            return
+        resp = session.post(url, json={**event["command"], "rule": event["rule"], "state": event["state"]},
+                            timeout=timeout)
+        resp.raise_for_status()
+
+    return send_command
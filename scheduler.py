@@ -0,0 +1,279 @@
+# scheduler.py
+"""
+백그라운드 작업 스케줄러.
+- 작업별 다음 실행 시각을 SQLite(scheduler_job)에 저장하므로 재시작해도 일정이 유지됩니다.
+- 일정은 every('30s', '15m', '12h', '30d') 또는 cron('분 시 일 월 요일', UTC) 으로 지정합니다.
+- jitter: 예정 시각에 0~jitter 초의 임의 지연을 더해 여러 장비가 한꺼번에 몰리지 않게 합니다.
+- catch_up: 서버가 꺼져 있던 동안 놓친 실행을 시작 직후 한 번(여러 번이 아니라) 실행합니다.
+- SQLite 임대(scheduler_lease)를 가진 프로세스 하나만 작업을 실행합니다. (gunicorn 워커 여러 개, debug 리로더)
+- trigger(name) 은 어느 프로세스에서 호출해도 임대를 가진 프로세스가 다음 tick 에 실행합니다.
+- 실행마다 소요 시간/결과를 scheduler_run 에 기록합니다.
+"""
+
+import logging
+import os
+import random
+import socket
+import threading
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Dict, List, Optional
+
+from database import db_manager
+
+TS_FORMAT = "%Y-%m-%d %H:%M:%S"
+LEASE_NAME = "scheduler"
+
+_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(value) -> float:
+    """'90s', '15m', '12h', '30d', '1w' 또는 숫자(초) -> 초."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    text = str(value).strip().lower()
+    if text and text[-1] in _UNITS:
+        return float(text[:-1]) * _UNITS[text[-1]]
+    return float(text)
+
+
+class CronSchedule:
+    """
+    5필드 cron 식 ('분 시 일 월 요일', UTC). 각 필드는 *, */n, a-b, a-b/n, a,b,c 를 지원하고
+    요일은 0(일)~6(토), 7 도 일요일입니다. 일/요일이 모두 지정되면 둘 중 하나만 맞아도 실행합니다(cron 규칙).
+    """
+
+    _RANGES = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expr: str) -> None:
+        parts = expr.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        fields = [self._parse(p, lo, hi) for p, (lo, hi) in zip(parts, self._RANGES)]
+        self.minutes, self.hours, self.days, self.months, dows = fields
+        self.dows = {d % 7 for d in dows}
+        self.dom_any, self.dow_any = parts[2] == "*", parts[4] == "*"
+
+    @staticmethod
+    def _parse(part: str, lo: int, hi: int) -> set:
+        values = set()
+        for item in part.split(","):
+            rng, _, step = item.partition("/")
+            if rng == "*":
+                start, end = lo, hi
+            elif "-" in rng:
+                start, end = (int(x) for x in rng.split("-", 1))
+            else:
+                start = end = int(rng)
+            if start < lo or end > hi or start > end:
+                raise ValueError(f"cron field out of range: {part!r}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, dt: datetime) -> bool:
+        dom = dt.day in self.days
+        dow = (dt.isoweekday() % 7) in self.dows
+        if self.dom_any or self.dow_any:
+            return dom and dow
+        return dom or dow
+
+    def next_after(self, ts: float) -> float:
+        dt = datetime.fromtimestamp(ts, timezone.utc).replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 5)
+        while dt < limit:
+            if dt.month not in self.months:
+                dt = (dt.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_matches(dt):
+                dt = dt.replace(hour=0, minute=0) + timedelta(days=1)
+            elif dt.hour not in self.hours:
+                dt = dt.replace(minute=0) + timedelta(hours=1)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt.timestamp()
+        raise ValueError(f"cron expression never matches: {self.expr!r}")
+
+
+class IntervalSchedule:
+    def __init__(self, every) -> None:
+        self.seconds = parse_duration(every)
+        if self.seconds <= 0:
+            raise ValueError(f"interval must be positive: {every!r}")
+        self.expr = f"every {every}"
+
+    def next_after(self, ts: float) -> float:
+        return ts + self.seconds
+
+
+class Job:
+    def __init__(self, name: str, fn: Callable[[], object], schedule, jitter: float = 0.0, catch_up: bool = True):
+        self.name = name
+        self.fn = fn
+        self.schedule = schedule
+        self.jitter = max(0.0, float(jitter))
+        self.catch_up = catch_up
+        self.running = False
+
+    @property
+    def spec(self) -> str:
+        return self.schedule.expr
+
+    def next_run(self, after: float) -> float:
+        return self.schedule.next_after(after) + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+
+
+class Scheduler:
+    def __init__(self, tick: float = 1.0, lease_ttl: float = 30.0, history: int = 200,
+                 owner: Optional[str] = None) -> None:
+        self.tick = max(0.05, float(tick))
+        self.lease_ttl = max(self.tick * 3, float(lease_ttl))
+        self.history = history
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.jobs: Dict[str, Job] = {}
+        self.is_leader = False
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    # --- 등록 ---
+    def add(self, name: str, fn: Callable[[], object], every=None, cron: Optional[str] = None,
+            jitter=0, catch_up: bool = True) -> Job:
+        if (every is None) == (cron is None):
+            raise ValueError(f"job '{name}' needs exactly one of every / cron")
+        schedule = CronSchedule(cron) if cron else IntervalSchedule(every)
+        job = Job(name, fn, schedule, parse_duration(jitter), catch_up)
+        self.jobs[name] = job
+        return job
+
+    def add_from_config(self, specs: Dict[str, dict], functions: Dict[str, Callable[[], object]]) -> None:
+        """config.SCHEDULER_JOBS 형식({이름: {every|cron, jitter, catch_up}})으로 등록. 함수가 없는 작업은 건너뜀."""
+        for name, spec in specs.items():
+            fn = functions.get(name)
+            if fn is None:
+                logging.warning(f"[scheduler] '{name}' 작업 함수가 없어 등록하지 않습니다.")
+                continue
+            self.add(name, fn, every=spec.get("every"), cron=spec.get("cron"),
+                     jitter=spec.get("jitter", 0), catch_up=spec.get("catch_up", True))
+
+    # --- 실행 루프 ---
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        now = time.time()
+        for job in self.jobs.values():
+            # 처음 등록되었거나 일정이 바뀐 작업만 다음 실행 시각을 새로 정함 (나머지는 저장된 시각 유지)
+            db_manager.upsert_scheduler_job(job.name, job.spec, job.next_run(now))
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+        self._thread.start()
+        logging.info(f"[scheduler] 시작 (owner={self.owner}, jobs={list(self.jobs)})")
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=self.tick * 5)
+        if self.is_leader:
+            try:
+                db_manager.release_scheduler_lease(LEASE_NAME, self.owner)
+            except Exception as e:
+                logging.error(f"[scheduler] 임대 반납 실패: {e}")
+            self.is_leader = False
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            try:
+                now = time.time()
+                leader = db_manager.claim_scheduler_lease(LEASE_NAME, self.owner, self.lease_ttl, now)
+                if leader != self.is_leader:
+                    logging.info(f"[scheduler] {'임대 획득: 이 프로세스가 작업을 실행합니다' if leader else '임대 상실'}")
+                    self.is_leader = leader
+                if leader:
+                    self._run_due(now)
+            except Exception as e:
+                logging.error(f"[scheduler] tick 처리 중 오류: {e}")
+            self._stop.wait(self.tick)
+
+    def _run_due(self, now: float) -> None:
+        rows = db_manager.get_scheduler_jobs()
+        for name, job in self.jobs.items():
+            row = rows.get(name)
+            if row is None or row["next_run"] > now or job.running:
+                continue
+            requested = bool(row["requested"])
+            # 한 tick 이상 늦었다면 서버가 꺼져 있던 동안 놓친 실행 -> catch_up 이면 한 번만 실행, 아니면 건너뜀
+            missed = now - row["next_run"] > max(60.0, self.tick * 5)
+            if not db_manager.claim_scheduler_job(name, row["next_run"], job.next_run(now)):
+                continue  # 다른 프로세스가 이미 이 회차를 가져감
+            if missed and not job.catch_up and not requested:
+                logging.info(f"[scheduler] '{name}' 놓친 실행을 건너뜁니다. (catch_up=False)")
+                continue
+            trigger = "manual" if requested else ("catch_up" if missed else "schedule")
+            self._spawn(job, trigger)
+
+    def _spawn(self, job: Job, trigger: str) -> None:
+        job.running = True
+        threading.Thread(target=self._execute, args=(job, trigger), name=f"job-{job.name}", daemon=True).start()
+
+    def _execute(self, job: Job, trigger: str) -> None:
+        started = datetime.now(timezone.utc).strftime(TS_FORMAT)
+        t0 = time.perf_counter()
+        status, error = "ok", None
+        logging.info(f"[scheduler] '{job.name}' 실행 ({trigger})")
+        try:
+            job.fn()
+        except Exception as e:
+            status, error = "failed", f"{e}\n{traceback.format_exc(limit=5)}"
+            logging.error(f"[scheduler] '{job.name}' 실패: {e}")
+        finally:
+            job.running = False
+            duration_ms = round((time.perf_counter() - t0) * 1000, 1)
+            try:
+                db_manager.record_scheduler_run(job.name, trigger, self.owner, started, duration_ms,
+                                                status, error, self.history)
+            except Exception as e:
+                logging.error(f"[scheduler] '{job.name}' 실행 기록 실패: {e}")
+            logging.info(f"[scheduler] '{job.name}' 완료 ({status}, {duration_ms} ms)")
+
+    # --- 조회/수동 실행 ---
+    def trigger(self, name: str) -> bool:
+        """작업을 바로 실행하도록 요청. (임대를 가진 프로세스가 다음 tick 에 실행) 모르는 작업이면 False."""
+        job = self.jobs.get(name)
+        if job is None:
+            return False
+        now = time.time()
+        if db_manager.request_scheduler_run(name, now):
+            return True
+        # start() 전이라 아직 scheduler_job 행이 없으면 등록한 뒤 다시 요청
+        db_manager.upsert_scheduler_job(name, job.spec, job.next_run(now))
+        return db_manager.request_scheduler_run(name, now)
+
+    def status(self) -> List[dict]:
+        rows = db_manager.get_scheduler_jobs()
+        out = []
+        for name, job in self.jobs.items():
+            row = rows.get(name, {})
+            next_run = row.get("next_run")
+            out.append({
+                "name": name,
+                "schedule": job.spec,
+                "jitter_seconds": job.jitter,
+                "catch_up": job.catch_up,
+                "next_run": datetime.fromtimestamp(next_run, timezone.utc).strftime(TS_FORMAT) if next_run else None,
+                "requested": bool(row.get("requested")),
+                "running_here": job.running,
+                "last_started": row.get("last_started"),
+                "last_duration_ms": row.get("last_duration_ms"),
+                "last_status": row.get("last_status"),
+                "last_error": row.get("last_error"),
+                "run_count": row.get("run_count", 0),
+            })
+        return out
+
+    def lease(self) -> dict:
+        lease = db_manager.get_scheduler_lease(LEASE_NAME)
+        return {"owner": self.owner, "is_leader": self.is_leader,
+                "holder": lease["owner"] if lease else None,
+                "expires_in": round(lease["expires_at"] - time.time(), 1) if lease else None}
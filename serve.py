@@ -0,0 +1,254 @@
+# serve.py
+"""
+운영용 멀티 프로세스 서버 (app.py 의 개발 서버 대체).
+
+    python serve.py [--workers 4] [--threads 8] [--bind 0.0.0.0:8080] [--no-preload] [--access-log]
+
+- 마스터 프로세스가 소켓을 열고 DB 스키마/마이그레이션을 한 번 적용한 뒤 워커 N 개를 fork 합니다.
+  워커는 fork 뒤에 app 을 import 하므로 DB 연결, 백그라운드 스레드, 센서 캐시가 모두 워커별이고,
+  같은 소켓에서 연결을 나눠 받습니다. GIL 이 프로세스마다 따로라 읽기 API 처리량이 코어 수까지 거의 선형으로 늘어납니다.
+- SERVER_PRELOAD_MODELS: 마스터가 YOLO 모델을 로드/워밍업한 뒤 fork → 가중치를 copy-on-write 로 공유
+- 스케줄러는 모든 워커에서 시작되지만 SQLite 임대를 가진 하나만 작업을 실행합니다. (scheduler.py)
+  센서 규칙도 'rules' 임대를 가진 워커 하나가 저장된 측정값을 순서대로 평가하고, 상태는 DB 에 저장합니다. (rule_engine.py)
+- DB 쓰기(센서, 분석 결과/작업 상태, 결과 캐시, 스케줄러 임대/작업, 아카이브 삭제/VACUUM, 마이그레이션)는
+  모두 프로세스 간 쓰기 잠금(database/init.py 의 ProcessWriteLock)으로 순서대로 기록되어 busy_timeout 에 기대지 않고,
+  센서 캐시는 조회 때 다른 워커가 쓴 행을 따라잡습니다. /metrics 와 AI 결과 캐시는 워커별 값입니다.
+- 분석 작업 상태는 DB(inference_job)에 저장되어 어느 워커든 /api/jobs/<id> 에 답하고,
+  /api/stream 은 다른 워커가 저장한 센서 값/분석 결과/규칙 이벤트도 전달합니다. (app.py 의 db-follower 스레드)
+- 워커가 죽으면 다시 띄우고, SIGTERM/SIGINT 를 받으면 워커에 SIGTERM 을 보내 진행 중인 요청과
+  대기 중인 센서 데이터를 정리하게 한 뒤(최대 SERVER_GRACEFUL_TIMEOUT 초) 종료합니다.
+- fork 가 없는 플랫폼(Windows)에서는 워커 1개로 실행합니다.
+- gunicorn 을 쓰려면: gunicorn -c gunicorn.conf.py app:app (같은 설정과 준비 단계를 사용)
+"""
+
+import argparse
+import atexit
+import logging
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+
+try:
+    from config import PORT, SERVER_HOST, SERVER_WORKERS, SERVER_THREADS
+    from config import SERVER_PRELOAD_MODELS, SERVER_GRACEFUL_TIMEOUT
+except ImportError:
+    PORT, SERVER_HOST, SERVER_WORKERS, SERVER_THREADS = 8080, "0.0.0.0", 0, 8
+    SERVER_PRELOAD_MODELS, SERVER_GRACEFUL_TIMEOUT = True, 30
+
+# 시작 직후 이 시간(초) 안에 비정상 종료한 워커는 설정/코드 오류로 보고 다시 띄우지 않고 서버를 멈춤
+CRASH_LOOP_SECONDS = 5.0
+
+
+def default_workers() -> int:
+    return int(SERVER_WORKERS) or os.cpu_count() or 1
+
+
+def prepare_master(preload_models: bool = SERVER_PRELOAD_MODELS) -> None:
+    """
+    fork 전에 마스터에서 한 번 실행: 스키마/마이그레이션 적용, (선택) AI 모델 로드 + 워밍업.
+    DB 연결은 닫아 워커가 물려받지 않게 합니다. (SQLite 연결은 fork 를 넘어 쓰면 안 됨)
+    """
+    from database import db_manager
+    from database import init as dbcore
+
+    db_manager.ensure_schema()
+    dbcore.close_pool()
+    if preload_models:
+        from ai_module.strawberry_analyzer import registry
+
+        t0 = time.perf_counter()
+        # 워밍업(fuse, 첫 추론)까지 마쳐야 워커가 바꿔 쓰는 페이지가 적어 공유가 유지됨
+        registry.warm_up(background=False)
+        logging.info(f"[serve] 모델 미리 로드 완료 ({time.perf_counter() - t0:.1f}s): {registry.status()}")
+
+
+class ConcurrencyLimit:
+    """
+    워커 하나가 동시에 실행하는 요청 수를 threads 로 제한하는 WSGI 래퍼.
+    응답 본문을 만드는 동안만 자리를 차지하므로 스트림(/api/stream)은 연결이 열려 있어도 자리를 쓰지 않습니다.
+    """
+
+    def __init__(self, wsgi_app, threads: int) -> None:
+        self.wsgi_app = wsgi_app
+        self.threads = max(1, int(threads))
+        self._slots = threading.BoundedSemaphore(self.threads)
+
+    def __call__(self, environ, start_response):
+        with self._slots:
+            return self.wsgi_app(environ, start_response)
+
+    def drain(self, timeout: float) -> bool:
+        """진행 중인 요청이 모두 끝날 때까지(최대 timeout 초) 기다립니다. 새 요청은 더 받지 않는 상태에서 호출."""
+        deadline = time.monotonic() + timeout
+        for _ in range(self.threads):
+            if not self._slots.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                return False
+        return True
+
+
+class _Shutdown(Exception):
+    pass
+
+
+def _raise_shutdown(signum, frame):
+    raise _Shutdown()
+
+
+def run_worker(sock: socket.socket, threads: int, access_log: bool = False,
+               graceful_timeout: float = SERVER_GRACEFUL_TIMEOUT) -> None:
+    """워커 본체: app 을 import 하고 sock 에서 요청을 받습니다. SIGTERM 을 받으면 진행 중인 요청을 마치고 반환."""
+    from werkzeug.serving import make_server
+
+    signal.signal(signal.SIGTERM, _raise_shutdown)
+    if not access_log:
+        logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+    import app as server
+
+    host, port = sock.getsockname()[:2]
+    limit = ConcurrencyLimit(server.app, threads)
+    httpd = make_server(host, port, limit, threaded=True, fd=sock.fileno())
+    logging.info(f"[serve] 워커 {os.getpid()} 시작 (동시 요청 {threads})")
+    try:
+        httpd.serve_forever()
+    except _Shutdown:
+        logging.info(f"[serve] 워커 {os.getpid()} 종료 중")
+    finally:
+        signal.signal(signal.SIGTERM, signal.SIG_IGN)  # 정리 도중 신호가 다시 와도 끊기지 않도록
+        httpd.server_close()
+    if not limit.drain(graceful_timeout):
+        logging.warning(f"[serve] 워커 {os.getpid()}: 끝나지 않은 요청을 두고 종료합니다.")
+
+
+def _worker_main(sock: socket.socket, threads: int, access_log: bool, graceful_timeout: float) -> None:
+    """fork 한 자식에서 실행. 마스터의 코드로 돌아가지 않도록 여기서 프로세스를 끝냅니다."""
+    # Ctrl+C 는 터미널이 프로세스 그룹 전체에 보내므로 워커는 무시하고 마스터의 SIGTERM 을 기다림
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, _raise_shutdown)
+    code = 0
+    try:
+        run_worker(sock, threads, access_log, graceful_timeout)
+    except _Shutdown:
+        pass  # 시작(app import) 도중 종료 신호
+    except BaseException:
+        logging.exception(f"[serve] 워커 {os.getpid()} 비정상 종료")
+        code = 1
+    # 센서 write-behind 큐 flush, 분석 큐/스케줄러 정지 등 app 이 등록한 종료 처리를 실행한 뒤 종료
+    # (os._exit 은 atexit 를 건너뛰므로 직접 실행)
+    try:
+        atexit._run_exitfuncs()
+    finally:
+        logging.shutdown()
+        os._exit(code)
+
+
+class Master:
+    """워커 프로세스를 띄우고 감시합니다. 죽은 워커는 다시 띄우고, 종료 신호를 받으면 모두 정리합니다."""
+
+    def __init__(self, sock: socket.socket, workers: int, threads: int,
+                 graceful_timeout: float = SERVER_GRACEFUL_TIMEOUT, access_log: bool = False) -> None:
+        self.sock = sock
+        self.workers = max(1, int(workers))
+        self.threads = threads
+        self.graceful_timeout = graceful_timeout
+        self.access_log = access_log
+        self.children = {}  # pid -> 시작 시각
+        self.stopping = False
+        self.exit_code = 0
+
+    def _spawn(self) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _worker_main(self.sock, self.threads, self.access_log, self.graceful_timeout)
+        self.children[pid] = time.monotonic()
+
+    def _on_signal(self, signum, frame) -> None:
+        if not self.stopping:
+            logging.info(f"[serve] 종료 신호({signal.Signals(signum).name}) 수신, 워커 {len(self.children)}개 정리")
+        self.stopping = True
+
+    def _reap(self) -> None:
+        while self.children:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None or self.stopping:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            logging.warning(f"[serve] 워커 {pid} 종료됨 (exit {code})")
+            if code != 0 and time.monotonic() - started < CRASH_LOOP_SECONDS:
+                logging.error("[serve] 워커가 시작 직후 종료되어 서버를 멈춥니다. 위 로그의 오류를 확인하세요.")
+                self.stopping, self.exit_code = True, 1
+                return
+            self._spawn()
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._on_signal)
+        signal.signal(signal.SIGINT, self._on_signal)
+        for _ in range(self.workers):
+            self._spawn()
+        logging.info(f"[serve] 워커 {self.workers}개 x 동시 요청 {self.threads} 로 실행 중 (pid {os.getpid()})")
+        while not self.stopping:
+            self._reap()
+            time.sleep(0.2)
+
+        for pid in list(self.children):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        # 워커가 요청을 마치고(graceful_timeout) 남은 센서 데이터를 기록할 여유를 조금 더 줌
+        deadline = time.monotonic() + self.graceful_timeout + 5
+        while self.children and time.monotonic() < deadline:
+            self._reap()
+            time.sleep(0.1)
+        for pid in list(self.children):
+            logging.warning(f"[serve] 워커 {pid} 가 제때 끝나지 않아 강제 종료합니다.")
+            try:
+                os.kill(pid, signal.SIGKILL)
+                os.waitpid(pid, 0)
+            except (ProcessLookupError, ChildProcessError):
+                pass
+        self.children.clear()
+        return self.exit_code
+
+
+def _parse_bind(value: str):
+    host, _, port = value.rpartition(":")
+    return (host or SERVER_HOST).strip("[]"), int(port)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--bind", default=f"{SERVER_HOST}:{PORT}", help="host:port")
+    parser.add_argument("--workers", type=int, default=default_workers(), help="워커 프로세스 수")
+    parser.add_argument("--threads", type=int, default=SERVER_THREADS, help="워커당 동시 요청 수")
+    parser.add_argument("--no-preload", dest="preload", action="store_false", default=SERVER_PRELOAD_MODELS,
+                        help="마스터에서 AI 모델을 미리 로드하지 않음 (워커마다 로드)")
+    parser.add_argument("--access-log", action="store_true", help="요청마다 접근 로그 출력")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - [%(process)d] %(levelname)s - %(message)s")
+    host, port = _parse_bind(args.bind)
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.create_server((host, port), family=family, backlog=2048)
+    prepare_master(args.preload)
+
+    if not hasattr(os, "fork"):
+        logging.warning("[serve] 이 플랫폼은 fork 를 지원하지 않아 워커 1개로 실행합니다.")
+        try:
+            run_worker(sock, args.threads, args.access_log)
+        except (KeyboardInterrupt, _Shutdown):
+            pass
+        return 0
+
+    logging.info(f"[serve] http://{host}:{port} 에서 대기")
+    return Master(sock, args.workers, args.threads, access_log=args.access_log).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
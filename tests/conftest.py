@@ -0,0 +1,23 @@
+# tests/conftest.py
+import os
+import sys
+
+import pytest
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+
+
+@pytest.fixture
+def temp_db(tmp_path):
+    """임시 DB 에 스키마를 적용하고, 끝나면 연결 풀을 닫고 원래 경로로 되돌립니다. (프로젝트 database.db 는 건드리지 않음)"""
+    from database import db_manager
+    from database import init as dbcore
+
+    previous = dbcore.DB_PATH
+    path = str(tmp_path / "test.db")
+    dbcore.set_db_path(path)
+    db_manager.ensure_schema()
+    yield path
+    dbcore.set_db_path(previous)
@@ -0,0 +1,24 @@
+# tests/test_camera_orchestrator.py
+import pytest
+
+from camera_orchestrator import CameraNode, CaptureOrchestrator
+
+NODES = [CameraNode("a", "http://a"), CameraNode("b", "http://b"), CameraNode("c", "http://c")]
+
+
+@pytest.fixture
+def orchestrator(monkeypatch):
+    orch = CaptureOrchestrator(NODES, deliver=lambda node, data: None)
+    monkeypatch.setattr(orch, "capture", lambda node: {"node": node.name, "ok": True})
+    yield orch
+    orch.close()
+
+
+def test_capture_all_accepts_generator(orchestrator):
+    results = orchestrator.capture_all(n for n in ("c", "a"))
+    assert [r["node"] for r in results] == ["c", "a"]
+
+
+def test_capture_all_rejects_unknown_node(orchestrator):
+    with pytest.raises(ValueError):
+        orchestrator.capture_all(iter(["a", "x"]))
@@ -0,0 +1,37 @@
+# tests/test_image_capture.py
+import sqlite3
+
+from database import archive, db_manager
+
+DIGEST = "cd" * 32
+DETECTIONS = {"flower": [[0, 0.9, 1, 2, 3, 4]]}
+
+
+def _save(**kwargs):
+    return db_manager.save_image_analysis_result(f"sha256:{DIGEST}", flower_count=1, detections=DETECTIONS, **kwargs)
+
+
+def test_each_capture_gets_its_own_row(temp_db):
+    first = _save()
+    second = _save(cached=True)
+    assert first["image_id"] != second["image_id"]
+
+    conn = sqlite3.connect(temp_db)
+    rows = conn.execute("SELECT id, file_path, content_hash FROM image_capture ORDER BY id").fetchall()
+    assert [r[2] for r in rows] == [DIGEST, DIGEST]
+    # 같은 이미지를 다시 찍어도 검출 박스는 촬영마다 저장
+    counts = dict(conn.execute("SELECT image_id, count(*) FROM ai_detection GROUP BY image_id").fetchall())
+    assert counts == {first["image_id"]: 1, second["image_id"]: 1}
+
+
+def test_archiving_old_capture_keeps_new_result(temp_db, tmp_path):
+    old = _save()
+    conn = sqlite3.connect(temp_db)
+    conn.execute("UPDATE image_capture SET timestamp = '2000-01-01 00:00:00' WHERE id = ?", (old["image_id"],))
+    conn.commit()
+    new = _save()
+
+    counts = archive.archive_expired(retention_days=30, archive_dir=str(tmp_path / "archive"))
+    assert counts["image_capture"] == 1 and counts["ai_result"] == 1 and counts["ai_detection"] == 1
+    assert [r["id"] for r in db_manager.get_all_analysis_data()] == [new["image_id"]]
+    assert conn.execute("SELECT count(*) FROM ai_detection WHERE image_id = ?", (new["image_id"],)).fetchone()[0] == 1
@@ -0,0 +1,186 @@
+# tests/test_migrations.py
+import sqlite3
+
+import pytest
+
+from database import db_manager
+from database import init as dbcore
+
+# 저장소에 들어 있던 초기 database.db 의 스키마 (마이그레이션 도입 전, user_version 0)
+BASELINE_SCHEMA = """
+CREATE TABLE sensor_data (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    soil_moisture REAL,
+    air_temperature REAL,
+    air_humidity REAL,
+    light_intensity REAL,
+    water_level REAL
+);
+CREATE TABLE image_capture (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    file_path TEXT NOT NULL
+);
+CREATE TABLE ai_result (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    image_id INTEGER NOT NULL,
+    ripeness_score REAL,
+    flower_score REAL,
+    ripeness_text TEXT,
+    flower_text TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY(image_id) REFERENCES image_capture(id) ON DELETE CASCADE
+);
+CREATE INDEX idx_sensor_timestamp ON sensor_data (timestamp DESC);
+CREATE INDEX idx_image_timestamp ON image_capture (timestamp DESC);
+CREATE INDEX idx_ai_image_id ON ai_result (image_id);
+"""
+
+
+@pytest.fixture
+def legacy_db(tmp_path):
+    """초기 스키마에 정규화되지 않은 timestamp 와 중복 file_path 를 넣은 DB."""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany(
+        "INSERT INTO sensor_data (timestamp, air_temperature) VALUES (?, ?)",
+        [("2024-05-01T09:00:00+09:00", 20.0),
+         ("2024-05-01 00:01:00.500", 21.0),
+         ("2024-05-01T00:02:00", 22.0),
+         ("2024-05-01 00:03:00", 23.0)],
+    )
+    conn.executemany(
+        "INSERT INTO image_capture (timestamp, file_path) VALUES (?, ?)",
+        [("2024-05-01T09:00:00+09:00", "a.jpg"),
+         ("2024-05-01T00:05:00.25", "b.jpg"),
+         ("2024-05-01 00:06:00", "a.jpg")],
+    )
+    conn.executemany(
+        "INSERT INTO ai_result (image_id, ripeness_score, flower_score, ripeness_text) VALUES (?, ?, ?, ?)",
+        [(1, 0.5, 2, "half"), (2, 0.9, 0, "ripe"), (3, 0.7, 1, "half")],
+    )
+    conn.commit()
+    conn.close()
+
+    previous = dbcore.DB_PATH
+    dbcore.set_db_path(path)
+    dbcore.create_tables()
+    yield path
+    dbcore.set_db_path(previous)
+
+
+def _connect(path):
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _plan(conn, sql, params=()):
+    return " ".join(r["detail"] for r in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+
+
+def test_baseline_db_reaches_latest_version(legacy_db):
+    conn = _connect(legacy_db)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == dbcore._MIGRATIONS[-1][0]
+    cols = {r["name"] for r in conn.execute("PRAGMA table_info(ai_result)")}
+    assert {"flower_count", "cached", "summary_json"} <= cols and "flower_score" not in cols
+    tables = {r["name"] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+    assert {"sensor_rollup_minute", "ai_detection", "scheduler_job", "inference_job", "rule_event"} <= tables
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+
+def test_timestamps_are_canonicalized(legacy_db):
+    conn = _connect(legacy_db)
+    assert [r[0] for r in conn.execute("SELECT timestamp FROM sensor_data ORDER BY id")] == [
+        "2024-05-01 00:00:00", "2024-05-01 00:01:00", "2024-05-01 00:02:00", "2024-05-01 00:03:00"]
+    assert [r[0] for r in conn.execute("SELECT timestamp FROM image_capture ORDER BY id")] == [
+        "2024-05-01 00:00:00", "2024-05-01 00:05:00"]
+    # 롤업 백필도 정규화된 시각 기준
+    row = conn.execute("SELECT air_temperature_count FROM sensor_rollup_hour WHERE bucket = '2024-05-01 00:00:00'")
+    assert row.fetchone()[0] == 4
+
+
+def test_duplicate_file_paths_are_merged(legacy_db):
+    conn = _connect(legacy_db)
+    assert [tuple(r) for r in conn.execute("SELECT id, file_path FROM image_capture ORDER BY id")] == [
+        (1, "a.jpg"), (2, "b.jpg")]
+    # 중복 행의 분석 결과는 남은 행으로 옮겨짐
+    assert [tuple(r) for r in conn.execute("SELECT id, image_id, flower_count FROM ai_result ORDER BY id")] == [
+        (1, 1, 2), (2, 2, 0), (3, 1, 1)]
+    # 이후 촬영은 같은 경로라도 행을 따로 가짐 (UNIQUE 없음)
+    conn.execute("INSERT INTO image_capture (file_path) VALUES ('a.jpg')")
+
+
+def test_migrated_db_accepts_new_results(legacy_db):
+    saved = db_manager.save_image_analysis_result("c.jpg", ripeness_score=0.8, flower_count=3, ripeness_text="ripe")
+    rows = db_manager.get_all_analysis_data()
+    assert any(r["file_path"] == "c.jpg" and r["flower_count"] == 3 for r in rows)
+    assert saved
+
+
+def test_migrated_indexes_are_used(legacy_db):
+    conn = _connect(legacy_db)
+    assert "idx_sensor_timestamp" in _plan(
+        conn, "SELECT id FROM sensor_data WHERE timestamp >= ? ORDER BY timestamp DESC, id DESC LIMIT 10",
+        ("2024-05-01 00:00:00",))
+    assert "idx_image_timestamp" in _plan(
+        conn, "SELECT id FROM image_capture WHERE timestamp BETWEEN ? AND ?",
+        ("2024-05-01 00:00:00", "2024-05-02 00:00:00"))
+    assert "idx_ai_image_id" in _plan(conn, "SELECT id FROM ai_result WHERE image_id = ?", (1,))
+    assert "idx_image_file_path" in _plan(conn, "SELECT id FROM image_capture WHERE file_path = ?", ("a.jpg",))
+
+
+def test_content_hash_is_backfilled_from_path(tmp_path):
+    path = str(tmp_path / "hashed.db")
+    digest = "ab" * 32
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.executemany("INSERT INTO image_capture (file_path) VALUES (?)",
+                     [(f"sha256:{digest}",), (f"/srv/uploads/{digest}.jpg",), ("/srv/uploads/old.jpg",)])
+    conn.commit()
+    conn.close()
+    previous = dbcore.DB_PATH
+    dbcore.set_db_path(path)
+    try:
+        dbcore.create_tables()
+    finally:
+        dbcore.set_db_path(previous)
+    conn = _connect(path)
+    assert [r[0] for r in conn.execute("SELECT content_hash FROM image_capture ORDER BY id")] == [digest, digest, None]
+    assert "idx_image_content_hash" in _plan(conn, "SELECT id FROM image_capture WHERE content_hash = ?", (digest,))
+
+
+def test_unique_file_path_table_is_rebuilt_without_losing_results(tmp_path):
+    # 이전 create_tables() 가 만든 'file_path TEXT NOT NULL UNIQUE' 테이블: 다시 만들어도 자식 행이 CASCADE 로 지워지지 않아야 함
+    path = str(tmp_path / "unique.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA.replace("file_path TEXT NOT NULL", "file_path TEXT NOT NULL UNIQUE"))
+    conn.execute("INSERT INTO image_capture (timestamp, file_path) VALUES ('2024-05-01 00:00:00', 'a.jpg')")
+    conn.execute("INSERT INTO ai_result (image_id, flower_score) VALUES (1, 2)")
+    conn.commit()
+    conn.close()
+    previous = dbcore.DB_PATH
+    dbcore.set_db_path(path)
+    try:
+        dbcore.create_tables()
+    finally:
+        dbcore.set_db_path(previous)
+    conn = _connect(path)
+    assert not any(r["unique"] for r in conn.execute("PRAGMA index_list(image_capture)"))
+    assert [tuple(r) for r in conn.execute("SELECT image_id, flower_count FROM ai_result")] == [(1, 2)]
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+
+def test_fresh_db_has_no_unique_file_path(temp_db):
+    conn = _connect(temp_db)
+    assert not any(r["unique"] for r in conn.execute("PRAGMA index_list(image_capture)"))
+    assert "content_hash" in {r["name"] for r in conn.execute("PRAGMA table_info(image_capture)")}
+
+
+def test_migrate_is_idempotent(legacy_db):
+    dbcore.create_tables()
+    conn = _connect(legacy_db)
+    assert conn.execute("SELECT count(*) FROM image_capture").fetchone()[0] == 2
+    assert conn.execute("SELECT count(*) FROM ai_result").fetchone()[0] == 3
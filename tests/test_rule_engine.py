@@ -0,0 +1,155 @@
+# tests/test_rule_engine.py
+import json
+import math
+import time
+
+import pytest
+
+from database import db_manager
+from rule_engine import RuleEngine, RuleEvaluator, rules_from_config
+
+
+def _engine(specs):
+    events = []
+    return RuleEngine(rules_from_config(specs), emit=events.append), events
+
+
+# --- NaN/inf 측정값 ---
+
+@pytest.mark.parametrize("bad", [math.nan, math.inf, -math.inf, "nan"])
+def test_non_finite_value_does_not_clear_active_rule(bad):
+    engine, events = _engine({"hot": {"field": "air_temperature", "above": 30}})
+    engine.evaluate({"air_temperature": 35}, ts=0)
+    assert [e["state"] for e in events] == ["fired"]
+
+    assert engine.evaluate({"air_temperature": bad}, ts=60) == []
+    assert engine.rules[0].active
+    assert engine.status()["fields"]["air_temperature"]["last_value"] == 35.0
+
+
+def test_non_finite_value_does_not_poison_rolling_stats():
+    engine, events = _engine({"spike": {"field": "air_temperature", "zscore": 3, "window": 10, "min_samples": 5}})
+    for i in range(20):
+        engine.evaluate({"air_temperature": 20 + (i % 2) * 0.5}, ts=i * 60)
+    engine.evaluate({"air_temperature": math.nan}, ts=20 * 60)
+
+    stats = engine.status()["fields"]["air_temperature"]["stats"]["10"]
+    assert math.isfinite(stats["mean"]) and math.isfinite(stats["std"]) and stats["samples"] == 20
+    # /api/rules 응답이 유효한 JSON 이어야 함 (NaN 리터럴 없음)
+    json.dumps(engine.status(), allow_nan=False)
+    # 이상치는 계속 잡힘
+    engine.evaluate({"air_temperature": 40}, ts=21 * 60)
+    assert [e["state"] for e in events] == ["fired"]
+
+
+def test_non_finite_value_does_not_move_rate_reference():
+    engine, events = _engine({"drain": {"field": "water_level", "rate_below": -5}})
+    engine.evaluate({"water_level": 80}, ts=0)
+    engine.evaluate({"water_level": math.inf}, ts=60)
+    engine.evaluate({"water_level": 60}, ts=120)
+    assert [e["state"] for e in events] == ["fired"]
+
+
+# --- 상태 내보내기/되돌리기 ---
+
+def test_export_restore_round_trip():
+    specs = {"hot": {"field": "air_temperature", "above": 30},
+             "spike": {"field": "air_temperature", "zscore": 3, "window": 10, "min_samples": 5}}
+    engine, _ = _engine(specs)
+    for i in range(12):
+        engine.evaluate({"air_temperature": 25 + i}, ts=i * 60)
+    state = json.loads(json.dumps(engine.export_state(), allow_nan=False))
+
+    restored, _ = _engine(specs)
+    restored.restore_state(state)
+    assert restored.status() == engine.status()
+    # 이어받은 엔진은 원래 엔진과 같은 이벤트를 냄 (활성 규칙 해제 포함)
+    expected = engine.evaluate({"air_temperature": 20}, ts=12 * 60)
+    assert restored.evaluate({"air_temperature": 20}, ts=12 * 60) == expected
+    assert ("hot", "cleared") in [(e["rule"], e["state"]) for e in expected]
+
+
+# --- RuleEvaluator (임대를 가진 한 프로세스만 평가) ---
+
+HOT = {"too_hot": {"field": "air_temperature", "above": 30,
+                   "action": {"actuator": "fan", "command": "on"}, "clear_action": {"actuator": "fan", "command": "off"}}}
+
+
+def _evaluator(owner):
+    events = []
+    engine = RuleEngine(rules_from_config(HOT), emit=events.append)
+    return RuleEvaluator(engine, interval=1, lease_ttl=30, owner=owner), events
+
+
+def _insert(*temperatures):
+    db_manager.save_sensor_data_batch([db_manager.normalize_sensor_reading({"air_temperature": t})
+                                       for t in temperatures])
+
+
+def test_only_lease_holder_evaluates(temp_db):
+    now = time.time()
+    a, a_events = _evaluator("a")
+    b, b_events = _evaluator("b")
+    a.tick(now)
+    b.tick(now)
+    assert a.is_leader and not b.is_leader
+
+    _insert(35, 36)
+    assert a.tick(now + 1) == 2
+    assert b.tick(now + 1) == 0
+    assert [e["state"] for e in a_events] == ["fired"] and b_events == []
+    saved = db_manager.get_rule_engine_state()
+    assert saved["owner"] == "a" and saved["status"]["rules"][0]["active"]
+
+
+def test_new_lease_holder_resumes_saved_state(temp_db):
+    now = time.time()
+    a, a_events = _evaluator("a")
+    b, b_events = _evaluator("b")
+    a.tick(now)
+    _insert(35)
+    a.tick(now + 1)
+    a.stop()  # 임대 반납
+
+    _insert(20)
+    assert b.tick(now + 2) == 1
+    assert [(e["state"], e["command"]) for e in b_events] == [("cleared", {"actuator": "fan", "command": "off"})]
+    assert [e["state"] for e in a_events] == ["fired"]
+
+
+def test_takeover_after_crash_evaluates_rows_since_last_save(temp_db):
+    now = time.time()
+    a, _ = _evaluator("a")
+    b, b_events = _evaluator("b")
+    a.tick(now)
+    _insert(35)
+    a.tick(now + 1)
+    # a 는 임대를 반납하지 못하고 죽음: 임대가 만료된 뒤(저장된 상태보다 lease_ttl 이상 지난 시각) b 가 넘겨받음
+    _insert(20)
+    assert b.tick(now + 20) == 0 and not b.is_leader
+    assert b.tick(now + 40) == 1
+    assert [e["state"] for e in b_events] == ["cleared"]
+
+
+def test_stale_state_skips_backlog_but_keeps_rule_state(temp_db):
+    now = time.time()
+    a, _ = _evaluator("a")
+    b, b_events = _evaluator("b")
+    a.tick(now)
+    _insert(35)
+    a.tick(now + 1)
+    a.stop()
+
+    _insert(20, 21)
+    assert b.tick(now + 100) == 0
+    assert b.engine.rules[0].active and b_events == []
+    _insert(19)
+    assert b.tick(now + 101) == 1
+    assert [e["state"] for e in b_events] == ["cleared"]
+
+
+def test_rule_events_are_trimmed_to_history(temp_db):
+    for i in range(5):
+        db_manager.save_rule_event({"rule": "r", "state": "fired", "value": i}, history=3)
+    events = db_manager.get_rule_events(limit=10)
+    assert [e["value"] for e in events] == [4, 3, 2]
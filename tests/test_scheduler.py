@@ -0,0 +1,217 @@
+# tests/test_scheduler.py
+from datetime import datetime, timezone
+
+import pytest
+
+import scheduler as sched
+from database import db_manager
+from scheduler import CronSchedule, Scheduler, parse_duration
+
+
+def _ts(*args) -> float:
+    return datetime(*args, tzinfo=timezone.utc).timestamp()
+
+
+# --- parse_duration ---
+
+@pytest.mark.parametrize("value, seconds", [
+    (90, 90.0), (1.5, 1.5), ("45", 45.0), ("30s", 30.0), ("15m", 900.0), ("12h", 43200.0),
+    ("30d", 2592000.0), ("1w", 604800.0), (" 2M ", 120.0),
+])
+def test_parse_duration(value, seconds):
+    assert parse_duration(value) == seconds
+
+
+def test_parse_duration_rejects_garbage():
+    with pytest.raises(ValueError):
+        parse_duration("soon")
+
+
+# --- CronSchedule.next_after ---
+
+@pytest.mark.parametrize("expr, after, expected", [
+    # 매 15분: 다음 15분 경계
+    ("*/15 * * * *", _ts(2026, 3, 1, 10, 7, 30), _ts(2026, 3, 1, 10, 15)),
+    # 정확히 예정 시각이면 그 다음 회차 (항상 after 보다 뒤)
+    ("0 3 * * *", _ts(2026, 3, 1, 3, 0), _ts(2026, 3, 2, 3, 0)),
+    # 범위/목록
+    ("0 9-17/4 * * *", _ts(2026, 3, 1, 13, 30), _ts(2026, 3, 1, 17, 0)),
+    ("5,35 * * * *", _ts(2026, 3, 1, 10, 5), _ts(2026, 3, 1, 10, 35)),
+    # 월말 -> 다음 달 1일, 연말 -> 다음 해
+    ("0 0 1 * *", _ts(2026, 1, 31, 12, 0), _ts(2026, 2, 1, 0, 0)),
+    ("30 23 31 12 *", _ts(2026, 12, 31, 23, 30), _ts(2027, 12, 31, 23, 30)),
+    # 윤년에만 있는 날
+    ("0 0 29 2 *", _ts(2025, 1, 1), _ts(2028, 2, 29)),
+    # 요일: 2026-03-01 은 일요일, 7 도 일요일
+    ("0 6 * * 1", _ts(2026, 3, 1, 12, 0), _ts(2026, 3, 2, 6, 0)),
+    ("0 6 * * 7", _ts(2026, 3, 1, 12, 0), _ts(2026, 3, 8, 6, 0)),
+    # 일/요일이 모두 지정되면 둘 중 하나만 맞아도 실행 (13일 또는 금요일; 2026-03-06 이 금요일)
+    ("0 0 13 * 5", _ts(2026, 3, 1), _ts(2026, 3, 6)),
+    ("0 0 13 * 5", _ts(2026, 3, 12, 1), _ts(2026, 3, 13)),
+])
+def test_cron_next_after(expr, after, expected):
+    assert CronSchedule(expr).next_after(after) == expected
+
+
+@pytest.mark.parametrize("expr", ["* * * *", "60 * * * *", "* 24 * * *", "* * 0 * *", "5-1 * * * *", "* * * 13 *"])
+def test_cron_rejects_invalid_expressions(expr):
+    with pytest.raises(ValueError):
+        CronSchedule(expr)
+
+
+def test_cron_that_never_matches_raises():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(_ts(2026, 1, 1))
+
+
+# --- 임대 (scheduler_lease) ---
+
+def test_lease_is_exclusive_until_it_expires(temp_db):
+    now = 1_000_000.0
+    assert db_manager.claim_scheduler_lease("scheduler", "a", 30, now)
+    assert not db_manager.claim_scheduler_lease("scheduler", "b", 30, now + 10)
+    # 소유자는 연장 가능
+    assert db_manager.claim_scheduler_lease("scheduler", "a", 30, now + 20)
+    assert not db_manager.claim_scheduler_lease("scheduler", "b", 30, now + 49)
+    # 만료되면 다른 소유자가 가져감
+    assert db_manager.claim_scheduler_lease("scheduler", "b", 30, now + 51)
+    assert db_manager.get_scheduler_lease("scheduler")["owner"] == "b"
+
+
+def test_lease_release_only_by_owner(temp_db):
+    now = 1_000_000.0
+    assert db_manager.claim_scheduler_lease("scheduler", "a", 30, now)
+    db_manager.release_scheduler_lease("scheduler", "b")
+    assert db_manager.get_scheduler_lease("scheduler")["owner"] == "a"
+    db_manager.release_scheduler_lease("scheduler", "a")
+    assert db_manager.get_scheduler_lease("scheduler") is None
+    assert db_manager.claim_scheduler_lease("scheduler", "b", 30, now + 1)
+
+
+# --- next_run compare-and-set ---
+
+def test_claim_job_is_compare_and_set(temp_db):
+    db_manager.upsert_scheduler_job("job", "every 1m", 100.0)
+    assert db_manager.claim_scheduler_job("job", 100.0, 160.0)
+    # 같은 회차를 두 번째로 가져가려는 쪽은 실패
+    assert not db_manager.claim_scheduler_job("job", 100.0, 170.0)
+    assert db_manager.get_scheduler_jobs()["job"]["next_run"] == 160.0
+
+
+def test_upsert_keeps_next_run_unless_schedule_changes(temp_db):
+    db_manager.upsert_scheduler_job("job", "every 1m", 100.0)
+    db_manager.upsert_scheduler_job("job", "every 1m", 999.0)
+    assert db_manager.get_scheduler_jobs()["job"]["next_run"] == 100.0
+    db_manager.upsert_scheduler_job("job", "every 5m", 999.0)
+    assert db_manager.get_scheduler_jobs()["job"]["next_run"] == 999.0
+
+
+def test_request_run_pulls_next_run_forward_and_claim_clears_it(temp_db):
+    db_manager.upsert_scheduler_job("job", "every 1h", 5000.0)
+    assert db_manager.request_scheduler_run("job", 1000.0)
+    row = db_manager.get_scheduler_jobs()["job"]
+    assert row["requested"] and row["next_run"] == 1000.0
+    assert db_manager.claim_scheduler_job("job", 1000.0, 4600.0)
+    assert not db_manager.get_scheduler_jobs()["job"]["requested"]
+    assert not db_manager.request_scheduler_run("missing", 1000.0)
+
+
+# --- 실행 판정 (_run_due: 예정/놓친 실행/수동 요청) ---
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """_spawn 을 가로채 실제로 스레드를 띄우지 않고 (작업, trigger) 만 기록."""
+    calls = []
+    monkeypatch.setattr(Scheduler, "_spawn", lambda self, job, trigger: calls.append((job.name, trigger)))
+    return calls
+
+
+def _scheduler(catch_up=True, tick=1.0):
+    s = Scheduler(tick=tick, owner="test")
+    s.add("job", lambda: None, every="10m", catch_up=catch_up)
+    return s
+
+
+def test_due_job_runs_once_and_moves_next_run(temp_db, spawned):
+    s = _scheduler()
+    db_manager.upsert_scheduler_job("job", s.jobs["job"].spec, 1000.0)
+    s._run_due(999.0)
+    assert spawned == []
+    s._run_due(1000.5)
+    assert spawned == [("job", "schedule")]
+    assert db_manager.get_scheduler_jobs()["job"]["next_run"] == 1000.5 + 600
+    s._run_due(1001.0)
+    assert spawned == [("job", "schedule")]
+
+
+def test_missed_runs_are_caught_up_once(temp_db, spawned):
+    s = _scheduler(catch_up=True)
+    # 10분 간격 작업이 하루 동안 꺼져 있었음 -> 한 번만 실행
+    db_manager.upsert_scheduler_job("job", s.jobs["job"].spec, 1000.0)
+    now = 1000.0 + 86400
+    s._run_due(now)
+    s._run_due(now + 1)
+    assert spawned == [("job", "catch_up")]
+    assert db_manager.get_scheduler_jobs()["job"]["next_run"] == now + 600
+
+
+def test_missed_runs_are_skipped_without_catch_up(temp_db, spawned):
+    s = _scheduler(catch_up=False)
+    db_manager.upsert_scheduler_job("job", s.jobs["job"].spec, 1000.0)
+    now = 1000.0 + 86400
+    s._run_due(now)
+    assert spawned == []
+    assert db_manager.get_scheduler_jobs()["job"]["next_run"] == now + 600
+
+
+def test_manual_request_runs_even_without_catch_up(temp_db, spawned):
+    s = _scheduler(catch_up=False)
+    db_manager.upsert_scheduler_job("job", s.jobs["job"].spec, 1000.0)
+    db_manager.request_scheduler_run("job", 500.0)
+    s._run_due(5000.0)
+    assert spawned == [("job", "manual")]
+
+
+def test_two_schedulers_do_not_run_the_same_slot(temp_db, spawned, monkeypatch):
+    a, b = _scheduler(), _scheduler()
+    db_manager.upsert_scheduler_job("job", a.jobs["job"].spec, 1000.0)
+    stale = db_manager.get_scheduler_jobs()
+    a._run_due(1000.5)
+    # b 가 a 보다 먼저 읽은 행(next_run=1000)으로 판정해도 compare-and-set 에서 짐
+    monkeypatch.setattr(db_manager, "get_scheduler_jobs", lambda: stale)
+    b._run_due(1000.5)
+    assert spawned == [("job", "schedule")]
+
+
+def test_running_job_is_not_started_again(temp_db, spawned):
+    s = _scheduler()
+    db_manager.upsert_scheduler_job("job", s.jobs["job"].spec, 1000.0)
+    s.jobs["job"].running = True
+    s._run_due(1000.5)
+    assert spawned == []
+    assert db_manager.get_scheduler_jobs()["job"]["next_run"] == 1000.0
+
+
+# --- 수동 실행 요청 ---
+
+def test_trigger_registers_job_before_start(temp_db):
+    s = _scheduler()
+    assert "job" not in db_manager.get_scheduler_jobs()
+    assert s.trigger("job")
+    assert db_manager.get_scheduler_jobs()["job"]["requested"]
+    assert not s.trigger("unknown")
+
+
+def test_jitter_delays_within_bound(monkeypatch):
+    s = Scheduler(owner="test")
+    job = s.add("job", lambda: None, every="1m", jitter="30s")
+    monkeypatch.setattr(sched.random, "uniform", lambda lo, hi: hi)
+    assert job.next_run(0.0) == 90.0
+
+
+def test_add_requires_exactly_one_schedule():
+    s = Scheduler(owner="test")
+    with pytest.raises(ValueError):
+        s.add("job", lambda: None)
+    with pytest.raises(ValueError):
+        s.add("job", lambda: None, every="1m", cron="* * * * *")
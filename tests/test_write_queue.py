@@ -0,0 +1,194 @@
+# tests/test_write_queue.py
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from database import db_manager
+from database.write_queue import SensorWriteQueue
+
+
+class FakeStore:
+    """flush_fn 대역: 받은 배치를 기록하고, fail 만큼 먼저 실패합니다."""
+
+    def __init__(self, fail=0):
+        self.batches = []
+        self.calls = 0
+        self.fail = fail
+        self.flushed = threading.Event()
+
+    def __call__(self, batch):
+        self.calls += 1
+        if self.fail:
+            self.fail -= 1
+            raise RuntimeError("database is locked")
+        self.batches.append(list(batch))
+        self.flushed.set()
+        return len(batch)
+
+    @property
+    def rows(self):
+        return [row for batch in self.batches for row in batch]
+
+
+def _rows(n, start=0):
+    return [(None, float(i)) for i in range(start, start + n)]
+
+
+def _wait_for(cond, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not cond():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.005)
+
+
+# --- flush 시점 ---
+
+def test_flushes_when_batch_size_reached():
+    store = FakeStore()
+    q = SensorWriteQueue(store, flush_size=3, flush_interval=60)
+    q.start()
+    try:
+        assert q.put_many(_rows(7))
+        _wait_for(lambda: len(store.rows) == 6)
+        assert [len(b) for b in store.batches] == [3, 3]
+    finally:
+        q.stop()
+    assert store.rows == _rows(7)
+
+
+def test_flushes_partial_batch_at_deadline():
+    store = FakeStore()
+    q = SensorWriteQueue(store, flush_size=100, flush_interval=0.05)
+    q.start()
+    try:
+        q.put_many(_rows(2))
+        assert store.flushed.wait(2)
+        assert store.batches == [_rows(2)]
+    finally:
+        q.stop()
+
+
+def test_stop_drains_queue_in_flush_size_chunks():
+    store = FakeStore()
+    q = SensorWriteQueue(store, flush_size=4, flush_interval=60)
+    q.start()
+    q.put_many(_rows(3))
+    q.put_many(_rows(7, start=3))
+    q.stop()
+    assert store.rows == _rows(10)
+    assert all(len(b) <= 4 for b in store.batches)
+    assert q.qsize() == 0 and q.flushed_rows == 10
+    with pytest.raises(RuntimeError):
+        q.put_many(_rows(1))
+
+
+def test_concurrent_puts_during_stop_are_written_or_rejected():
+    store = FakeStore()
+    q = SensorWriteQueue(store, flush_size=50, flush_interval=60, maxsize=100000)
+    q.start()
+    accepted = []
+
+    def producer(k):
+        for i in range(200):
+            try:
+                q.put_many([(None, float(k * 1000 + i))])
+            except RuntimeError:
+                return
+            accepted.append(k * 1000 + i)
+
+    threads = [threading.Thread(target=producer, args=(k,)) for k in range(4)]
+    for t in threads:
+        t.start()
+    time.sleep(0.01)
+    q.stop()
+    for t in threads:
+        t.join()
+    # 받아들인(예외 없이 반환된) 행은 모두 기록되고, 종료 후 남은 행은 없음
+    assert sorted(row[1] for row in store.rows) == sorted(float(v) for v in accepted)
+    assert q.qsize() == 0
+
+
+# --- 큐가 가득 찬 경우 ---
+
+def test_full_queue_rejects_whole_batch():
+    store = FakeStore()
+    q = SensorWriteQueue(store, flush_size=100, flush_interval=60, maxsize=5)  # 시작하지 않음: 소비되지 않음
+    assert q.put_many(_rows(3))
+    assert not q.put_many(_rows(3, start=3))
+    assert q.qsize() == 3
+    assert q.put_many(_rows(2, start=3))
+    assert q.qsize() == 5
+    q.start()
+    q.stop()
+    assert store.rows == _rows(5)
+
+
+# --- 저장 실패 ---
+
+def test_failed_batch_is_retried_in_order():
+    store = FakeStore(fail=2)
+    q = SensorWriteQueue(store, flush_size=2, flush_interval=60, retry_delay=0.001)
+    q.start()
+    q.put_many(_rows(4))
+    q.stop()
+    assert store.rows == _rows(4)
+    assert q.retried_batches == 2 and q.dropped_rows == 0 and q.flushed_rows == 4
+
+
+def test_batch_dropped_after_max_attempts():
+    store = FakeStore(fail=3)
+    q = SensorWriteQueue(store, flush_size=2, flush_interval=60, max_attempts=3, retry_delay=0.001)
+    q.start()
+    q.put_many(_rows(4))
+    q.stop()
+    assert store.calls == 4
+    assert store.rows == _rows(2, start=2)
+    assert q.dropped_rows == 2 and q.flushed_rows == 2
+
+
+# --- 측정 시각 ---
+
+def test_normalize_reading_timestamp():
+    assert db_manager.normalize_sensor_reading({"air_temperature": 1})[0] is None
+    assert db_manager.normalize_sensor_reading({"timestamp": "2024-05-01T09:30:00+09:00"})[0] == "2024-05-01 00:30:00"
+    assert db_manager.normalize_sensor_reading({"timestamp": "2024-05-01T00:30:00.250Z"})[0] == "2024-05-01 00:30:00"
+    assert db_manager.normalize_sensor_reading({"timestamp": "2024-05-01 00:30:00"})[0] == "2024-05-01 00:30:00"
+    assert db_manager.normalize_sensor_reading({"timestamp": 1714523400})[0] == "2024-05-01 00:30:00"
+
+
+@pytest.mark.parametrize("bad", ["yesterday", True, [1], 1e20])
+def test_normalize_rejects_invalid_timestamp(bad):
+    with pytest.raises(ValueError):
+        db_manager.normalize_sensor_reading({"timestamp": bad})
+
+
+def test_normalize_rejects_future_timestamp():
+    future = datetime.now(timezone.utc) + timedelta(hours=1)
+    with pytest.raises(ValueError):
+        db_manager.normalize_sensor_reading({"timestamp": future.isoformat()})
+
+
+def test_batch_keeps_reading_timestamps(temp_db):
+    db_manager.save_sensor_data_batch([
+        db_manager.normalize_sensor_reading({"timestamp": "2024-05-01T00:00:00Z", "air_temperature": 20}),
+        db_manager.normalize_sensor_reading({"air_temperature": 21}),
+        db_manager.normalize_sensor_reading({"timestamp": "2024-05-01T00:01:00Z", "air_temperature": 22}),
+    ])
+    rows = sorted(db_manager.get_all_sensor_data(), key=lambda r: r["id"])
+    assert [r["timestamp"] for r in (rows[0], rows[2])] == ["2024-05-01 00:00:00", "2024-05-01 00:01:00"]
+    assert rows[1]["timestamp"] > "2025-01-01"
+    # 캐시도 DB 와 같은 시각을 가짐
+    assert db_manager.get_latest_sensor_data()["timestamp"] == "2024-05-01 00:01:00"
+
+
+def test_cache_range_query_falls_back_when_evicted_row_is_newer():
+    from database.sensor_cache import SensorRingCache
+
+    cache = SensorRingCache(2, ("v",))
+    # id 1 은 최근 시각, 뒤이어 장치가 예전 시각의 행들을 올림
+    cache.append_many(1, [("2024-05-01 00:10:00", 1.0), ("2024-05-01 00:00:00", 2.0), ("2024-05-01 00:01:00", 3.0)])
+    # 버퍼 밖으로 밀려난 id 1 이 범위에 들어가므로 버퍼만으로는 답할 수 없음
+    assert cache.query(from_ts="2024-05-01 00:05:00") is None
+    assert [r["id"] for r in cache.query(from_ts="2024-05-01 00:00:30", limit=1)] == [3]